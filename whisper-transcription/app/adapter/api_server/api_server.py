@@ -0,0 +1,367 @@
+"""
+機械クライアント向けのHTTP APIサーバー
+
+Streamlitを経由せずに動画を投入し、バックグラウンドジョブの状態を問い合わせ、結果ファイルをRange対応で取得する。
+アップロードはメモリに溜めず、チャンク単位でそのまま作業領域に書き込む。
+
+実行例（appディレクトリで実行する）:
+    python -m adapter.api_server.api_server --port 8770
+
+エンドポイント:
+    POST /jobs?target_language=en&target_language=ja&trim_start=10&trim_end=70&provider=gemini&render=true
+        本文はMP4のバイト列（Content-Lengthまたは Transfer-Encoding: chunked）。202でジョブIDを返す
+    GET  /jobs/<job_id>                       ジョブの状態と結果のURL
+    GET  /jobs/<job_id>/results/<結果名>       結果ファイル（segments.json, subtitles/<言語>.srt, video/<言語>.mp4）
+    GET  /healthz                             状態ごとのジョブ数
+    GET  /metrics                             Prometheus形式のメトリクス
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from adapter.media_server.range_file_server import send_file_range
+from adapter.workspace.workspace_manager import get_workspace_manager
+from config import ApiConstants, Settings
+from domain.entities.llm_provider import LLMProvider
+from usecase.service.pipeline_job_service import PipelineJob, PipelineJobService
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+mimetypes.add_type("application/x-subrip", ".srt")
+
+
+class UploadError(Exception):
+    """アップロードを受け付けられない場合の例外（HTTPステータスを持つ）"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """PipelineJobServiceをHTTPで公開するサーバー"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        job_service: PipelineJobService,
+        max_upload_bytes: int,
+        public_url: Optional[str] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けホスト
+            port: 待ち受けポート（0の場合は空きポートを自動で使用）
+            job_service: ジョブ管理サービス
+            max_upload_bytes: アップロードの最大サイズ（バイト）
+            public_url: クライアントから見たベースURL（Noneの場合はhost:portから生成）
+        """
+        self._host = host
+        self._port = port
+        self._public_url = public_url.rstrip("/") if public_url else None
+        self.job_service = job_service
+        self.max_upload_bytes = max_upload_bytes
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        if self._public_url:
+            return self._public_url
+        return f"http://{self._host}:{self._port}"
+
+    def start(self) -> None:
+        """サーバーをデーモンスレッドで起動する"""
+        server = self
+
+        class Handler(_ApiRequestHandler):
+            api_server = server
+
+        self._server = ThreadingHTTPServer((self._host, self._port), Handler)
+        self._server.daemon_threads = True
+        self._port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="api-server", daemon=True).start()
+        logger.info(f"api server started: {self.base_url}")
+
+    def stop(self) -> None:
+        """サーバーを停止する"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def job_response(self, job: PipelineJob) -> Dict[str, Any]:
+        """ジョブの状態に結果ファイルのURLを付けた応答を返す"""
+        payload = job.to_dict()
+        payload["status_url"] = f"{self.base_url}/jobs/{job.job_id}"
+        payload["results"] = {
+            name: f"{self.base_url}/jobs/{job.job_id}/results/{quote(name)}"
+            for name in payload["results"]
+        }
+        return payload
+
+
+class _ApiRequestHandler(BaseHTTPRequestHandler):
+    """APIのルーティングとアップロードの受信"""
+
+    api_server: ApiServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"api server: {format % args}")
+
+    def do_GET(self) -> None:
+        self._serve_get(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._serve_get(send_body=False)
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._reject(HTTPStatus.NOT_FOUND, "見つかりません。")
+            return
+        try:
+            options = self._parse_job_options(parse_qs(url.query))
+        except ValueError as e:
+            self._reject(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        job_service = self.api_server.job_service
+        workspace = job_service.create_upload_workspace()
+        upload_path = workspace.new_path(".mp4")
+        upload_start = time.time()
+        try:
+            upload_bytes = self._receive_upload(upload_path)
+        except BaseException as e:
+            # 受信に失敗したアップロードは、作業ディレクトリを終了済みにしてファイルを削除する
+            workspace.finish()
+            if os.path.exists(upload_path):
+                os.unlink(upload_path)
+            if not isinstance(e, UploadError):
+                raise
+            # 本文を読み切っていないため、接続は再利用しない
+            self.close_connection = True
+            self._send_json(e.status, {"error": str(e)})
+            return
+        get_metrics().observe(
+            "api_upload_seconds",
+            time.time() - upload_start,
+            help_text="Time spent receiving an API upload.",
+        )
+        logger.info(f"api upload received: path={upload_path} bytes={upload_bytes}")
+        job = job_service.submit(workspace, upload_path, **options)
+        self._send_json(HTTPStatus.ACCEPTED, self.api_server.job_response(job))
+
+    def _serve_get(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        if url.path == "/healthz":
+            self._send_json(HTTPStatus.OK, {"status": "ok", "jobs": self.api_server.job_service.summary()}, send_body)
+            return
+        if url.path == "/metrics":
+            body = get_metrics().render_prometheus().encode("utf-8")
+            self._send_bytes(HTTPStatus.OK, body, "text/plain; version=0.0.4; charset=utf-8", send_body)
+            return
+        if len(parts) < 2 or parts[0] != "jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "見つかりません。"}, send_body)
+            return
+        job = self.api_server.job_service.get(parts[1])
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "ジョブが見つかりません。"}, send_body)
+            return
+        if len(parts) == 2:
+            self._send_json(HTTPStatus.OK, self.api_server.job_response(job), send_body)
+            return
+        if len(parts) < 4 or parts[2] != "results":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "見つかりません。"}, send_body)
+            return
+        output_path = job.outputs.get("/".join(parts[3:]))
+        if output_path is None or not os.path.exists(output_path):
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "結果ファイルが見つかりません。"}, send_body)
+            return
+        self.api_server.job_service.workspace_manager.touch(output_path)
+        download = "download" in parse_qs(url.query)
+        send_file_range(
+            self,
+            Path(output_path),
+            send_body=send_body,
+            download=download,
+            download_name=parts[-1],
+        )
+
+    @staticmethod
+    def _parse_job_options(query: Dict[str, List[str]]) -> Dict[str, Any]:
+        """クエリパラメータからジョブの設定を取り出す"""
+        provider_value = query.get("provider", [LLMProvider.GEMINI.value])[0]
+        try:
+            provider = LLMProvider(provider_value)
+        except ValueError:
+            raise ValueError(f"不明なプロバイダーです: {provider_value}")
+        target_languages = [
+            language.strip()
+            for value in query.get("target_language", [])
+            for language in value.split(",")
+            if language.strip()
+        ]
+        trim_range: Optional[Tuple[float, float]] = None
+        if "trim_start" in query or "trim_end" in query:
+            try:
+                trim_range = (float(query["trim_start"][0]), float(query["trim_end"][0]))
+            except (KeyError, ValueError):
+                raise ValueError("trim_startとtrim_endは両方を秒数で指定してください。")
+            if trim_range[1] <= trim_range[0] or trim_range[0] < 0:
+                raise ValueError("切り抜き範囲が不正です。")
+        render = query.get("render", ["true"])[0].lower() != "false"
+        return {
+            "provider": provider,
+            "target_languages": target_languages,
+            "trim_range": trim_range,
+            "render": render,
+        }
+
+    def _receive_upload(self, upload_path: str) -> int:
+        """
+        リクエスト本文をチャンク単位でファイルに書き込む
+
+        Returns:
+            書き込んだバイト数
+
+        Raises:
+            UploadError: 長さが不明・上限超過・MP4ではない場合
+        """
+        max_bytes = self.api_server.max_upload_bytes
+        chunked = "chunked" in self.headers.get("Transfer-Encoding", "").lower()
+        content_length = None
+        if not chunked:
+            content_length = self._parse_content_length(self.headers.get("Content-Length"))
+            if content_length > max_bytes:
+                raise UploadError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "アップロードが上限サイズを超えています。")
+
+        written = 0
+        # MP4の判定に使う先頭8バイト（チャンクの区切りに関係なく貯めてから判定する）
+        header = b""
+        with open(upload_path, "wb") as f:
+            chunks = self._iter_chunked_body() if chunked else self._iter_body(content_length)
+            for chunk in chunks:
+                if len(header) < 8:
+                    header += chunk[: 8 - len(header)]
+                    if len(header) == 8 and header[4:8] != b"ftyp":
+                        raise UploadError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "MP4形式のみ対応しています。")
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "アップロードが上限サイズを超えています。")
+                f.write(chunk)
+        if written == 0:
+            raise UploadError(HTTPStatus.BAD_REQUEST, "本文が空です。")
+        if len(header) < 8:
+            raise UploadError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "MP4形式のみ対応しています。")
+        return written
+
+    @staticmethod
+    def _parse_content_length(value: Optional[str]) -> int:
+        """
+        Content-Lengthを検証して整数で返す
+
+        Raises:
+            UploadError: 未指定（411）・数値でない・負の値（400）の場合
+        """
+        if value is None:
+            raise UploadError(HTTPStatus.LENGTH_REQUIRED, "Content-LengthまたはTransfer-Encoding: chunkedが必要です。")
+        value = value.strip()
+        if not (value.isascii() and value.isdigit()):
+            raise UploadError(HTTPStatus.BAD_REQUEST, "Content-Lengthが不正です。")
+        return int(value)
+
+    def _iter_body(self, length: int):
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(ApiConstants.UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise UploadError(HTTPStatus.BAD_REQUEST, "アップロードが途中で切断されました。")
+            remaining -= len(chunk)
+            yield chunk
+
+    def _iter_chunked_body(self):
+        """Transfer-Encoding: chunkedの本文を、送られてきたチャンクをさらに上限サイズで区切って返す"""
+        while True:
+            size_line = self.rfile.readline(1024)
+            if not size_line:
+                raise UploadError(HTTPStatus.BAD_REQUEST, "アップロードが途中で切断されました。")
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise UploadError(HTTPStatus.BAD_REQUEST, "chunked形式が不正です。")
+            if size == 0:
+                # トレーラーを読み捨てる
+                while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield from self._iter_body(size)
+            self.rfile.readline(1024)
+
+    def _reject(self, status: HTTPStatus, message: str) -> None:
+        # 本文を読まずに応答するため、接続は再利用しない
+        self.close_connection = True
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status: HTTPStatus, payload: Dict[str, Any], send_body: bool = True) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send_bytes(status, body, "application/json; charset=utf-8", send_body)
+
+    def _send_bytes(self, status: HTTPStatus, body: bytes, content_type: str, send_body: bool = True) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def main() -> None:
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="動画処理のHTTP APIサーバー")
+    parser.add_argument("--host", default=settings.API_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_SERVER_PORT)
+    parser.add_argument("--job-workers", type=int, default=settings.API_JOB_WORKERS)
+    args = parser.parse_args()
+
+    job_service = PipelineJobService(
+        get_workspace_manager(),
+        job_workers=args.job_workers,
+        stage_concurrency=settings.API_STAGE_CONCURRENCY,
+        max_retained_jobs=settings.API_MAX_RETAINED_JOBS,
+    )
+    server = ApiServer(
+        args.host,
+        args.port,
+        job_service,
+        max_upload_bytes=settings.API_MAX_UPLOAD_BYTES,
+        public_url=settings.API_SERVER_PUBLIC_URL,
+    )
+    server.start()
+    print(f"APIサーバーを起動しました: {server.base_url}/jobs")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
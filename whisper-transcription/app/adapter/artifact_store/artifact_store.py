@@ -0,0 +1,231 @@
+"""
+出力動画を入力のハッシュで管理するアーティファクトストア
+同じ入力（元動画・切り抜き範囲・セグメント・スタイル・エンコード設定）の出力は再レンダリングせずに再利用し、
+内容が同一の出力はハードリンクで1つの実体を共有する
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from config import Settings, SubtitleConstants
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def build_artifact_key(**inputs: object) -> str:
+    """
+    出力の入力一式からアーティファクトのキーを作成する
+
+    Args:
+        inputs: 出力を決める入力（JSONに変換できる値）
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    canonical = json.dumps(inputs, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def hash_segments(segments: object) -> str:
+    """
+    セグメントのリストのハッシュを計算する
+
+    Args:
+        segments: セグメントのリスト
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    return build_artifact_key(segments=segments)
+
+
+class ArtifactStore:
+    """キーで出力を引ける、内容アドレス方式の出力動画ストア"""
+
+    def __init__(self, root: Path):
+        """
+        初期化
+
+        Args:
+            root: ストアのルート（objects/に実体、by_key/にキーごとのハードリンクを置く）
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.by_key_dir = self.root / "by_key"
+        self.index_path = self.root / "index.sqlite3"
+        self._lock = threading.Lock()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.by_key_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    artifact_key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    suffix TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    def lookup(self, artifact_key: str) -> Optional[str]:
+        """
+        キーに対応する出力を取得する
+
+        Args:
+            artifact_key: build_artifact_keyで作成したキー
+
+        Returns:
+            出力ファイルのパス（未登録・ファイルが削除済みの場合はNone）
+        """
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT suffix FROM artifacts WHERE artifact_key = ?",
+                (artifact_key,),
+            ).fetchone()
+            path = self.by_key_dir / f"{artifact_key}{row[0]}" if row else None
+            if path is not None and not path.exists():
+                # 手動で削除された場合は索引からも消す
+                connection.execute("DELETE FROM artifacts WHERE artifact_key = ?", (artifact_key,))
+                path = None
+            if path is not None:
+                connection.execute(
+                    "UPDATE artifacts SET last_used_at = ?, hit_count = hit_count + 1 WHERE artifact_key = ?",
+                    (time.time(), artifact_key),
+                )
+        get_metrics().inc(
+            "artifact_store_lookups_total",
+            help_text="Artifact store lookups by result.",
+            result="hit" if path is not None else "miss",
+        )
+        return str(path) if path is not None else None
+
+    def store(self, artifact_key: str, source_path: str) -> str:
+        """
+        出力を登録する（内容が同じ実体が既にあればハードリンクを張るだけにする）
+
+        Args:
+            artifact_key: build_artifact_keyで作成したキー
+            source_path: 登録する出力ファイルのパス（ファイルはそのまま残す）
+
+        Returns:
+            ストア内の出力ファイルのパス
+        """
+        suffix = Path(source_path).suffix
+        content_hash = self._hash_file(source_path)
+        object_path = self.objects_dir / content_hash[:2] / f"{content_hash}{suffix}"
+        key_path = self.by_key_dir / f"{artifact_key}{suffix}"
+        deduplicated = object_path.exists()
+        if not deduplicated:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = object_path.with_name(f"{object_path.name}.{os.getpid()}.tmp")
+            self._link_or_copy(Path(source_path), temp_path)
+            temp_path.replace(object_path)
+        temp_key_path = key_path.with_name(f"{key_path.name}.{os.getpid()}.tmp")
+        self._link_or_copy(object_path, temp_key_path)
+        temp_key_path.replace(key_path)
+
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                """
+                INSERT INTO artifacts (artifact_key, content_hash, suffix, size_bytes, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (artifact_key) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    suffix = excluded.suffix,
+                    size_bytes = excluded.size_bytes,
+                    last_used_at = excluded.last_used_at
+                """,
+                (artifact_key, content_hash, suffix, object_path.stat().st_size, now, now),
+            )
+        logger.info(
+            "artifact stored: key=%s content=%s deduplicated=%s",
+            artifact_key[:16],
+            content_hash[:16],
+            deduplicated,
+        )
+        return str(key_path)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        登録件数と実体の合計サイズを返す
+
+        Returns:
+            {"artifacts": キー数, "objects": 実体の数, "stored_bytes": 実体の合計バイト数} の形式
+        """
+        with self._lock, self._connect() as connection:
+            artifacts, objects, stored_bytes = connection.execute(
+                """
+                SELECT COUNT(*), COUNT(DISTINCT content_hash),
+                       COALESCE((SELECT SUM(size_bytes) FROM (
+                           SELECT MAX(size_bytes) AS size_bytes FROM artifacts GROUP BY content_hash
+                       )), 0)
+                FROM artifacts
+                """
+            ).fetchone()
+        return {"artifacts": artifacts, "objects": objects, "stored_bytes": stored_bytes}
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _link_or_copy(source: Path, destination: Path) -> None:
+        """ハードリンクを張る（別のファイルシステムなどで張れない場合はコピーする）"""
+        if destination.exists():
+            destination.unlink()
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            # withブロックを抜けるとコミット（例外時はロールバック）する
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """
+    プロセス共通のアーティファクトストアを取得する
+
+    Returns:
+        ArtifactStore（ARTIFACT_STORE_ENABLEDが無効の場合はNone）
+    """
+    global _artifact_store
+    if not Settings().ARTIFACT_STORE_ENABLED:
+        return None
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(SubtitleConstants.OUTPUT_MP4_DIR)
+        return _artifact_store
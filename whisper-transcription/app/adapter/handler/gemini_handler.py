@@ -3,14 +3,18 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 import json
 import logging
+import mimetypes
+import os
 from config import Settings
+from utli.metrics import record_llm_usage
 
 logger = logging.getLogger(__name__)
 
 
 class GeminiHandlerConfig:
-    def __init__(self):
-        self.model_name = Settings().GEMINI_MODEL_NAME
+    def __init__(self, model_name: str | None = None):
+        # model_nameを指定した場合は設定のモデルより優先する（ルーティングで使用）
+        self.model_name = model_name or Settings().GEMINI_MODEL_NAME
         self.api_key = Settings().GOOGLE_API_KEY
 
 
@@ -18,6 +22,14 @@ class GeminiHandler(ILLMHandler):
     def __init__(self, config: GeminiHandlerConfig):
         self._config = config
 
+    @property
+    def provider_name(self) -> str:
+        return "gemini"
+
+    @property
+    def model_name(self) -> str:
+        return self._config.model_name or "unknown"
+
     def invoke(
         self,
         system_prompt: str,
@@ -37,6 +49,7 @@ class GeminiHandler(ILLMHandler):
         )
 
         messages = [SystemMessage(content=system_prompt)]
+        media_bytes = b""
         if media_path:
             with open(media_path, "rb") as f:
                 media_bytes = f.read()
@@ -46,7 +59,7 @@ class GeminiHandler(ILLMHandler):
                         {"type": "text", "text": user_prompt},
                         {
                             "type": "media",
-                            "mime_type": "video/mp4",
+                            "mime_type": _guess_mime_type(media_path),
                             "data": media_bytes,
                         },
                     ]
@@ -58,6 +71,12 @@ class GeminiHandler(ILLMHandler):
         res = llm.invoke(
             input=messages,
         )
+        record_llm_usage(
+            self.provider_name,
+            self.model_name,
+            getattr(res, "usage_metadata", None),
+            media_bytes=len(media_bytes),
+        )
 
         if isinstance(res.content, list):
             return "\n".join([str(item) for item in res.content])
@@ -65,3 +84,23 @@ class GeminiHandler(ILLMHandler):
             return json.dumps(res.content)
         else:
             return res.content
+
+
+# mimetypesで判定できない拡張子（環境によって登録されていないもの）
+_MIME_TYPES = {
+    ".mp4": "video/mp4",
+    ".aac": "audio/aac",
+    ".ogg": "audio/ogg",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mp3",
+    ".flac": "audio/flac",
+}
+
+
+def _guess_mime_type(media_path: str) -> str:
+    """メディアファイルの拡張子からmime typeを判定する（音声のみのメディアも送れるようにする）"""
+    extension = os.path.splitext(media_path)[1].lower()
+    if extension in _MIME_TYPES:
+        return _MIME_TYPES[extension]
+    mime_type, _ = mimetypes.guess_type(media_path)
+    return mime_type or "video/mp4"
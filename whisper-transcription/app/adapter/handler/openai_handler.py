@@ -4,18 +4,28 @@ from langchain_openai import ChatOpenAI
 import json
 import logging
 from config import Settings
+from utli.metrics import record_llm_usage
 
 logger = logging.getLogger(__name__)
 
 class OpenAIHandlerConfig:
-    def __init__(self):
-        self.model_name = Settings().OPENAI_MODEL_NAME
+    def __init__(self, model_name: str | None = None):
+        # model_nameを指定した場合は設定のモデルより優先する（ルーティングで使用）
+        self.model_name = model_name or Settings().OPENAI_MODEL_NAME
         self.api_key = Settings().OPENAI_API_KEY
 
 class OpenAIHandler(ILLMHandler):
     def __init__(self, config: OpenAIHandlerConfig):
         self._config = config
 
+    @property
+    def provider_name(self) -> str:
+        return "openai"
+
+    @property
+    def model_name(self) -> str:
+        return self._config.model_name or "unknown"
+
     def invoke(
         self,
         system_prompt: str,
@@ -56,6 +66,7 @@ class OpenAIHandler(ILLMHandler):
         res = llm.invoke(
             input=messages,
         )
+        record_llm_usage(self.provider_name, self.model_name, getattr(res, "usage_metadata", None))
 
         if isinstance(res.content, list):
             return "\n".join([str(item) for item in res.content])
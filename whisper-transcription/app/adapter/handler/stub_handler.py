@@ -0,0 +1,66 @@
+from adapter.llm_client.i_llm_client import ILLMHandler
+from http import HTTPStatus
+import json
+import logging
+import urllib.error
+import urllib.request
+from config import Settings
+from utli.metrics import record_llm_usage
+
+logger = logging.getLogger(__name__)
+
+
+class StubHandlerConfig:
+    def __init__(self, model_name: str | None = None):
+        self.url = Settings().STUB_LLM_URL
+        self.timeout_seconds = Settings().STUB_LLM_TIMEOUT_SECONDS
+        self.model_name = model_name or "stub"
+
+
+class StubHandler(ILLMHandler):
+    """負荷試験用のローカルスタブLLMサーバー（benchmarks/stub_llm_server.py）を呼び出すハンドラ"""
+
+    def __init__(self, config: StubHandlerConfig):
+        self._config = config
+
+    @property
+    def provider_name(self) -> str:
+        return "stub"
+
+    @property
+    def model_name(self) -> str:
+        return self._config.model_name
+
+    def invoke(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None,
+        json_schema: dict | None,
+        media_path: str | None = None,
+    ) -> str:
+        body = json.dumps({
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "temperature": temperature,
+            "json_schema": json_schema,
+            "media_path": media_path,
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self._config.url.rstrip('/')}/invoke",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self._config.timeout_seconds) as response:
+                res = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code == HTTPStatus.TOO_MANY_REQUESTS:
+                raise ConnectionError(f"スタブLLMサーバーがレート制限を返しました: {e.code}") from e
+            raise ConnectionError(f"スタブLLMサーバーがエラーを返しました: {e.code}") from e
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"スタブLLMサーバーに接続できません: {e.reason}") from e
+
+        record_llm_usage(self.provider_name, self.model_name, res.get("usage_metadata"))
+        return res["content"]
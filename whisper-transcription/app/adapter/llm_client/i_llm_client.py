@@ -12,3 +12,11 @@ class ILLMHandler(ABC):
         media_path: str | None = None,
     ) -> str:
         pass
+
+    @property
+    def provider_name(self) -> str:
+        return "unknown"
+
+    @property
+    def model_name(self) -> str:
+        return "unknown"
@@ -1,5 +1,9 @@
 from adapter.llm_client.i_llm_client import ILLMHandler
-from utli.logger import get_logger
+from config import Settings
+from utli.logger import TruncatedPayload, get_logger
+from utli.metrics import get_metrics
+import logging
+import random
 import time
 
 
@@ -8,6 +12,9 @@ class LLMClient(ILLMHandler):
         
         self._llm_handler = llm_handler
         self._logger = get_logger(__name__)
+        settings = Settings()
+        self._payload_sample_rate = settings.LOG_PAYLOAD_SAMPLE_RATE
+        self._payload_max_chars = settings.LOG_PAYLOAD_MAX_CHARS
         
 
     def invoke(
@@ -30,25 +37,38 @@ class LLMClient(ILLMHandler):
             )
 
             duration = time.time() - start_time
+            self._record_latency(duration, "ok")
+            # サマリーは常に出力し、プロンプト・レスポンス本文はサンプリングした呼び出しのみ出力する
             self._logger.info(
-                f"LLM_CALL_COMPLETE: duration={duration:.3f}s\n"
-                f"=== SYSTEM PROMPT ===\n{system_prompt}\n"
-                f"=== USER PROMPT ===\n{user_prompt}\n"
-                f"=== JSON schema ===\n{json_schema if json_schema else 'None'}\n"
-                f"=== MEDIA PATH ===\n{media_path if media_path else 'None'}\n"
-                f"=== RESPONSE ===\n{response}\n"
-                f"=== END LLM CALL ==="
+                "LLM_CALL_COMPLETE: duration=%.3fs provider=%s model=%s "
+                "system_prompt_chars=%d user_prompt_chars=%d response_chars=%d media_path=%s",
+                duration,
+                self.provider_name,
+                self.model_name,
+                len(system_prompt),
+                len(user_prompt),
+                len(response or ""),
+                media_path,
             )
+            self._log_payload(system_prompt, user_prompt, json_schema, media_path, response)
             return response
 
         except Exception as e:
             duration = time.time() - start_time
+            self._record_latency(duration, "error")
+            self._logger.warning(
+                "LLM_CALL_FAILED: duration=%.3fs provider=%s model=%s error=%s",
+                duration,
+                self.provider_name,
+                self.model_name,
+                type(e).__name__,
+            )
 
             error_details = (
                 f"LLM_CALL_FAILED (duration={duration:.3f}s)\n"
-                f"=== SYSTEM PROMPT ===\n{system_prompt}\n"
-                f"=== USER PROMPT ===\n{user_prompt}\n"
-                f"=== JSON schema ===\n{json_schema if json_schema else 'None'}\n"
+                f"=== SYSTEM PROMPT ===\n{TruncatedPayload(system_prompt, self._payload_max_chars)}\n"
+                f"=== USER PROMPT ===\n{TruncatedPayload(user_prompt, self._payload_max_chars)}\n"
+                f"=== JSON schema ===\n{TruncatedPayload(json_schema, self._payload_max_chars)}\n"
                 f"=== MEDIA PATH ===\n{media_path if media_path else 'None'}\n"
             )
 
@@ -58,4 +78,49 @@ class LLMClient(ILLMHandler):
                 raise ValueError(error_details) from e
             else:
                 raise RuntimeError(error_details) from e
-    
+
+    def _log_payload(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        json_schema: dict | None,
+        media_path: str | None,
+        response: str,
+    ) -> None:
+        if self._payload_sample_rate <= 0 or random.random() >= self._payload_sample_rate:
+            return
+        if not self._logger.isEnabledFor(logging.INFO):
+            return
+        # 文字列化・切り詰めはロガーのリスナースレッドで行われる
+        self._logger.info(
+            "LLM_CALL_PAYLOAD:\n"
+            "=== SYSTEM PROMPT ===\n%s\n"
+            "=== USER PROMPT ===\n%s\n"
+            "=== JSON schema ===\n%s\n"
+            "=== MEDIA PATH ===\n%s\n"
+            "=== RESPONSE ===\n%s\n"
+            "=== END LLM CALL ===",
+            TruncatedPayload(system_prompt, self._payload_max_chars),
+            TruncatedPayload(user_prompt, self._payload_max_chars),
+            TruncatedPayload(json_schema, self._payload_max_chars),
+            media_path,
+            TruncatedPayload(response, self._payload_max_chars),
+        )
+
+    def _record_latency(self, duration: float, status: str) -> None:
+        get_metrics().observe(
+            "llm_request_duration_seconds",
+            duration,
+            help_text="LLM request latency by provider and model.",
+            provider=self._llm_handler.provider_name,
+            model=self._llm_handler.model_name,
+            status=status,
+        )
+
+    @property
+    def provider_name(self) -> str:
+        return self._llm_handler.provider_name
+
+    @property
+    def model_name(self) -> str:
+        return self._llm_handler.model_name
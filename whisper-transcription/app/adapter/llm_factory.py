@@ -1,30 +1,80 @@
+from typing import Optional
+from config import Settings
 from domain.entities.llm_provider import LLMProvider
+from domain.entities.llm_task import LLMTask
 from adapter.llm_client.llm_client import LLMClient
-from adapter.handler.openai_handler import OpenAIHandler, OpenAIHandlerConfig
-from adapter.handler.gemini_handler import GeminiHandler, GeminiHandlerConfig
+from adapter.llm_routing_policy import LLMRoutingPolicy, media_capable_provider
 
 class LLMFactory:
     """LLMクライアントを生成するファクトリクラス"""
     
-    def __init__(self, provider: LLMProvider):
+    def __init__(self, provider: LLMProvider, routing_policy: Optional[LLMRoutingPolicy] = None):
         """
         初期化
         
         Args:
             provider: LLMプロバイダー
+            routing_policy: ルーティングポリシー（Noneの場合はLLM_ROUTING_ENABLEDが有効なら既定のポリシーを使用）
         """
         self._provider = provider
+        if routing_policy is None and Settings().LLM_ROUTING_ENABLED:
+            routing_policy = LLMRoutingPolicy()
+        self._routing_policy = routing_policy
 
-    def create_llm(self, provider: LLMProvider | None = None) -> LLMClient:
+    def create_llm(
+        self,
+        provider: LLMProvider | None = None,
+        task: LLMTask | None = None,
+        media_path: str | None = None,
+        media_duration_seconds: float | None = None,
+        segment_count: int | None = None,
+        latency_target_seconds: float | None = None,
+    ) -> LLMClient:
+        """
+        LLMクライアントを生成する
+
+        providerを明示した場合はルーティングせずにそのプロバイダーの既定のモデルを使う。
+        taskを指定した場合はルーティングポリシーでプロバイダーとモデルを選ぶ。
+        ルーティングが無効でも、メディアを入力に取るタスクはメディア入力に対応したプロバイダーで実行する。
+
+        Args:
+            provider: プロバイダー（Noneの場合は初期化時のプロバイダー）
+            task: タスク
+            media_path: 入力メディアのパス
+            media_duration_seconds: 入力メディアの長さ（秒）
+            segment_count: 入力セグメント数
+            latency_target_seconds: レイテンシ目標（秒）
+        """
         resolved_provider = provider if provider else self._provider
+        model_name = None
+        if provider is None and task is not None and self._routing_policy is not None:
+            route = self._routing_policy.route(
+                resolved_provider,
+                task,
+                media_path=media_path,
+                media_duration_seconds=media_duration_seconds,
+                segment_count=segment_count,
+                latency_target_seconds=latency_target_seconds,
+            )
+            resolved_provider, model_name = route.provider, route.model_name
+        elif provider is None and task is not None:
+            resolved_provider = media_capable_provider(resolved_provider, task)
 
+        # ハンドラーはlangchainなど重いSDKを読み込むため、使うプロバイダーのものだけを初回利用時にimportする
         if resolved_provider == LLMProvider.OPENAI:
-            config = OpenAIHandlerConfig()
+            from adapter.handler.openai_handler import OpenAIHandler, OpenAIHandlerConfig
+            config = OpenAIHandlerConfig(model_name)
             handler = OpenAIHandler(config)
             return LLMClient(handler)
         if resolved_provider == LLMProvider.GEMINI:
-            config = GeminiHandlerConfig()
+            from adapter.handler.gemini_handler import GeminiHandler, GeminiHandlerConfig
+            config = GeminiHandlerConfig(model_name)
             handler = GeminiHandler(config)
             return LLMClient(handler)
+        if resolved_provider == LLMProvider.STUB:
+            from adapter.handler.stub_handler import StubHandler, StubHandlerConfig
+            config = StubHandlerConfig(model_name)
+            handler = StubHandler(config)
+            return LLMClient(handler)
 
         raise ValueError(f"Unsupported provider: {resolved_provider}")
@@ -0,0 +1,171 @@
+from typing import Optional
+
+from config import RoutingConstants, Settings
+from domain.entities.llm_provider import LLMProvider
+from domain.entities.llm_task import LLMTask
+from utli.ffmpeg_utils import probe_duration
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+# メディアを入力に取るタスク
+MEDIA_TASKS = {LLMTask.SCENE_EXTRACTION, LLMTask.CANDIDATE_RANKING, LLMTask.TRANSCRIPTION}
+# メディア入力に対応しているプロバイダー
+MEDIA_CAPABLE_PROVIDERS = {LLMProvider.GEMINI, LLMProvider.STUB}
+
+
+def media_capable_provider(provider: LLMProvider, task: LLMTask) -> LLMProvider:
+    """
+    メディアを入力に取るタスクで、メディア入力に対応していないプロバイダーをGeminiに切り替える
+
+    Args:
+        provider: 画面などで指定されたプロバイダー
+        task: タスク
+
+    Returns:
+        タスクを実行できるプロバイダー
+    """
+    if task in MEDIA_TASKS and provider not in MEDIA_CAPABLE_PROVIDERS:
+        return LLMProvider.GEMINI
+    return provider
+
+
+class LLMRoute:
+    """ルーティングの結果"""
+
+    def __init__(self, provider: LLMProvider, model_name: Optional[str], tier: str, reason: str):
+        """
+        初期化
+
+        Args:
+            provider: 呼び出すプロバイダー
+            model_name: 呼び出すモデル名（Noneの場合はハンドラの既定のモデル）
+            tier: "fast"または"heavy"
+            reason: 判定理由
+        """
+        self.provider = provider
+        self.model_name = model_name
+        self.tier = tier
+        self.reason = reason
+
+
+class LLMRoutingPolicy:
+    """タスク・入力サイズ・レイテンシ目標から呼び出すプロバイダーとモデルを選ぶポリシー"""
+
+    def __init__(self, latency_target_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            latency_target_seconds: 既定のレイテンシ目標（Noneの場合はSettings.LLM_LATENCY_TARGET_SECONDSを使用）
+        """
+        settings = Settings()
+        self.latency_target_seconds = (
+            latency_target_seconds
+            if latency_target_seconds is not None
+            else settings.LLM_LATENCY_TARGET_SECONDS
+        )
+        self._model_names = {
+            LLMProvider.OPENAI: {
+                "fast": settings.OPENAI_FAST_MODEL_NAME or settings.OPENAI_MODEL_NAME,
+                "heavy": settings.OPENAI_MODEL_NAME or settings.OPENAI_FAST_MODEL_NAME,
+            },
+            LLMProvider.GEMINI: {
+                "fast": settings.GEMINI_FAST_MODEL_NAME or settings.GEMINI_MODEL_NAME,
+                "heavy": settings.GEMINI_MODEL_NAME or settings.GEMINI_FAST_MODEL_NAME,
+            },
+            LLMProvider.STUB: {"fast": "stub-fast", "heavy": "stub-heavy"},
+        }
+
+    def route(
+        self,
+        default_provider: LLMProvider,
+        task: LLMTask,
+        media_path: Optional[str] = None,
+        media_duration_seconds: Optional[float] = None,
+        segment_count: Optional[int] = None,
+        latency_target_seconds: Optional[float] = None,
+    ) -> LLMRoute:
+        """
+        呼び出すプロバイダーとモデルを決める
+
+        Args:
+            default_provider: 画面などで指定されたプロバイダー
+            task: タスク
+            media_path: 入力メディアのパス（media_duration_secondsが未指定の場合は長さを取得する）
+            media_duration_seconds: 入力メディアの長さ（秒）
+            segment_count: 入力セグメント数
+            latency_target_seconds: レイテンシ目標（Noneの場合は既定の目標）
+
+        Returns:
+            LLMRoute
+        """
+        provider = media_capable_provider(default_provider, task)
+
+        if media_duration_seconds is None and media_path:
+            try:
+                media_duration_seconds = probe_duration(media_path)
+            except RuntimeError:
+                media_duration_seconds = None
+
+        tier, reason = self._select_tier(task, media_duration_seconds, segment_count)
+        target = latency_target_seconds if latency_target_seconds is not None else self.latency_target_seconds
+        if tier == "heavy" and target is not None:
+            estimated = self.estimate_latency("heavy", media_duration_seconds, segment_count)
+            if estimated > target:
+                tier, reason = "fast", "latency_target"
+
+        route = LLMRoute(provider, self._model_names[provider][tier], tier, reason)
+        logger.info(
+            f"llm routing: task={task.value} provider={provider.value} model={route.model_name} "
+            f"tier={tier} reason={reason} duration={media_duration_seconds} segments={segment_count} "
+            f"latency_target={target}"
+        )
+        get_metrics().inc(
+            "llm_routing_decisions_total",
+            help_text="LLM routing decisions by task, provider, model and tier.",
+            task=task.value,
+            provider=provider.value,
+            model=route.model_name or "unknown",
+            tier=tier,
+            reason=reason,
+        )
+        return route
+
+    @staticmethod
+    def estimate_latency(
+        tier: str,
+        media_duration_seconds: Optional[float],
+        segment_count: Optional[int],
+    ) -> float:
+        """
+        tierごとのおおよそのレイテンシ（秒）を見積もる
+
+        Args:
+            tier: "fast"または"heavy"
+            media_duration_seconds: 入力メディアの長さ（秒）
+            segment_count: 入力セグメント数
+        """
+        return (
+            RoutingConstants.BASE_LATENCY_SECONDS[tier]
+            + RoutingConstants.LATENCY_PER_MEDIA_SECOND[tier] * (media_duration_seconds or 0.0)
+            + RoutingConstants.LATENCY_PER_SEGMENT[tier] * (segment_count or 0)
+        )
+
+    @staticmethod
+    def _select_tier(
+        task: LLMTask,
+        media_duration_seconds: Optional[float],
+        segment_count: Optional[int],
+    ) -> tuple[str, str]:
+        if task == LLMTask.TRANSLATION:
+            if segment_count is not None and segment_count <= RoutingConstants.FAST_MAX_SEGMENTS:
+                return "fast", "small_input"
+            return "heavy", "large_input" if segment_count is not None else "unknown_size"
+
+        if media_duration_seconds is None:
+            return "heavy", "unknown_size"
+        if media_duration_seconds <= RoutingConstants.FAST_MAX_MEDIA_SECONDS[task.value]:
+            return "fast", "small_input"
+        return "heavy", "large_input"
@@ -0,0 +1,285 @@
+"""
+Rangeリクエストに対応したローカルファイル配信サーバー
+
+登録されたファイル（またはディレクトリ配下のファイル）だけをトークン付きURLで配信する。
+ファイルはチャンク単位で送信するため、サーバーのメモリ使用量は出力サイズに比例しない。
+"""
+
+import mimetypes
+import re
+import secrets
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+from config import Settings, StreamingConstants
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+
+
+class RangeFileServer:
+    """登録済みファイルをRange対応で配信するHTTPサーバー"""
+
+    def __init__(self, host: str, port: int, public_url: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けホスト
+            port: 待ち受けポート（0の場合は空きポートを自動で使用）
+            public_url: ブラウザから見たベースURL（Noneの場合はhost:portから生成）
+        """
+        self._host = host
+        self._port = port
+        self._public_url = public_url.rstrip("/") if public_url else None
+        self._entries: Dict[str, Path] = {}
+        # 同じファイルの再登録では同じトークン（同じURL）を返す
+        self._tokens: Dict[Path, str] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        if self._public_url:
+            return self._public_url
+        return f"http://{self._host}:{self._port}"
+
+    def start(self) -> None:
+        """サーバーをデーモンスレッドで起動する（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._server is not None:
+                return
+            handler_class = self._build_handler_class()
+            self._server = ThreadingHTTPServer((self._host, self._port), handler_class)
+            self._server.daemon_threads = True
+            self._port = self._server.server_address[1]
+            thread = threading.Thread(
+                target=self._server.serve_forever,
+                name="range-file-server",
+                daemon=True,
+            )
+            thread.start()
+            logger.info(f"media server started: {self.base_url}")
+
+    def register(self, path: str) -> str:
+        """
+        ファイルまたはディレクトリを配信対象に登録する
+
+        登録済みのパスは同じURLを返す。削除済み（作業領域の上限で削除されたものなど）のパスの登録はここで解除する。
+
+        Args:
+            path: 配信するファイル、またはHLS出力などのディレクトリ
+
+        Returns:
+            配信URL（ディレクトリの場合はディレクトリのベースURL）
+        """
+        resolved = Path(path).resolve()
+        if not resolved.exists():
+            raise FileNotFoundError(f"配信対象が見つかりません: {path}")
+        with self._lock:
+            self._expire_missing_entries()
+            token = self._tokens.get(resolved)
+            if token is None:
+                token = secrets.token_urlsafe(16)
+                self._entries[token] = resolved
+                self._tokens[resolved] = token
+        if resolved.is_dir():
+            return f"{self.base_url}/media/{token}/"
+        return f"{self.base_url}/media/{token}/{quote(resolved.name)}"
+
+    def unregister(self, path: str) -> None:
+        """
+        配信対象の登録を解除する（以降、そのURLは404を返す）
+
+        Args:
+            path: register()に渡したパス
+        """
+        resolved = Path(path).resolve()
+        with self._lock:
+            token = self._tokens.pop(resolved, None)
+            if token is not None:
+                del self._entries[token]
+
+    def _expire_missing_entries(self) -> None:
+        """存在しなくなったパスの登録を解除する（ロックを持った状態で呼ぶ）"""
+        for resolved in [resolved for resolved in self._tokens if not resolved.exists()]:
+            del self._entries[self._tokens.pop(resolved)]
+
+    def resolve(self, token: str, relative: str) -> Optional[Path]:
+        """
+        トークンと相対パスから配信対象ファイルを解決する
+
+        Returns:
+            配信可能なファイルパス（登録外・範囲外の場合はNone）
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry.is_file():
+            return entry
+        candidate = (entry / relative).resolve()
+        if entry not in candidate.parents or not candidate.is_file():
+            return None
+        return candidate
+
+    def _build_handler_class(self) -> type:
+        server = self
+
+        class _Handler(_RangeRequestHandler):
+            file_server = server
+
+        return _Handler
+
+
+class _RangeRequestHandler(BaseHTTPRequestHandler):
+    """Range対応のGET/HEADハンドラ"""
+
+    file_server: RangeFileServer
+
+    def do_HEAD(self) -> None:
+        self._serve(send_body=False)
+
+    def do_GET(self) -> None:
+        self._serve(send_body=True)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"media server: {format % args}")
+
+    def _serve(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            self._serve_metrics(send_body)
+            return
+        parts = url.path.lstrip("/").split("/", 2)
+        if len(parts) < 2 or parts[0] != "media":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        relative = parts[2] if len(parts) == 3 else ""
+        file_path = self.file_server.resolve(parts[1], relative)
+        if file_path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        download = "download" in parse_qs(url.query)
+        send_file_range(self, file_path, send_body=send_body, download=download)
+
+    def _serve_metrics(self, send_body: bool) -> None:
+        body = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def send_file_range(
+    handler: BaseHTTPRequestHandler,
+    file_path: Path,
+    send_body: bool = True,
+    download: bool = False,
+    download_name: Optional[str] = None,
+) -> None:
+    """
+    Rangeヘッダを解釈してファイルをチャンク単位で送信する
+
+    Args:
+        handler: リクエストハンドラ
+        file_path: 送信するファイル
+        send_body: Falseの場合はヘッダのみ送信する（HEAD）
+        download: Trueの場合は添付ファイルとして送信する
+        download_name: 添付ファイルのファイル名（Noneの場合はfile_pathのファイル名）
+    """
+    file_size = file_path.stat().st_size
+    start, end = 0, file_size - 1
+    status = HTTPStatus.OK
+
+    range_header = handler.headers.get("Range")
+    if range_header:
+        match = _RANGE_PATTERN.match(range_header.strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            _send_range_not_satisfiable(handler, file_size)
+            return
+        if match.group(1):
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), file_size - 1)
+        else:
+            # "bytes=-N" は末尾Nバイト
+            start = max(0, file_size - int(match.group(2)))
+        if start > end or start >= file_size:
+            _send_range_not_satisfiable(handler, file_size)
+            return
+        status = HTTPStatus.PARTIAL_CONTENT
+
+    content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    length = end - start + 1
+    handler.send_response(status)
+    handler.send_header("Content-Type", content_type)
+    handler.send_header("Accept-Ranges", "bytes")
+    handler.send_header("Content-Length", str(length))
+    if status == HTTPStatus.PARTIAL_CONTENT:
+        handler.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+    if download:
+        handler.send_header(
+            "Content-Disposition",
+            f"attachment; filename*=UTF-8''{quote(download_name or file_path.name)}",
+        )
+    handler.end_headers()
+    if not send_body:
+        return
+
+    remaining = length
+    try:
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(StreamingConstants.MEDIA_SERVER_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                handler.wfile.write(chunk)
+                remaining -= len(chunk)
+    except (BrokenPipeError, ConnectionResetError):
+        # ブラウザはシーク時に接続を切るため、正常系として扱う
+        pass
+
+
+def _send_range_not_satisfiable(handler: BaseHTTPRequestHandler, file_size: int) -> None:
+    handler.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+    handler.send_header("Content-Range", f"bytes */{file_size}")
+    handler.send_header("Content-Length", "0")
+    handler.end_headers()
+
+
+_media_server: Optional[RangeFileServer] = None
+_media_server_lock = threading.Lock()
+
+
+def get_media_server() -> RangeFileServer:
+    """
+    プロセス共通の配信サーバーを取得する（初回呼び出し時に起動）
+
+    Returns:
+        起動済みのRangeFileServer
+    """
+    global _media_server
+    with _media_server_lock:
+        if _media_server is None:
+            settings = Settings()
+            _media_server = RangeFileServer(
+                host=settings.MEDIA_SERVER_HOST,
+                port=settings.MEDIA_SERVER_PORT,
+                public_url=settings.MEDIA_SERVER_PUBLIC_URL,
+            )
+            _media_server.start()
+        return _media_server
@@ -0,0 +1,231 @@
+"""
+SQLiteに保存する翻訳メモリ
+正規化した原文・翻訳先の言語・プロンプトのバージョンをキーに翻訳結果を再利用する
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import Settings
+from utli.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_source_text(text: str) -> str:
+    """
+    翻訳メモリのキーにするために原文を正規化する（NFKC正規化・空白の統一）
+
+    Args:
+        text: 原文
+
+    Returns:
+        正規化した原文
+    """
+    return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TranslationMemory:
+    """件数上限付き（最終利用時刻によるLRU削除）の翻訳メモリ"""
+
+    def __init__(self, db_path: Path, max_entries: int):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+            max_entries: 保持する最大件数（超えた分は最終利用時刻の古いものから削除する）
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    source_text TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    translated_text TEXT NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source_text, target_language, prompt_version)
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used "
+                "ON translation_memory (last_used_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS translation_memory_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    def lookup(
+        self,
+        source_texts: Iterable[str],
+        target_language: str,
+        prompt_version: str,
+    ) -> Dict[str, str]:
+        """
+        正規化済みの原文に一致する翻訳を取得する
+
+        Args:
+            source_texts: 正規化済みの原文
+            target_language: 翻訳先の言語
+            prompt_version: プロンプトのバージョン
+
+        Returns:
+            {正規化済みの原文: 翻訳} の辞書（ヒットしたもののみ）
+        """
+        keys = list(dict.fromkeys(source_texts))
+        if not keys:
+            return {}
+        hits: Dict[str, str] = {}
+        with self._lock, self._connect() as connection:
+            for chunk in _chunks(keys, 500):
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(
+                    f"""
+                    SELECT source_text, translated_text FROM translation_memory
+                    WHERE target_language = ? AND prompt_version = ? AND source_text IN ({placeholders})
+                    """,
+                    (target_language, prompt_version, *chunk),
+                ).fetchall()
+                hits.update(rows)
+            now = time.time()
+            connection.executemany(
+                """
+                UPDATE translation_memory SET last_used_at = ?, hit_count = hit_count + 1
+                WHERE source_text = ? AND target_language = ? AND prompt_version = ?
+                """,
+                [(now, source_text, target_language, prompt_version) for source_text in hits],
+            )
+            self._add_stat(connection, "hits", len(hits))
+            self._add_stat(connection, "misses", len(keys) - len(hits))
+        return hits
+
+    def store(
+        self,
+        translations: Dict[str, str],
+        target_language: str,
+        prompt_version: str,
+    ) -> None:
+        """
+        翻訳結果を保存し、上限を超えた分を削除する
+
+        Args:
+            translations: {正規化済みの原文: 翻訳} の辞書
+            target_language: 翻訳先の言語
+            prompt_version: プロンプトのバージョン
+        """
+        if not translations:
+            return
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.executemany(
+                """
+                INSERT INTO translation_memory
+                    (source_text, target_language, prompt_version, translated_text, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source_text, target_language, prompt_version)
+                DO UPDATE SET translated_text = excluded.translated_text, last_used_at = excluded.last_used_at
+                """,
+                [
+                    (source_text, target_language, prompt_version, translated_text, now)
+                    for source_text, translated_text in translations.items()
+                ],
+            )
+            overflow = connection.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                connection.execute(
+                    """
+                    DELETE FROM translation_memory WHERE rowid IN (
+                        SELECT rowid FROM translation_memory ORDER BY last_used_at ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self._add_stat(connection, "evictions", overflow)
+                logger.info(f"translation memory evicted: count={overflow}")
+
+    def stats(self) -> Dict[str, float]:
+        """
+        件数と累計のヒット率を返す
+
+        Returns:
+            {"entries": 120, "hits": 80, "misses": 40, "evictions": 0, "hit_rate": 0.67} の形式
+        """
+        with self._lock, self._connect() as connection:
+            entries = connection.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+            counters = dict(connection.execute("SELECT name, value FROM translation_memory_stats").fetchall())
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            # withブロックを抜けるとコミット（例外時はロールバック）する
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _add_stat(connection: sqlite3.Connection, name: str, value: int) -> None:
+        if value <= 0:
+            return
+        connection.execute(
+            """
+            INSERT INTO translation_memory_stats (name, value) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+            """,
+            (name, value),
+        )
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+_translation_memory: Optional[TranslationMemory] = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """
+    プロセス共通の翻訳メモリを取得する
+
+    Returns:
+        TranslationMemory（TRANSLATION_MEMORY_ENABLEDが無効の場合はNone）
+    """
+    global _translation_memory
+    settings = Settings()
+    if not settings.TRANSLATION_MEMORY_ENABLED:
+        return None
+    with _translation_memory_lock:
+        if _translation_memory is None:
+            _translation_memory = TranslationMemory(
+                settings.TRANSLATION_MEMORY_PATH,
+                settings.TRANSLATION_MEMORY_MAX_ENTRIES,
+            )
+        return _translation_memory
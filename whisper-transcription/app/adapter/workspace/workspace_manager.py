@@ -0,0 +1,269 @@
+"""
+ジョブ単位の中間ファイルを管理する作業領域
+合計サイズの上限を超えた場合は、終了済みジョブのファイルを最終利用時刻の古いものから削除する
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import Settings
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class JobWorkspace:
+    """1回の処理（ジョブ）の中間ファイルを置く作業ディレクトリ"""
+
+    def __init__(self, manager: "WorkspaceManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+
+    def new_path(self, suffix: str = "", small: bool = False) -> str:
+        """
+        ジョブの作業ディレクトリ内に新しいファイルパスを払い出す
+
+        Args:
+            suffix: ファイル名の末尾（拡張子など）
+            small: Trueの場合はtmpfs上に置く（tmpfsが未設定・上限超過の場合はディスクに置く）
+
+        Returns:
+            ファイルパス（ファイルは作成しない）
+        """
+        return self.manager.new_path(self.job_id, suffix, small=small)
+
+    def finish(self) -> None:
+        """ジョブを終了済みにする（以降はピン留めしたファイル以外が削除対象になる）"""
+        self.manager.finish_job(self.job_id)
+
+
+class WorkspaceManager:
+    """作業領域全体のサイズ上限・ファイルのピン留め・使用量の集計を担う"""
+
+    def __init__(
+        self,
+        root: Path,
+        quota_bytes: int,
+        tmpfs_root: Optional[Path] = None,
+        tmpfs_quota_bytes: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            root: ディスク上の作業領域のルート
+            quota_bytes: ディスク上の作業領域の合計サイズの上限（バイト）
+            tmpfs_root: 小さな中間ファイルを置くtmpfs上のルート（Noneの場合は使わない）
+            tmpfs_quota_bytes: tmpfs上の作業領域の合計サイズの上限（バイト）
+        """
+        self._lock = threading.Lock()
+        self._quotas: Dict[Path, int] = {Path(root): quota_bytes}
+        self._tmpfs_root = Path(tmpfs_root) if tmpfs_root else None
+        if self._tmpfs_root:
+            self._quotas[self._tmpfs_root] = tmpfs_quota_bytes
+        for path in self._quotas:
+            path.mkdir(parents=True, exist_ok=True)
+        self._root = Path(root)
+        # 起動前から残っているジョブは終了済みとして扱う
+        self._active_jobs: Set[str] = set()
+        self._pins: Counter = Counter()
+        self._last_used: Dict[str, float] = {}
+
+    def create_job(self, label: str = "job") -> JobWorkspace:
+        """
+        新しいジョブの作業ディレクトリを作成する
+
+        Args:
+            label: ジョブIDの先頭に付ける名前（upload, processなど）
+
+        Returns:
+            JobWorkspace
+        """
+        job_id = f"{label}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._active_jobs.add(job_id)
+        self.enforce_quota()
+        return JobWorkspace(self, job_id)
+
+    def new_path(self, job_id: str, suffix: str = "", small: bool = False) -> str:
+        """
+        ジョブの作業ディレクトリ内に新しいファイルパスを払い出す
+
+        Args:
+            job_id: ジョブID
+            suffix: ファイル名の末尾（拡張子など）
+            small: Trueの場合はtmpfs上に置く
+
+        Returns:
+            ファイルパス（ファイルは作成しない）
+        """
+        root = self._root
+        if small and self._tmpfs_root:
+            if self._usage_bytes(self._tmpfs_root) < self._quotas[self._tmpfs_root]:
+                root = self._tmpfs_root
+        job_dir = root / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        path = str(job_dir / f"{uuid.uuid4().hex[:12]}{suffix}")
+        self.touch(path)
+        return path
+
+    def finish_job(self, job_id: str) -> None:
+        """ジョブを終了済みにし、上限を超えていれば古いファイルを削除する"""
+        with self._lock:
+            self._active_jobs.discard(job_id)
+        self.enforce_quota()
+
+    def pin(self, path: str) -> None:
+        """ファイルを使用中にする（unpinするまで削除しない）"""
+        with self._lock:
+            self._pins[os.path.abspath(path)] += 1
+        self.touch(path)
+
+    def unpin(self, path: str) -> None:
+        """ファイルの使用中を解除する"""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._pins[path] -= 1
+            if self._pins[path] <= 0:
+                del self._pins[path]
+
+    def touch(self, path: str) -> None:
+        """ファイルの最終利用時刻を更新する（LRU削除の順序に使う）"""
+        with self._lock:
+            self._last_used[os.path.abspath(path)] = time.time()
+
+    def enforce_quota(self) -> None:
+        """
+        ルートごとの上限を超えている場合に、終了済みジョブのファイルを最終利用時刻の古いものから削除する
+        """
+        for root, quota_bytes in self._quotas.items():
+            files = self._list_files(root)
+            usage_bytes = sum(size for _, size, _ in files)
+            if usage_bytes <= quota_bytes:
+                continue
+            with self._lock:
+                candidates = sorted(
+                    (
+                        (self._last_used.get(path, mtime), path, size)
+                        for path, size, mtime in files
+                        if self._job_id_of(root, path) not in self._active_jobs and path not in self._pins
+                    ),
+                )
+            evicted_bytes = 0
+            for _, path, size in candidates:
+                if usage_bytes <= quota_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                usage_bytes -= size
+                evicted_bytes += size
+                with self._lock:
+                    self._last_used.pop(path, None)
+            self._remove_empty_job_dirs(root)
+            if evicted_bytes:
+                get_metrics().inc(
+                    "workspace_evicted_bytes_total",
+                    float(evicted_bytes),
+                    help_text="Bytes evicted from the job workspace.",
+                )
+                logger.info(
+                    "workspace evicted: root=%s bytes=%d usage=%d quota=%d",
+                    root,
+                    evicted_bytes,
+                    usage_bytes,
+                    quota_bytes,
+                )
+            if usage_bytes > quota_bytes:
+                logger.warning(
+                    "workspace over quota (active or pinned files): root=%s usage=%d quota=%d",
+                    root,
+                    usage_bytes,
+                    quota_bytes,
+                )
+
+    def usage(self) -> Dict[str, object]:
+        """
+        作業領域の使用量を集計する
+
+        Returns:
+            {"roots": [{"root", "used_bytes", "quota_bytes", "file_count"}],
+             "active_jobs": 実行中のジョブ数, "pinned_files": ピン留めされたファイル数}
+        """
+        roots: List[Dict[str, object]] = []
+        for root, quota_bytes in self._quotas.items():
+            files = self._list_files(root)
+            roots.append({
+                "root": str(root),
+                "used_bytes": sum(size for _, size, _ in files),
+                "quota_bytes": quota_bytes,
+                "file_count": len(files),
+            })
+        with self._lock:
+            return {
+                "roots": roots,
+                "active_jobs": len(self._active_jobs),
+                "pinned_files": len(self._pins),
+            }
+
+    def _usage_bytes(self, root: Path) -> int:
+        return sum(size for _, size, _ in self._list_files(root))
+
+    @staticmethod
+    def _list_files(root: Path) -> List[tuple]:
+        """ルート以下のファイルを (絶対パス, サイズ, 更新時刻) のリストで返す"""
+        files = []
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.abspath(os.path.join(directory, name))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    @staticmethod
+    def _job_id_of(root: Path, path: str) -> str:
+        return Path(path).relative_to(os.path.abspath(root)).parts[0]
+
+    def _remove_empty_job_dirs(self, root: Path) -> None:
+        with self._lock:
+            active_jobs = set(self._active_jobs)
+        for job_dir in root.iterdir():
+            if not job_dir.is_dir() or job_dir.name in active_jobs:
+                continue
+            if not any(path.is_file() for path in job_dir.rglob("*")):
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+
+_workspace_manager: Optional[WorkspaceManager] = None
+_workspace_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """
+    プロセス共通の作業領域を取得する
+
+    Returns:
+        WorkspaceManager
+    """
+    global _workspace_manager
+    with _workspace_manager_lock:
+        if _workspace_manager is None:
+            settings = Settings()
+            _workspace_manager = WorkspaceManager(
+                settings.WORKSPACE_ROOT,
+                settings.WORKSPACE_QUOTA_BYTES,
+                tmpfs_root=settings.WORKSPACE_TMPFS_ROOT,
+                tmpfs_quota_bytes=settings.WORKSPACE_TMPFS_QUOTA_BYTES,
+            )
+        return _workspace_manager
@@ -0,0 +1,145 @@
+"""
+ベンチマーク用の偽LLMハンドラ
+外部APIを呼び出さずに、JSONスキーマに沿った決定的なレスポンスを返す
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List
+
+from adapter.llm_client.i_llm_client import ILLMHandler
+from adapter.llm_client.llm_client import LLMClient
+from config import BenchmarkConstants
+from utli.ffmpeg_utils import probe_duration
+from utli.time_utils import seconds_to_time
+
+
+class FakeLLMHandler(ILLMHandler):
+    """スキーマのrequiredキーからタスクを判定し、決定的なレスポンスを返すハンドラ"""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        segment_seconds: float = BenchmarkConstants.FAKE_SEGMENT_SECONDS,
+        seed: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            latency_seconds: 1回の呼び出しで待機する秒数
+            latency_jitter_seconds: 待機時間に加える揺らぎの最大秒数（seedで決定的に生成する）
+            segment_seconds: 文字起こしセグメントの長さ（秒）
+            seed: 揺らぎ生成用の乱数シード
+        """
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.segment_seconds = segment_seconds
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    @property
+    def model_name(self) -> str:
+        return "fake-deterministic"
+
+    def invoke(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float | None = None,
+        json_schema: dict | None = None,
+        media_path: str | None = None,
+    ) -> str:
+        self._wait()
+        required = set((json_schema or {}).get("required", []))
+        if "important_scenes" in required:
+            payload = self.build_important_scenes(media_path)
+        elif "selected_candidate_ids" in required:
+            payload = self._selected_candidates(user_prompt)
+        elif media_path:
+            payload = self.build_transcription(media_path)
+        else:
+            payload = self._translation(user_prompt)
+        return json.dumps(payload, ensure_ascii=False)
+
+    def _wait(self) -> None:
+        latency = self.latency_seconds
+        if self.latency_jitter_seconds > 0:
+            with self._random_lock:
+                latency += self._random.uniform(0.0, self.latency_jitter_seconds)
+        if latency > 0:
+            time.sleep(latency)
+
+    @staticmethod
+    def build_important_scenes(media_path: str | None) -> Dict[str, Any]:
+        """重要シーン抽出のレスポンスを生成する"""
+        duration = probe_duration(media_path) if media_path else 60.0
+        # 複数シーンの切り抜き・連結を通るように2つのシーンを返す
+        scenes = [(0.1, 0.3), (0.5, 0.7)]
+        return {
+            "important_scenes": [
+                {
+                    "start_time": seconds_to_time(duration * start_ratio),
+                    "end_time": seconds_to_time(duration * end_ratio),
+                }
+                for start_ratio, end_ratio in scenes
+            ]
+        }
+
+    @staticmethod
+    def _selected_candidates(user_prompt: str) -> Dict[str, Any]:
+        candidate_ids = [int(value) for value in re.findall(r"candidate_id=(\d+)", user_prompt)]
+        # 先頭から3件に1件を選ぶ
+        return {"selected_candidate_ids": candidate_ids[::3] or [0]}
+
+    def build_transcription(self, media_path: str) -> Dict[str, Any]:
+        """文字起こしのレスポンスを生成する"""
+        duration = probe_duration(media_path)
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + self.segment_seconds)
+            segments.append({
+                "start_time": seconds_to_time(start),
+                "end_time": seconds_to_time(end),
+                "text": f"ベンチマーク用の字幕 {len(segments) + 1}",
+            })
+            start = end
+        return {"segments": segments}
+
+    @staticmethod
+    def _translation(user_prompt: str) -> Dict[str, Any]:
+        language_match = re.search(r"翻訳先の言語: (.+)", user_prompt)
+        language = language_match.group(1).strip() if language_match else "unknown"
+        header = user_prompt.find("対象テキスト")
+        lines = user_prompt[header:].splitlines()[1:] if header >= 0 else []
+        translations: List[Dict[str, Any]] = []
+        for line in lines:
+            number, _, text = line.partition("\t")
+            if number.strip().isdigit():
+                translations.append({"id": int(number), "text": f"[{language}] {text}"})
+        return {"translations": translations}
+
+
+class FakeLLMFactory:
+    """LLMFactoryの代わりに偽LLMハンドラのクライアントを返すファクトリ"""
+
+    def __init__(self, handler: FakeLLMHandler):
+        """
+        初期化
+
+        Args:
+            handler: 全呼び出しで共有する偽LLMハンドラ
+        """
+        self._handler = handler
+
+    def create_llm(self, provider: Any = None, **routing_hints: Any) -> LLMClient:
+        return LLMClient(self._handler)
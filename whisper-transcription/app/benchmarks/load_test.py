@@ -0,0 +1,271 @@
+"""
+同時セッション数を段階的に増やす負荷試験
+
+スタブLLMサーバー（LLMProvider.STUB）に対してエンドツーエンドの処理をN並列で実行し、
+同時実行数ごとのスループット、ステージごとのp50/p95/p99、飽和点をCSV/HTMLで出力する。
+Streamlitのセッションと同じく1プロセス内のスレッドで並列実行する。
+
+実行例（appディレクトリで実行する）:
+    python -m benchmarks.load_test --label v0.2.0 --concurrency 1 2 4 8
+    python -m benchmarks.load_test --label v0.3.0 --compare benchmarks/reports/load_test_v0.2.0.csv
+"""
+
+import argparse
+import csv
+import html
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from adapter.llm_factory import LLMFactory
+from benchmarks.pipeline import PIPELINE_STAGES, run_end_to_end
+from benchmarks.stub_llm_server import StubLLMServer
+from benchmarks.synthetic_media import generate_synthetic_video
+from config import BenchmarkConstants, Settings
+from domain.entities.llm_provider import LLMProvider
+from utli.logger import get_logger
+
+logger = get_logger(__name__)
+
+CSV_COLUMNS = [
+    "label",
+    "concurrency",
+    "stage",
+    "count",
+    "errors",
+    "p50_seconds",
+    "p95_seconds",
+    "p99_seconds",
+    "throughput_per_minute",
+]
+
+
+def _run_session(media_path: str, target_language: Optional[str]) -> Dict[str, Any]:
+    stage_durations: Dict[str, float] = {}
+    start_time = time.perf_counter()
+    error = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            run_end_to_end(
+                LLMFactory(LLMProvider.STUB),
+                media_path,
+                work_dir,
+                target_language=target_language,
+                stage_durations=stage_durations,
+            )
+        except Exception as e:
+            error = type(e).__name__
+            logger.warning(f"load test session failed: {error}: {str(e)[:200]}")
+    return {
+        "end_to_end": time.perf_counter() - start_time,
+        "stages": stage_durations,
+        "error": error,
+    }
+
+
+def run_level(
+    media_path: str,
+    concurrency: int,
+    sessions: int,
+    target_language: Optional[str],
+) -> Dict[str, Any]:
+    """
+    指定した同時実行数でセッションを実行する
+
+    Args:
+        media_path: 入力動画ファイルのパス
+        concurrency: 同時実行数
+        sessions: 実行するセッション数
+        target_language: 翻訳先の言語
+
+    Returns:
+        {"wall_seconds": 12.3, "sessions": [...]} の形式
+    """
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-session") as executor:
+        results = list(executor.map(lambda _: _run_session(media_path, target_language), range(sessions)))
+    return {"wall_seconds": time.perf_counter() - start_time, "sessions": results}
+
+
+def summarize_level(label: str, concurrency: int, level: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    1つの同時実行数の結果をステージごとのパーセンタイルに集計する
+
+    Returns:
+        CSV_COLUMNSをキーに持つ行のリスト（stage="end_to_end"の行にスループットを含める）
+    """
+    sessions = level["sessions"]
+    succeeded = [session for session in sessions if session["error"] is None]
+    throughput = len(succeeded) / level["wall_seconds"] * 60.0 if level["wall_seconds"] > 0 else 0.0
+
+    rows = []
+    for stage in PIPELINE_STAGES + ["end_to_end"]:
+        if stage == "end_to_end":
+            values = [session["end_to_end"] for session in succeeded]
+        else:
+            values = [session["stages"][stage] for session in sessions if stage in session["stages"]]
+        percentiles = np.percentile(values, [50, 95, 99]) if values else [None, None, None]
+        rows.append({
+            "label": label,
+            "concurrency": concurrency,
+            "stage": stage,
+            "count": len(values),
+            "errors": len(sessions) - len(succeeded) if stage == "end_to_end" else "",
+            "p50_seconds": _round(percentiles[0]),
+            "p95_seconds": _round(percentiles[1]),
+            "p99_seconds": _round(percentiles[2]),
+            "throughput_per_minute": round(throughput, 3) if stage == "end_to_end" else "",
+        })
+    return rows
+
+
+def find_saturation_point(rows: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    スループットの伸びがSATURATION_GAIN_RATIOを下回った最初の同時実行数を返す
+
+    Args:
+        rows: summarize_levelの結果を連結したもの
+
+    Returns:
+        飽和点の同時実行数（計測範囲内で飽和しなかった場合はNone）
+    """
+    totals = sorted(
+        (row["concurrency"], row["throughput_per_minute"])
+        for row in rows
+        if row["stage"] == "end_to_end"
+    )
+    for (_, previous), (concurrency, current) in zip(totals, totals[1:]):
+        if current < previous * (1 + BenchmarkConstants.SATURATION_GAIN_RATIO):
+            return concurrency
+    return None
+
+
+def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
+    """計測結果をCSVに書き出す"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path: Path) -> List[Dict[str, Any]]:
+    """write_csvで書き出したCSVを読み込む"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["concurrency"] = int(row["concurrency"])
+        if row["throughput_per_minute"]:
+            row["throughput_per_minute"] = float(row["throughput_per_minute"])
+    return rows
+
+
+def write_html(path: Path, rows: List[Dict[str, Any]], compare_rows: List[Dict[str, Any]]) -> None:
+    """
+    計測結果と比較対象のリリースをHTMLレポートに書き出す
+
+    Args:
+        path: 出力先のパス
+        rows: 今回の計測結果
+        compare_rows: 比較対象のCSVから読み込んだ計測結果
+    """
+    sections = []
+    for label in dict.fromkeys(row["label"] for row in compare_rows + rows):
+        label_rows = [row for row in compare_rows + rows if row["label"] == label]
+        saturation = find_saturation_point(label_rows)
+        header = "".join(f"<th>{html.escape(column)}</th>" for column in CSV_COLUMNS[1:])
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(row[column]))}</td>" for column in CSV_COLUMNS[1:]) + "</tr>"
+            for row in label_rows
+        )
+        saturation_text = f"飽和点: 同時実行数 {saturation}" if saturation else "飽和点: 計測範囲内で飽和なし"
+        sections.append(
+            f"<h2>{html.escape(label)}</h2><p>{saturation_text}</p>"
+            f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "<!DOCTYPE html><html lang=\"ja\"><head><meta charset=\"utf-8\"><title>負荷試験レポート</title>"
+        "<style>table{border-collapse:collapse;margin-bottom:2em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:right}</style></head>"
+        f"<body><h1>負荷試験レポート</h1>{''.join(sections)}</body></html>",
+        encoding="utf-8",
+    )
+
+
+def _round(value: Optional[float]) -> Any:
+    return round(float(value), 3) if value is not None else ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="スタブLLMサーバーを使った同時セッションの負荷試験")
+    parser.add_argument("--label", default="local", help="レポートに付けるラベル（リリース名など）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=BenchmarkConstants.LOAD_CONCURRENCY_LEVELS)
+    parser.add_argument("--sessions-per-worker", type=int, default=BenchmarkConstants.LOAD_SESSIONS_PER_WORKER)
+    parser.add_argument("--duration", type=float, default=BenchmarkConstants.DEFAULT_DURATIONS[0])
+    parser.add_argument("--resolution", default=BenchmarkConstants.DEFAULT_RESOLUTIONS[0])
+    parser.add_argument("--target-language", default="English", help="空文字の場合は翻訳しない")
+    parser.add_argument("--latency", default=BenchmarkConstants.STUB_LATENCY_DISTRIBUTION)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--no-stub-server", action="store_true", help="起動済みのスタブLLMサーバーを使う")
+    parser.add_argument("--report-dir", type=Path, default=BenchmarkConstants.LOAD_REPORT_DIR)
+    parser.add_argument("--compare", type=Path, nargs="*", default=[], help="比較対象のCSV")
+    args = parser.parse_args()
+
+    stub_server = None
+    if not args.no_stub_server:
+        stub_url = urlsplit(Settings().STUB_LLM_URL)
+        stub_server = StubLLMServer(
+            stub_url.hostname or "127.0.0.1",
+            stub_url.port or 8766,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+        )
+        stub_server.start()
+
+    media_path = str(generate_synthetic_video(
+        BenchmarkConstants.WORK_DIR / "media",
+        args.duration,
+        args.resolution,
+    ))
+    rows: List[Dict[str, Any]] = []
+    try:
+        for concurrency in sorted(args.concurrency):
+            level = run_level(
+                media_path,
+                concurrency,
+                concurrency * args.sessions_per_worker,
+                args.target_language or None,
+            )
+            level_rows = summarize_level(args.label, concurrency, level)
+            end_to_end = level_rows[-1]
+            print(
+                f"concurrency={concurrency} throughput={end_to_end['throughput_per_minute']}/min "
+                f"p50={end_to_end['p50_seconds']}s p95={end_to_end['p95_seconds']}s "
+                f"p99={end_to_end['p99_seconds']}s errors={end_to_end['errors']}"
+            )
+            rows.extend(level_rows)
+    finally:
+        if stub_server is not None:
+            stub_server.stop()
+
+    saturation = find_saturation_point(rows)
+    print(f"飽和点: 同時実行数 {saturation}" if saturation else "飽和点: 計測範囲内で飽和なし")
+
+    csv_path = args.report_dir / f"load_test_{args.label}.csv"
+    html_path = args.report_dir / f"load_test_{args.label}.html"
+    write_csv(csv_path, rows)
+    compare_rows = [row for path in args.compare for row in read_csv(path)]
+    write_html(html_path, rows, compare_rows)
+    print(f"レポートを出力しました: {csv_path}, {html_path}")
+
+
+if __name__ == "__main__":
+    main()
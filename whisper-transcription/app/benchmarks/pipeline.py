@@ -0,0 +1,81 @@
+"""
+ベンチマーク・負荷試験で共通に使うエンドツーエンドの処理
+main.pyの「動画処理開始」と同じ順序でサービスを呼び出す
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from usecase.service.add_subtitles_service import AddSubtitlesService
+from usecase.service.transcribe_video_service import TranscribeVideoService
+from usecase.service.translate_segments_service import TranslateSegmentsService
+from usecase.service.trim_video_service import TrimVideoService
+from utli.admission_controller import get_admission_controller
+
+PIPELINE_STAGES = ["scene_extraction", "trim", "transcribe", "translate", "render"]
+
+
+@contextmanager
+def _timed(stage_durations: Dict[str, float], stage: str) -> Iterator[None]:
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_durations[stage] = time.perf_counter() - start_time
+
+
+def run_end_to_end(
+    llm_factory: Any,
+    media_path: str,
+    work_dir: str,
+    target_language: Optional[str] = "English",
+    stage_durations: Optional[Dict[str, float]] = None,
+) -> str:
+    """
+    重要シーン抽出→切り抜き→文字起こし→翻訳→字幕付与を順に実行する
+
+    Args:
+        llm_factory: create_llm()を持つファクトリ（LLMFactoryまたはFakeLLMFactory）
+        media_path: 入力動画ファイルのパス
+        work_dir: 中間ファイル・出力ファイルの作業ディレクトリ
+        target_language: 翻訳先の言語（Noneの場合は翻訳しない）
+        stage_durations: 指定した場合はステージごとの所要秒数を書き込む
+
+    Returns:
+        字幕付き動画のパス
+    """
+    durations = stage_durations if stage_durations is not None else {}
+    # 本番と同じく、エンコードを伴うステージはアドミッション制御を通す（待ち時間もステージの所要時間に含める）
+    admission = get_admission_controller()
+    trim_service = TrimVideoService(llm_factory)
+
+    with _timed(durations, "scene_extraction"):
+        payload = trim_service.extract_key_segments(media_path)
+
+    trimmed_path = os.path.join(work_dir, "trimmed.mp4")
+    with _timed(durations, "trim"), admission.admit("trim"):
+        if len(payload.get("important_scenes", [])) > 1:
+            trim_service.trim_by_scenes(media_path, payload, trimmed_path)
+        else:
+            trim_service.trim_by_segments(media_path, payload, trimmed_path)
+
+    with _timed(durations, "transcribe"):
+        segments = TranscribeVideoService(llm_factory).transcribe(trimmed_path).get("segments", [])
+
+    if target_language:
+        with _timed(durations, "translate"):
+            translated = TranslateSegmentsService(llm_factory).translate(segments, target_language=target_language)
+            segments = translated.get("segments", segments)
+
+    output_path = os.path.join(work_dir, "subtitled.mp4")
+    with _timed(durations, "render"), admission.admit("render"):
+        AddSubtitlesService().add_subtitles_to_trimmed_video(
+            trimmed_path,
+            segments,
+            0.0,
+            output_path,
+            language=target_language,
+        )
+    return output_path
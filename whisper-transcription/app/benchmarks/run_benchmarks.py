@@ -0,0 +1,297 @@
+"""
+オフラインベンチマーク
+
+合成動画と偽LLMハンドラで各サービスとエンドツーエンドの処理を計測し、ベースラインと比較する。
+
+実行例（appディレクトリで実行する）:
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --durations 15 60 --resolutions 1280x720 --llm-latency 0.5
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_llm_handler import FakeLLMFactory, FakeLLMHandler
+from benchmarks.synthetic_media import generate_synthetic_video
+from config import BenchmarkConstants
+from utli.ffmpeg_utils import probe_duration
+
+STAGES = [
+    "extract_key_segments",
+    "trim_by_scenes",
+    "trim_by_segments",
+    "transcribe",
+    "translate",
+    "render_preview",
+    "render",
+    "end_to_end",
+]
+
+# 値が大きいほど悪い指標と、小さいほど悪い指標
+HIGHER_IS_WORSE = {
+    "wall_seconds": BenchmarkConstants.MIN_REGRESSION_SECONDS,
+    "cpu_seconds": BenchmarkConstants.MIN_REGRESSION_SECONDS,
+    "peak_rss_mb": BenchmarkConstants.MIN_REGRESSION_MB,
+    "peak_child_rss_mb": BenchmarkConstants.MIN_REGRESSION_MB,
+}
+LOWER_IS_WORSE = ["encode_fps"]
+
+
+def _stage_extract_key_segments(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from usecase.service.trim_video_service import TrimVideoService
+
+    TrimVideoService(factory).extract_key_segments(media_path)
+    return None
+
+
+def _stage_trim_by_scenes(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from usecase.service.trim_video_service import TrimVideoService
+
+    payload = FakeLLMHandler.build_important_scenes(media_path)
+    output_path = os.path.join(work_dir, "trim_by_scenes.mp4")
+    TrimVideoService(factory).trim_by_scenes(media_path, payload, output_path)
+    return output_path
+
+
+def _stage_trim_by_segments(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from usecase.service.trim_video_service import TrimVideoService
+
+    payload = FakeLLMHandler.build_important_scenes(media_path)
+    payload["important_scenes"] = payload["important_scenes"][:1]
+    output_path = os.path.join(work_dir, "trim_by_segments.mp4")
+    TrimVideoService(factory).trim_by_segments(media_path, payload, output_path)
+    return output_path
+
+
+def _stage_transcribe(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from usecase.service.transcribe_video_service import TranscribeVideoService
+
+    TranscribeVideoService(factory).transcribe(media_path)
+    return None
+
+
+def _stage_translate(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from usecase.service.translate_segments_service import TranslateSegmentsService
+
+    segments = FakeLLMHandler().build_transcription(media_path)["segments"]
+    TranslateSegmentsService(factory).translate(segments, target_language="English")
+    return None
+
+
+def _render(media_path: str, work_dir: str, preview: bool) -> str:
+    from usecase.service.add_subtitles_service import AddSubtitlesService
+
+    segments = FakeLLMHandler().build_transcription(media_path)["segments"]
+    output_path = os.path.join(work_dir, f"render_{'preview' if preview else 'final'}.mp4")
+    AddSubtitlesService().add_subtitles_to_trimmed_video(
+        media_path,
+        segments,
+        0.0,
+        output_path,
+        preview=preview,
+    )
+    return output_path
+
+
+def _stage_render_preview(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    return _render(media_path, work_dir, preview=True)
+
+
+def _stage_render(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    return _render(media_path, work_dir, preview=False)
+
+
+def _stage_end_to_end(factory: FakeLLMFactory, media_path: str, work_dir: str) -> Optional[str]:
+    from benchmarks.pipeline import run_end_to_end
+
+    return run_end_to_end(factory, media_path, work_dir)
+
+
+STAGE_FUNCTIONS: Dict[str, Callable[[FakeLLMFactory, str, str], Optional[str]]] = {
+    "extract_key_segments": _stage_extract_key_segments,
+    "trim_by_scenes": _stage_trim_by_scenes,
+    "trim_by_segments": _stage_trim_by_segments,
+    "transcribe": _stage_transcribe,
+    "translate": _stage_translate,
+    "render_preview": _stage_render_preview,
+    "render": _stage_render,
+    "end_to_end": _stage_end_to_end,
+}
+
+
+def _measure_stage(stage: str, media_path: str, fps: int, llm_latency: float) -> Dict[str, Any]:
+    """
+    1つのステージを計測する（ピークRSSを分離するため、ケースごとに新しいプロセスで実行する）
+
+    Returns:
+        計測結果（wall_seconds, cpu_seconds, peak_rss_mb, peak_child_rss_mb, encode_fps）
+    """
+    factory = FakeLLMFactory(FakeLLMHandler(latency_seconds=llm_latency))
+    with tempfile.TemporaryDirectory() as work_dir:
+        times_before = os.times()
+        wall_start = time.perf_counter()
+        output_path = STAGE_FUNCTIONS[stage](factory, media_path, work_dir)
+        wall_seconds = time.perf_counter() - wall_start
+        times_after = os.times()
+
+        # ffmpegなどの子プロセスのCPU時間も含める
+        cpu_seconds = sum(
+            getattr(times_after, field) - getattr(times_before, field)
+            for field in ("user", "system", "children_user", "children_system")
+        )
+        encode_fps = None
+        if output_path and os.path.exists(output_path):
+            encode_fps = probe_duration(output_path) * fps / wall_seconds
+
+    # Linuxのru_maxrssはKB単位
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "encode_fps": round(encode_fps, 2) if encode_fps is not None else None,
+    }
+
+
+def run_benchmarks(
+    durations: List[float],
+    resolutions: List[str],
+    stages: List[str],
+    llm_latency: float,
+    fps: int = BenchmarkConstants.SYNTHETIC_FPS,
+) -> List[Dict[str, Any]]:
+    """
+    合成動画の組み合わせごとに各ステージを計測する
+
+    Args:
+        durations: 合成動画の長さ（秒）のリスト
+        resolutions: 合成動画の解像度のリスト
+        stages: 計測するステージ名のリスト
+        llm_latency: 偽LLMハンドラの1回あたりの待機秒数
+        fps: 合成動画のフレームレート
+
+    Returns:
+        計測結果のリスト
+    """
+    media_dir = BenchmarkConstants.WORK_DIR / "media"
+    spawn_context = multiprocessing.get_context("spawn")
+    results = []
+    for resolution in resolutions:
+        for duration in durations:
+            media_path = generate_synthetic_video(media_dir, duration, resolution, fps)
+            case = f"{resolution}_{duration:g}s"
+            for stage in stages:
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                    measured = executor.submit(
+                        _measure_stage,
+                        stage,
+                        str(media_path),
+                        fps,
+                        llm_latency,
+                    ).result()
+                result = {"case": case, "stage": stage, **measured}
+                print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float,
+) -> List[str]:
+    """
+    ベースラインと比較してリグレッションを検出する
+
+    Args:
+        results: 今回の計測結果
+        baseline: ベースラインの計測結果
+        threshold: 悪化とみなす割合
+
+    Returns:
+        リグレッションの説明のリスト
+    """
+    baseline_by_key = {(item["case"], item["stage"]): item for item in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_key.get((result["case"], result["stage"]))
+        if reference is None:
+            continue
+        label = f"{result['case']} {result['stage']}"
+        for metric, min_delta in HIGHER_IS_WORSE.items():
+            current, previous = result.get(metric), reference.get(metric)
+            if current is None or previous is None:
+                continue
+            if current > previous * (1 + threshold) and current - previous > min_delta:
+                regressions.append(f"{label}: {metric} {previous} -> {current}")
+        for metric in LOWER_IS_WORSE:
+            current, previous = result.get(metric), reference.get(metric)
+            if current is None or previous is None:
+                continue
+            if current < previous * (1 - threshold):
+                regressions.append(f"{label}: {metric} {previous} -> {current}")
+    return regressions
+
+
+def _format_table(results: List[Dict[str, Any]]) -> str:
+    header = ["case", "stage", "wall_seconds", "cpu_seconds", "peak_rss_mb", "peak_child_rss_mb", "encode_fps"]
+    rows = [header] + [
+        [str(result.get(column) if result.get(column) is not None else "-") for column in header]
+        for result in results
+    ]
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    return "\n".join(
+        "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        for row in rows
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="合成動画と偽LLMハンドラによるオフラインベンチマーク")
+    parser.add_argument("--durations", type=float, nargs="+", default=BenchmarkConstants.DEFAULT_DURATIONS)
+    parser.add_argument("--resolutions", nargs="+", default=BenchmarkConstants.DEFAULT_RESOLUTIONS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="偽LLMハンドラの待機秒数")
+    parser.add_argument("--baseline", type=Path, default=BenchmarkConstants.BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="今回の結果をベースラインとして保存する")
+    parser.add_argument("--threshold", type=float, default=BenchmarkConstants.REGRESSION_THRESHOLD)
+    parser.add_argument("--output", type=Path, default=None, help="計測結果のJSONの出力先")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.durations, args.resolutions, args.stages, args.llm_latency)
+    print(_format_table(results))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"ベースラインを保存しました: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ベースラインがありません（--save-baselineで作成してください）: {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"リグレッションを検出しました（閾値: {args.threshold:.0%}）:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+    print("リグレッションはありません。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
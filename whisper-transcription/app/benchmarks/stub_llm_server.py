@@ -0,0 +1,199 @@
+"""
+負荷試験用のスタブLLMサーバー
+
+StubHandler（LLMProvider.STUB）からのリクエストに対して、FakeLLMHandlerと同じ決定的なレスポンスを
+指定したレイテンシ分布・エラー率・レート制限率で返す。
+
+実行例（appディレクトリで実行する）:
+    python -m benchmarks.stub_llm_server --latency lognormal:1.0:0.5 --error-rate 0.01 --rate-limit-rate 0.05
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from benchmarks.fake_llm_handler import FakeLLMHandler
+from config import BenchmarkConstants, Settings
+
+
+def parse_latency_distribution(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    レイテンシ分布の指定文字列からサンプラーを作成する
+
+    Args:
+        spec: "fixed:<秒>", "uniform:<最小>:<最大>", "lognormal:<中央値>:<sigma>", "exponential:<平均>" のいずれか
+        rng: 乱数生成器
+
+    Returns:
+        レイテンシ（秒）を返す関数
+    """
+    name, *params = spec.split(":")
+    values = [float(value) for value in params]
+    if name == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    if name == "lognormal" and len(values) == 2:
+        # 中央値がvalues[0]になるようにmuを決める
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda: rng.lognormvariate(mu, values[1])
+    if name == "exponential" and len(values) == 1:
+        return lambda: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(f"レイテンシ分布の指定が不正です: {spec}")
+
+
+class StubLLMServer:
+    """FakeLLMHandlerのレスポンスを遅延・エラー付きで返すHTTPサーバー"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        latency: str = BenchmarkConstants.STUB_LATENCY_DISTRIBUTION,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            host: 待ち受けるホスト
+            port: 待ち受けるポート
+            latency: レイテンシ分布の指定（parse_latency_distributionの形式）
+            error_rate: 500を返す割合
+            rate_limit_rate: 429を返す割合
+            seed: 乱数シード
+        """
+        self._host = host
+        self._port = port
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sample_latency = parse_latency_distribution(latency, self._rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._fake_handler = FakeLLMHandler(seed=seed)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        """別スレッドでサーバーを起動する"""
+        server = self
+
+        class Handler(_StubRequestHandler):
+            stub_server = server
+
+        self._server = ThreadingHTTPServer((self._host, self._port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-llm-server", daemon=True).start()
+
+    def stop(self) -> None:
+        """サーバーを停止する"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def draw(self) -> tuple[float, Optional[HTTPStatus]]:
+        """
+        1リクエスト分のレイテンシと、失敗させる場合のステータスを決める
+
+        Returns:
+            (レイテンシ秒, 失敗時のHTTPステータス（成功の場合はNone）)
+        """
+        with self._rng_lock:
+            latency = max(0.0, self._sample_latency())
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return latency, HTTPStatus.TOO_MANY_REQUESTS
+        if roll < self.rate_limit_rate + self.error_rate:
+            return latency, HTTPStatus.INTERNAL_SERVER_ERROR
+        return latency, None
+
+    def respond(self, request: dict) -> str:
+        """FakeLLMHandlerでレスポンス本文を生成する"""
+        return self._fake_handler.invoke(
+            system_prompt=request.get("system_prompt", ""),
+            user_prompt=request.get("user_prompt", ""),
+            temperature=request.get("temperature"),
+            json_schema=request.get("json_schema"),
+            media_path=request.get("media_path"),
+        )
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    stub_server: StubLLMServer
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/invoke":
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        length = int(self.headers.get("Content-Length", "0"))
+        request = json.loads(self.rfile.read(length).decode("utf-8"))
+
+        latency, failure = self.stub_server.draw()
+        time.sleep(latency)
+        if failure is not None:
+            self.send_response(failure)
+            if failure == HTTPStatus.TOO_MANY_REQUESTS:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content = self.stub_server.respond(request)
+        body = json.dumps({
+            "content": content,
+            "usage_metadata": {
+                # 文字数からおおよそのトークン数を見積もる
+                "input_tokens": (len(request.get("system_prompt", "")) + len(request.get("user_prompt", ""))) // 4,
+                "output_tokens": len(content) // 4,
+            },
+        }, ensure_ascii=False).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main() -> None:
+    settings = Settings()
+    default_url = urlsplit(settings.STUB_LLM_URL)
+    parser = argparse.ArgumentParser(description="負荷試験用のスタブLLMサーバー")
+    parser.add_argument("--host", default=default_url.hostname or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=default_url.port or 8766)
+    parser.add_argument("--latency", default=BenchmarkConstants.STUB_LATENCY_DISTRIBUTION)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StubLLMServer(
+        args.host,
+        args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    server.start()
+    print(f"スタブLLMサーバーを起動しました: http://{args.host}:{args.port}/invoke")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
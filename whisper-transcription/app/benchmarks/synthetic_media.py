@@ -0,0 +1,49 @@
+"""
+ベンチマーク用の合成動画を生成する
+"""
+
+from pathlib import Path
+
+from config import BenchmarkConstants
+from utli.ffmpeg_utils import run_ffmpeg
+
+
+def generate_synthetic_video(
+    output_dir: Path,
+    duration_seconds: float,
+    resolution: str,
+    fps: int = BenchmarkConstants.SYNTHETIC_FPS,
+) -> Path:
+    """
+    ffmpegのlavfi（testsrc2, sine）で合成動画を生成する（生成済みの場合は再利用する）
+
+    Args:
+        output_dir: 出力先ディレクトリ
+        duration_seconds: 動画の長さ（秒）
+        resolution: 解像度（"1280x720"の形式）
+        fps: フレームレート
+
+    Returns:
+        生成した動画のパス
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"synthetic_{resolution}_{duration_seconds:g}s_{fps}fps.mp4"
+    if output_path.exists():
+        return output_path
+
+    temp_path = output_path.with_suffix(".tmp.mp4")
+    run_ffmpeg([
+        "-f", "lavfi",
+        "-i", f"testsrc2=size={resolution}:rate={fps}:duration={duration_seconds}",
+        "-f", "lavfi",
+        "-i", f"sine=frequency=440:beep_factor=4:sample_rate=44100:duration={duration_seconds}",
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-pix_fmt", "yuv420p",
+        "-g", str(fps * BenchmarkConstants.SYNTHETIC_KEYFRAME_SECONDS),
+        "-c:a", "aac",
+        "-shortest",
+        str(temp_path),
+    ])
+    temp_path.replace(output_path)
+    return output_path
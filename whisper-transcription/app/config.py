@@ -1,5 +1,6 @@
 # 設定ファイル
 import os
+import tempfile
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
@@ -50,6 +51,155 @@ class Settings:
         self.GEMINI_MODEL_NAME = self.gemini_model_name
         self.GOOGLE_API_KEY = self.google_api_key
 
+        # 配信用ローカルファイルサーバー関連の設定（range_file_server.pyで使用）
+        self.media_server_host = self._get_env("MEDIA_SERVER_HOST", "127.0.0.1")
+        self.media_server_port = int(self._get_env("MEDIA_SERVER_PORT", "8765"))
+        # ブラウザから見たサーバーのURL（リバースプロキシ経由の場合に指定）
+        self.media_server_public_url = self._get_env("MEDIA_SERVER_PUBLIC_URL")
+        self.streaming_hls_enabled = self._get_env("STREAMING_HLS_ENABLED", "false").lower() == "true"
+
+        self.MEDIA_SERVER_HOST = self.media_server_host
+        self.MEDIA_SERVER_PORT = self.media_server_port
+        self.MEDIA_SERVER_PUBLIC_URL = self.media_server_public_url
+        self.STREAMING_HLS_ENABLED = self.streaming_hls_enabled
+
+        # メトリクス出力関連の設定（metrics.pyで使用）
+        self.metrics_dir = Path(
+            self._get_env("METRICS_DIR", str(SubtitleConstants.PROJECT_ROOT / "metrics"))
+        )
+        self.metrics_export_enabled = self._get_env("METRICS_EXPORT_ENABLED", "true").lower() == "true"
+
+        self.METRICS_DIR = self.metrics_dir
+        self.METRICS_EXPORT_ENABLED = self.metrics_export_enabled
+
+        # LLMペイロードのログ出力関連の設定（llm_client.pyで使用）
+        # プロンプト・レスポンス本文をログに出力する呼び出しの割合（0.0〜1.0）
+        self.log_payload_sample_rate = float(self._get_env("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+        self.log_payload_max_chars = int(self._get_env("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+        self.LOG_PAYLOAD_SAMPLE_RATE = self.log_payload_sample_rate
+        self.LOG_PAYLOAD_MAX_CHARS = self.log_payload_max_chars
+
+        # 負荷試験用スタブLLMサーバー関連の設定（stub_handler.pyで使用）
+        self.stub_llm_url = self._get_env("STUB_LLM_URL", "http://127.0.0.1:8766")
+        self.stub_llm_timeout_seconds = float(self._get_env("STUB_LLM_TIMEOUT_SECONDS", "60"))
+
+        self.STUB_LLM_URL = self.stub_llm_url
+        self.STUB_LLM_TIMEOUT_SECONDS = self.stub_llm_timeout_seconds
+
+        # LLMルーティング関連の設定（llm_routing_policy.pyで使用）
+        # 軽量・高速なモデル（未指定の場合は*_MODEL_NAMEを使用）
+        self.openai_fast_model_name = self._get_env("OPENAI_FAST_MODEL_NAME", Constants.OPENAI_DEFAULT_MODEL)
+        self.gemini_fast_model_name = self._get_env("GEMINI_FAST_MODEL_NAME")
+        self.llm_routing_enabled = self._get_env("LLM_ROUTING_ENABLED", "true").lower() == "true"
+        # 1回のLLM呼び出しのレイテンシ目標（秒、未指定の場合は目標なし）
+        latency_target = self._get_env("LLM_LATENCY_TARGET_SECONDS")
+        self.llm_latency_target_seconds = float(latency_target) if latency_target else None
+
+        self.OPENAI_FAST_MODEL_NAME = self.openai_fast_model_name
+        self.GEMINI_FAST_MODEL_NAME = self.gemini_fast_model_name
+        self.LLM_ROUTING_ENABLED = self.llm_routing_enabled
+        self.LLM_LATENCY_TARGET_SECONDS = self.llm_latency_target_seconds
+
+        # 翻訳メモリ関連の設定（translate_segments_service.pyで使用）
+        self.translation_memory_enabled = self._get_env("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+        self.translation_memory_path = Path(
+            self._get_env(
+                "TRANSLATION_MEMORY_PATH",
+                str(CacheConstants.CACHE_DIR / "translation_memory.sqlite3"),
+            )
+        )
+        self.translation_memory_max_entries = int(self._get_env("TRANSLATION_MEMORY_MAX_ENTRIES", "50000"))
+
+        self.TRANSLATION_MEMORY_ENABLED = self.translation_memory_enabled
+        self.TRANSLATION_MEMORY_PATH = self.translation_memory_path
+        self.TRANSLATION_MEMORY_MAX_ENTRIES = self.translation_memory_max_entries
+
+        # 字幕フォント関連の設定（font_resolver.pyで使用）
+        # 追加で検索するフォントディレクトリ（os.pathsep区切り）
+        self.subtitle_font_dirs = [
+            Path(path) for path in self._get_env("SUBTITLE_FONT_DIRS", "").split(os.pathsep) if path
+        ]
+
+        self.SUBTITLE_FONT_DIRS = self.subtitle_font_dirs
+
+        # 作業領域関連の設定（workspace_manager.pyで使用）
+        # ジョブごとの中間ファイルを置くディレクトリと、その合計サイズの上限（バイト）
+        self.workspace_root = Path(
+            self._get_env("WORKSPACE_ROOT", str(Path(tempfile.gettempdir()) / "whisper-transcription"))
+        )
+        self.workspace_quota_bytes = int(self._get_env("WORKSPACE_QUOTA_BYTES", str(10 * 1024 ** 3)))
+        # 小さな中間ファイルを置くtmpfs上のディレクトリ（未指定の場合はWORKSPACE_ROOTのみを使う）
+        tmpfs_root = self._get_env("WORKSPACE_TMPFS_ROOT")
+        self.workspace_tmpfs_root = Path(tmpfs_root) if tmpfs_root else None
+        self.workspace_tmpfs_quota_bytes = int(self._get_env("WORKSPACE_TMPFS_QUOTA_BYTES", str(512 * 1024 ** 2)))
+
+        self.WORKSPACE_ROOT = self.workspace_root
+        self.WORKSPACE_QUOTA_BYTES = self.workspace_quota_bytes
+        self.WORKSPACE_TMPFS_ROOT = self.workspace_tmpfs_root
+        self.WORKSPACE_TMPFS_QUOTA_BYTES = self.workspace_tmpfs_quota_bytes
+
+        # 出力動画のアーティファクトストア関連の設定（artifact_store.pyで使用）
+        self.artifact_store_enabled = self._get_env("ARTIFACT_STORE_ENABLED", "true").lower() == "true"
+
+        self.ARTIFACT_STORE_ENABLED = self.artifact_store_enabled
+
+        # エンコード処理のアドミッション制御関連の設定（admission_controller.pyで使用）
+        # CPUスロット数と1ジョブあたりのスレッド数（0の場合はCPUコア数から決める）
+        self.admission_cpu_slots = int(self._get_env("ADMISSION_CPU_SLOTS", "0"))
+        self.admission_threads_per_job = int(self._get_env("ADMISSION_THREADS_PER_JOB", "0"))
+
+        self.ADMISSION_CPU_SLOTS = self.admission_cpu_slots
+        self.ADMISSION_THREADS_PER_JOB = self.admission_threads_per_job
+
+        # 起動時のウォームアップ（main.pyで使用）
+        # 最初のアクセスで重いライブラリの読み込み・フォント索引の作成をバックグラウンドで行う
+        self.warmup_enabled = self._get_env("WARMUP_ENABLED", "true").lower() == "true"
+
+        self.WARMUP_ENABLED = self.warmup_enabled
+
+        # 機械クライアント向けHTTP APIサーバー関連の設定（api_server.py, pipeline_job_service.pyで使用）
+        self.api_server_host = self._get_env("API_SERVER_HOST", "127.0.0.1")
+        self.api_server_port = int(self._get_env("API_SERVER_PORT", "8770"))
+        # 結果URLのベース（リバースプロキシ経由の場合に指定）
+        self.api_server_public_url = self._get_env("API_SERVER_PUBLIC_URL")
+        # 同時に実行するジョブ数と、ステージごとの同時実行数（"trim=2,render=1"の形式で一部だけ上書きできる）
+        self.api_job_workers = int(self._get_env("API_JOB_WORKERS", "4"))
+        self.api_stage_concurrency = {
+            **ApiConstants.DEFAULT_STAGE_CONCURRENCY,
+            **_parse_stage_limits(self._get_env("API_STAGE_CONCURRENCY", "")),
+        }
+        self.api_max_upload_bytes = int(self._get_env("API_MAX_UPLOAD_BYTES", str(4 * 1024 ** 3)))
+        # 保持する終了済みジョブ数（超えた分は古いものから結果を削除対象にする）
+        self.api_max_retained_jobs = int(self._get_env("API_MAX_RETAINED_JOBS", "100"))
+
+        self.API_SERVER_HOST = self.api_server_host
+        self.API_SERVER_PORT = self.api_server_port
+        self.API_SERVER_PUBLIC_URL = self.api_server_public_url
+        self.API_JOB_WORKERS = self.api_job_workers
+        self.API_STAGE_CONCURRENCY = self.api_stage_concurrency
+        self.API_MAX_UPLOAD_BYTES = self.api_max_upload_bytes
+        self.API_MAX_RETAINED_JOBS = self.api_max_retained_jobs
+
+
+def _parse_stage_limits(value: str) -> dict:
+    """
+    "trim=2,render=1" の形式の文字列をステージごとの同時実行数に変換する
+
+    Args:
+        value: カンマ区切りの「ステージ名=数」
+
+    Returns:
+        {ステージ名: 同時実行数}
+    """
+    limits = {}
+    for item in value.split(","):
+        stage, _, limit = item.partition("=")
+        if stage.strip() and limit.strip():
+            limits[stage.strip()] = max(1, int(limit))
+    return limits
+
+
 class Constants:
     """定数クラス"""
     
@@ -69,6 +219,22 @@ class Constants:
     
     OPENAI_DEFAULT_MODEL = "gpt-4o-mini"
 
+class RoutingConstants:
+
+    # LLMルーティング（llm_routing_policy.pyで使用）
+    # この長さ（秒）以下のメディアは高速なモデルで処理する
+    FAST_MAX_MEDIA_SECONDS = {
+        "scene_extraction": 120.0,
+        "candidate_ranking": 180.0,
+        "transcription": 60.0,
+    }
+    # このセグメント数以下の翻訳は高速なモデルで処理する
+    FAST_MAX_SEGMENTS = 40
+    # レイテンシ見積もり用の係数（tierごと）
+    BASE_LATENCY_SECONDS = {"fast": 1.0, "heavy": 3.0}
+    LATENCY_PER_MEDIA_SECOND = {"fast": 0.1, "heavy": 0.4}
+    LATENCY_PER_SEGMENT = {"fast": 0.05, "heavy": 0.2}
+
 class SubtitleConstants:
     
     # 字幕関連の設定
@@ -76,9 +242,251 @@ class SubtitleConstants:
     SUBTITLE_DEFAULT_FONT_COLOR = "white"
     SUBTITLE_DEFAULT_STROKE_COLOR = "black"
     SUBTITLE_DEFAULT_STROKE_WIDTH = 2
-    
+
+    # レンダリング品質関連の設定
+    # プレビューは解像度・fpsを落とし、高速プリセットでエンコードする
+    PREVIEW_SCALE = 0.5
+    PREVIEW_MAX_FPS = 15
+    PREVIEW_PRESET = "ultrafast"
+    FINAL_PRESET = "medium"
+    # レンダリング処理を変更した場合に上げる（アーティファクトストアの既存の出力を使わないようにする）
+    RENDER_VERSION = 2
+    # 字幕画像のキャッシュ件数（同じテキスト・スタイルの字幕は一度だけ描画する）
+    RASTER_CACHE_MAX_ENTRIES = 2000
+
     # 出力ディレクトリ関連の設定
     # プロジェクトルート（whisper-transcription）を取得
     # config.pyは app/config.py にあるため、親の親ディレクトリがプロジェクトルート
     PROJECT_ROOT = Path(__file__).parent.parent.absolute()
     OUTPUT_MP4_DIR = PROJECT_ROOT / "output_mp4"
+
+class StreamingConstants:
+
+    # faststart（moovを先頭に配置）でmp4を書き出すためのffmpegパラメータ
+    FASTSTART_FFMPEG_PARAMS = ["-movflags", "+faststart"]
+
+    # HLS(fMP4)パッケージング関連の設定
+    HLS_SEGMENT_SECONDS = 4
+    HLS_PLAYLIST_NAME = "index.m3u8"
+
+    # Range配信時に1回で送信するバイト数
+    MEDIA_SERVER_CHUNK_SIZE = 256 * 1024
+
+class TranscriptionConstants:
+
+    # 先読み文字起こし（transcribe_video_service.pyで使用）
+    # シーン抽出と並行して元動画全体の音声だけを文字起こしする際の音声の形式
+    AUDIO_SAMPLE_RATE = 16000
+    AUDIO_BITRATE = "48k"
+    AUDIO_SUFFIX = ".aac"
+
+    # 部分再リクエスト（transcribe_video_service.pyで使用）
+    # 応答が途中で切れた・不正なセグメントがあった場合に、セグメント間の空白がこの秒数以上あれば
+    # 欠落とみなして、その範囲だけを文字起こしし直す（完全な応答の空白は無音・BGMとして再リクエストしない）
+    RETRY_GAP_SECONDS = 60.0
+    # 同様に、最後のセグメントからメディア末尾までがこの秒数以上あれば欠落とみなす
+    RETRY_TAIL_SECONDS = 20.0
+    # 再リクエストする音声の前後に付ける余白（秒）
+    RETRY_PADDING_SECONDS = 1.0
+    # 1回の文字起こしで再リクエストする範囲の最大数
+    MAX_RETRY_RANGES = 4
+
+class TranslationConstants:
+
+    # 部分再リクエスト（translate_segments_service.pyで使用）
+    # 応答に含まれなかった番号だけを再リクエストする回数の上限
+    MAX_RETRY_ROUNDS = 1
+
+class SilenceConstants:
+
+    # 無音区間除去（silence_removal_service.pyで使用）
+    # 音声解析時のサンプリングレート
+    SAMPLE_RATE = 16000
+    # 最大音量からこのdB以上小さい区間を無音とみなす
+    TOP_DB = 35
+    # 発話区間の前後に残す余白（秒）
+    PADDING_SECONDS = 0.3
+    # これより短い無音は除去しない（秒）
+    MIN_SILENCE_SECONDS = 1.0
+    # 除去できる割合がこれ未満の場合は連結メディアを作成しない
+    MIN_REMOVED_RATIO = 0.05
+
+class CandidateConstants:
+
+    # 候補区間スコアリング（candidate_window_service.pyで使用）
+    # スコアリングする固定窓の長さ（秒）
+    WINDOW_SECONDS = 10.0
+    # LLMに渡す候補区間の数
+    TOP_N = 12
+    # LLMに選ばせる候補区間の合計の、元動画の長さに対する割合
+    TARGET_RATIO = 0.4
+    # 音声解析のサンプリングレートとフレーム間隔（秒）
+    AUDIO_SAMPLE_RATE = 8000
+    AUDIO_HOP_SECONDS = 0.05
+    # 動き量算出用に縮小するフレームのサイズとサンプリングfps
+    FRAME_WIDTH = 64
+    FRAME_HEIGHT = 36
+    FRAME_SAMPLE_FPS = 2.0
+    # スコアの重み（各特徴量は標準化してから重み付けする）
+    ENERGY_WEIGHT = 0.3
+    SPEECH_WEIGHT = 0.5
+    MOTION_WEIGHT = 0.2
+    # LLMに渡す候補区間メディアの縮小設定
+    PREVIEW_WIDTH = 320
+    PREVIEW_FPS = 2
+
+class CacheConstants:
+
+    # メディアハッシュ単位のキャッシュ（ショット境界インデックスなど）の保存先
+    CACHE_DIR = SubtitleConstants.PROJECT_ROOT / ".cache"
+
+class ShotConstants:
+
+    # ショット境界検出（shot_index_service.pyで使用）
+    # 解析用に縮小するフレームのサイズとサンプリングfps
+    FRAME_WIDTH = 64
+    FRAME_HEIGHT = 36
+    SAMPLE_FPS = 10.0
+    # RGB各チャネルのヒストグラムのビン数（8の場合は8x8x8=512ビン）
+    HISTOGRAM_BINS = 8
+    # ヒストグラム差分（0〜1）の最小しきい値と、平均+k*標準偏差のk
+    MIN_THRESHOLD = 0.3
+    ADAPTIVE_K = 3.0
+    # これより短いショットは作らない（秒）
+    MIN_SHOT_SECONDS = 0.5
+    # 切り抜き範囲をショット境界へスナップする許容幅（秒）
+    TRIM_SNAP_TOLERANCE_SECONDS = 1.5
+    # 字幕がショット境界をまたがないように調整する許容幅（秒）
+    SUBTITLE_SNAP_TOLERANCE_SECONDS = 0.5
+
+class PreviewConstants:
+
+    # アップロード動画の軽量プレビュー（media_preview_service.pyで使用）
+    # 元のMP4の代わりにブラウザへ配信する音声の形式
+    AUDIO_SAMPLE_RATE = 22050
+    AUDIO_BITRATE = "32k"
+    AUDIO_SUFFIX = ".m4a"
+    # 波形表示用に音声をデコードするサンプリングレートと、間引き後の点数
+    WAVEFORM_SAMPLE_RATE = 8000
+    WAVEFORM_POINTS = 600
+
+class TrimIndexConstants:
+
+    # 手動切り抜き用のサムネイル・音量インデックス（trim_index_service.pyで使用）
+    # サムネイル1枚のサイズ（縦横比は保ち、余白は黒で埋める）
+    THUMBNAIL_WIDTH = 160
+    THUMBNAIL_HEIGHT = 90
+    # サムネイルの間隔（秒）の下限と、1本の動画あたりの最大枚数（長い動画では間隔を広げる）
+    MIN_THUMBNAIL_INTERVAL_SECONDS = 2.0
+    MAX_THUMBNAILS = 200
+    # スプライトシートの列数
+    SHEET_COLUMNS = 10
+    # RMS音量を計算するサンプリングレートと、1点あたりの最小の長さ（秒）・最大点数
+    ENVELOPE_SAMPLE_RATE = 8000
+    ENVELOPE_MIN_WINDOW_SECONDS = 0.1
+    ENVELOPE_MAX_POINTS = 2000
+
+class ApiConstants:
+
+    # HTTP APIサーバー（api_server.py, pipeline_job_service.pyで使用）
+    # パイプラインのステージと、既定の同時実行数（trim・renderはさらにアドミッション制御を通る）
+    DEFAULT_STAGE_CONCURRENCY = {
+        "scene_extraction": 4,
+        "trim": 2,
+        "transcribe": 4,
+        "translate": 4,
+        "render": 2,
+    }
+    # アップロードを読み込んでディスクに書き出す単位（バイト）
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    # 翻訳しない（文字起こしの原文の）字幕トラック名
+    SOURCE_TRACK = "source"
+
+class MetricsConstants:
+
+    # メトリクス（metrics.pyで使用）
+    # レイテンシ系ヒストグラムのバケット（秒）
+    LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+    # エンコード速度ヒストグラムのバケット（fps）
+    FPS_BUCKETS = (5.0, 10.0, 25.0, 50.0, 100.0, 200.0, 400.0, 800.0)
+    # 出力ファイル名
+    JSONL_FILE_NAME = "events.jsonl"
+    PROMETHEUS_FILE_NAME = "metrics.prom"
+    # ファイル出力は呼び出し側のスレッドでは行わず、この間隔（秒）で別スレッドからまとめて書き出す
+    FLUSH_INTERVAL_SECONDS = 5.0
+    # 書き出し待ちのイベント数の上限（超えた分は古いものから捨てる）
+    MAX_PENDING_EVENTS = 10000
+    # JSON Linesがこのサイズを超えたらローテーションする（バイト）
+    JSONL_MAX_BYTES = 50 * 1024 * 1024
+    # ローテーションで残す世代数（events.jsonl.1 〜 events.jsonl.N）
+    JSONL_BACKUP_COUNT = 3
+
+class BenchmarkConstants:
+
+    # ベンチマーク（benchmarks/run_benchmarks.pyで使用）
+    # 合成動画の長さ（秒）と解像度の組み合わせ
+    DEFAULT_DURATIONS = [15, 60]
+    DEFAULT_RESOLUTIONS = ["640x360", "1280x720"]
+    SYNTHETIC_FPS = 30
+    # 合成動画のキーフレーム間隔（秒）
+    SYNTHETIC_KEYFRAME_SECONDS = 2
+    # 偽LLMハンドラの文字起こしセグメントの長さ（秒）
+    FAKE_SEGMENT_SECONDS = 3.0
+    # ベースラインからこの割合以上悪化した場合にリグレッションとみなす
+    REGRESSION_THRESHOLD = 0.2
+    # 計測誤差とみなす差分の下限（秒・MB）
+    MIN_REGRESSION_SECONDS = 0.05
+    MIN_REGRESSION_MB = 5.0
+    WORK_DIR = CacheConstants.CACHE_DIR / "benchmarks"
+    BASELINE_PATH = Path(__file__).parent / "benchmarks" / "baseline.json"
+    # 負荷試験（benchmarks/load_test.pyで使用）
+    LOAD_CONCURRENCY_LEVELS = [1, 2, 4, 8]
+    # 同時実行数あたりのセッション数
+    LOAD_SESSIONS_PER_WORKER = 2
+    # スループットの伸びがこの割合を下回った同時実行数を飽和点とみなす
+    SATURATION_GAIN_RATIO = 0.1
+    # スタブLLMサーバーのレイテンシ分布（fixed:<秒>, uniform:<最小>:<最大>, lognormal:<中央値>:<sigma>, exponential:<平均>）
+    STUB_LATENCY_DISTRIBUTION = "lognormal:1.0:0.5"
+    LOAD_REPORT_DIR = Path(__file__).parent / "benchmarks" / "reports"
+
+class FontConstants:
+
+    # 字幕フォントの検索（font_resolver.pyで使用）
+    # fc-listが使えない場合に走査するディレクトリ
+    FONT_DIRS = [
+        Path("/usr/share/fonts"),
+        Path("/usr/local/share/fonts"),
+        Path.home() / ".fonts",
+        Path.home() / ".local" / "share" / "fonts",
+        Path("/System/Library/Fonts"),
+        Path("/Library/Fonts"),
+    ]
+    FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+    INDEX_PATH = CacheConstants.CACHE_DIR / "font_index.json"
+    # 言語ごとの優先フォントファミリー（先頭ほど優先）
+    PREFERRED_FAMILIES = {
+        "ja": [
+            "Hiragino Sans", "Hiragino Kaku Gothic ProN", "Noto Sans CJK JP", "Noto Sans JP",
+            "Source Han Sans JP", "IPAexGothic", "IPAGothic", "TakaoGothic", "VL Gothic",
+        ],
+        "ko": [
+            "Apple SD Gothic Neo", "Noto Sans CJK KR", "Noto Sans KR", "Source Han Sans KR",
+            "NanumGothic", "UnDotum",
+        ],
+        "en": ["Helvetica Neue", "Helvetica", "Noto Sans", "DejaVu Sans", "Liberation Sans", "Arial"],
+    }
+    # 同じファミリー内で優先するスタイル（字幕は太字のほうが読みやすい）
+    PREFERRED_STYLES = ["W6", "Bold", "W5", "Medium", "W4", "Regular"]
+    # 言語コードが未指定の場合に使う言語
+    DEFAULT_LANGUAGE = "ja"
+
+class AdmissionConstants:
+
+    # エンコード処理のアドミッション制御（admission_controller.pyで使用）
+    # スレッド数を自動で決める場合に、同時に実行させたいジョブ数と1ジョブの最小スレッド数
+    TARGET_CONCURRENT_JOBS = 2
+    MIN_THREADS_PER_JOB = 1
+    # 待ち順を確認する間隔（秒）
+    QUEUE_POLL_SECONDS = 0.5
+    # この秒数以上待った場合にログを出力する
+    QUEUE_LOG_THRESHOLD_SECONDS = 1.0
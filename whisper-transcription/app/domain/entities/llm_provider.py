@@ -5,4 +5,6 @@ class LLMProvider(Enum):
     """LLMプロバイダーの列挙型"""
     OPENAI = "openai"
     GEMINI = "gemini"
+    # 負荷試験用のローカルスタブサーバー
+    STUB = "stub"
     
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class LLMTask(Enum):
+    """LLMに依頼するタスクの列挙型"""
+    SCENE_EXTRACTION = "scene_extraction"
+    CANDIDATE_RANKING = "candidate_ranking"
+    TRANSCRIPTION = "transcription"
+    TRANSLATION = "translation"
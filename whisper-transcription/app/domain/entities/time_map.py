@@ -0,0 +1,171 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from utli.logger import get_logger
+from utli.time_utils import seconds_to_time, try_time_to_seconds
+
+logger = get_logger(__name__)
+
+
+class TimeMap:
+    """
+    元動画の一部区間を連結したメディアと、元動画との時刻対応表
+
+    連結後メディアの時刻（condensed）と元動画の時刻（source）を相互に変換する。
+    """
+
+    def __init__(self, source_intervals: List[Tuple[float, float]]):
+        """
+        初期化
+
+        Args:
+            source_intervals: 連結順に並んだ元動画の区間 [(start, end), ...]
+        """
+        self.source_intervals = [
+            (float(start), float(end)) for start, end in source_intervals if end > start
+        ]
+        if not self.source_intervals:
+            raise ValueError("TimeMapの区間が空です。")
+        self._condensed_starts = []
+        offset = 0.0
+        for start, end in self.source_intervals:
+            self._condensed_starts.append(offset)
+            offset += end - start
+        self.condensed_duration = offset
+
+    def to_source(self, condensed_seconds: float, is_end: bool = False) -> float:
+        """
+        連結後メディアの時刻を元動画の時刻に変換する
+
+        Args:
+            condensed_seconds: 連結後メディアでの秒数
+            is_end: 区間の終了時刻として扱う場合はTrue（境界上では前の区間の終端に対応させる）
+
+        Returns:
+            元動画での秒数
+        """
+        t = min(max(0.0, condensed_seconds), self.condensed_duration)
+        if is_end:
+            idx = max(0, bisect_left(self._condensed_starts, t) - 1)
+        else:
+            idx = max(0, bisect_right(self._condensed_starts, t) - 1)
+        start, end = self.source_intervals[idx]
+        return min(end, start + (t - self._condensed_starts[idx]))
+
+    def to_condensed(self, source_seconds: float) -> float:
+        """
+        元動画の時刻を連結後メディアの時刻に変換する
+
+        除外された区間内の時刻は、次に残っている区間の先頭に対応させる。
+
+        Args:
+            source_seconds: 元動画での秒数
+
+        Returns:
+            連結後メディアでの秒数
+        """
+        for idx, (start, end) in enumerate(self.source_intervals):
+            if source_seconds < start:
+                return self._condensed_starts[idx]
+            if source_seconds <= end:
+                return self._condensed_starts[idx] + (source_seconds - start)
+        return self.condensed_duration
+
+    def condensed_cut_points(self, source_boundaries: Optional[List[float]] = None) -> List[float]:
+        """
+        連結後メディアでのカット位置を返す
+
+        区間同士のつなぎ目に加えて、残っている区間内の元動画のショット境界も含める。
+
+        Args:
+            source_boundaries: 元動画でのショット境界
+
+        Returns:
+            連結後メディアでのカット位置（昇順）
+        """
+        points = set(self._condensed_starts[1:])
+        for boundary in source_boundaries or []:
+            for idx, (start, end) in enumerate(self.source_intervals):
+                if start < boundary < end:
+                    points.add(self._condensed_starts[idx] + (boundary - start))
+                    break
+        return sorted(points)
+
+    def remap_to_source(
+        self,
+        items: List[Dict[str, Any]],
+        start_key: str = "start_time",
+        end_key: str = "end_time",
+    ) -> List[Dict[str, Any]]:
+        """
+        セグメントの時刻（HH:MM:SS.mmm）を元動画の時刻に書き換えたリストを返す
+
+        Args:
+            items: start_key/end_keyを持つセグメントのリスト
+            start_key: 開始時刻のキー
+            end_key: 終了時刻のキー
+
+        Returns:
+            時刻を書き換えたセグメントのリスト（元のリストは変更しない）
+            辞書でない要素・時刻を解釈できない要素はログに残して除く
+        """
+        remapped = []
+        for item in items:
+            if not isinstance(item, dict):
+                logger.warning("time map skip: not a segment item=%r", item)
+                continue
+            updated = dict(item)
+            start = try_time_to_seconds(item.get(start_key)) if item.get(start_key) else None
+            end = try_time_to_seconds(item.get(end_key)) if item.get(end_key) else None
+            if (item.get(start_key) and start is None) or (item.get(end_key) and end is None):
+                logger.warning("time map skip: invalid time item=%r", item)
+                continue
+            if start is not None:
+                updated[start_key] = seconds_to_time(self.to_source(start))
+            if end is not None:
+                updated[end_key] = seconds_to_time(self.to_source(end, is_end=True))
+            remapped.append(updated)
+        return remapped
+
+    def remap_to_condensed(
+        self,
+        items: List[Dict[str, Any]],
+        start_key: str = "start_time",
+        end_key: str = "end_time",
+    ) -> List[Dict[str, Any]]:
+        """
+        元動画の時刻（HH:MM:SS.mmm）のセグメントを、連結後メディアの時刻に書き換えたリストを返す
+
+        残っている区間と重ならないセグメント・時刻を解釈できないセグメントは除き、区間をまたぐセグメントは
+        最も長く重なる区間内に切り詰める。
+
+        Args:
+            items: start_key/end_keyを持つ、元動画の時刻のセグメントのリスト
+            start_key: 開始時刻のキー
+            end_key: 終了時刻のキー
+
+        Returns:
+            時刻を書き換えたセグメントのリスト（元のリストは変更しない）
+        """
+        remapped = []
+        for item in items:
+            if not isinstance(item, dict) or not item.get(start_key) or not item.get(end_key):
+                continue
+            start = try_time_to_seconds(item[start_key])
+            end = try_time_to_seconds(item[end_key])
+            if start is None or end is None:
+                logger.warning("time map skip: invalid time item=%r", item)
+                continue
+            best_overlap, best_range = 0.0, None
+            for interval_start, interval_end in self.source_intervals:
+                overlap = min(end, interval_end) - max(start, interval_start)
+                if overlap > best_overlap:
+                    best_overlap = overlap
+                    best_range = (max(start, interval_start), min(end, interval_end))
+            if best_range is None:
+                continue
+            updated = dict(item)
+            updated[start_key] = seconds_to_time(self.to_condensed(best_range[0]))
+            updated[end_key] = seconds_to_time(self.to_condensed(best_range[1]))
+            remapped.append(updated)
+        return remapped
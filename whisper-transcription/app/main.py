@@ -3,21 +3,36 @@
 文字起こしWebアプリ（Streamlit使用）
 """
 
+import importlib
 import os
 import time
 import json
+from contextlib import contextmanager
 from datetime import datetime
-import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import streamlit as st
-from moviepy import VideoFileClip
 from usecase.service.trim_video_service import TrimVideoService
 from usecase.service.add_subtitles_service import AddSubtitlesService
 from usecase.service.transcribe_video_service import TranscribeVideoService
 from usecase.service.translate_segments_service import TranslateSegmentsService
+from usecase.service.silence_removal_service import SilenceRemovalService
+from usecase.service.candidate_window_service import CandidateWindowService
+from usecase.service.shot_index_service import ShotIndexService
+from usecase.service.media_preview_service import MediaPreviewService
+from usecase.service.trim_index_service import TrimIndexService
 from adapter.llm_factory import LLMFactory
 from domain.entities.llm_provider import LLMProvider
-from config import SubtitleConstants
+from domain.entities.time_map import TimeMap
+from adapter.media_server.range_file_server import get_media_server
+from adapter.artifact_store.artifact_store import build_artifact_key, get_artifact_store, hash_segments
+from adapter.workspace.workspace_manager import JobWorkspace, WorkspaceManager, get_workspace_manager
+from config import Settings, SubtitleConstants, TranscriptionConstants
+from utli.admission_controller import get_admission_controller
+from utli.ffmpeg_utils import check_media_tools, package_hls, probe_duration
 from utli.logger import get_logger
+from utli.media_hash import compute_content_hash, compute_media_hash
+from utli.metrics import get_metrics
 
 logger = get_logger(__name__)
 
@@ -28,12 +43,166 @@ st.set_page_config(
     layout="wide"
 )
 
-# キャッシュ設定（サービスインスタンスを再作成しないようにする）
 def _check_ffmpeg():
-    """FFmpegがインストールされているか確認"""
-    if os.system("ffmpeg -version > /dev/null 2>&1") != 0:
+    """FFmpegがインストールされているか確認（確認はプロセスごとに1回だけ行う）"""
+    media_tools = check_media_tools()
+    if not media_tools["ffmpeg"]:
         st.error("⚠️ FFmpegがインストールされていません。https://ffmpeg.org/download.html からダウンロードしてください。")
         st.stop()
+    if not media_tools["ffprobe"]:
+        st.warning("⚠️ ffprobeが見つかりません。複数シーンの連結や一部の解析が利用できません。")
+
+# キャッシュ設定（サービスインスタンスを再作成しないようにする）
+@st.cache_resource
+def _get_llm_factory(provider: LLMProvider) -> LLMFactory:
+    return LLMFactory(provider)
+
+@st.cache_resource
+def _get_trim_service(provider: LLMProvider) -> TrimVideoService:
+    return TrimVideoService(_get_llm_factory(provider))
+
+@st.cache_resource
+def _get_transcribe_service(provider: LLMProvider) -> TranscribeVideoService:
+    return TranscribeVideoService(_get_llm_factory(provider))
+
+@st.cache_resource
+def _get_translate_service(provider: LLMProvider) -> TranslateSegmentsService:
+    return TranslateSegmentsService(_get_llm_factory(provider))
+
+@st.cache_resource
+def _get_shot_index_service() -> ShotIndexService:
+    return ShotIndexService()
+
+@st.cache_resource
+def _get_media_preview_service() -> MediaPreviewService:
+    return MediaPreviewService()
+
+@st.cache_resource
+def _get_trim_index_service() -> TrimIndexService:
+    return TrimIndexService()
+
+@st.cache_resource
+def _warm_up() -> None:
+    """
+    サーバー起動後の最初のアクセスで、重いライブラリの読み込みと索引の作成をバックグラウンドで済ませる
+
+    WARMUP_ENABLEDが無効の場合は何もしない（各処理は初回利用時に読み込む）。
+    """
+    if not Settings().WARMUP_ENABLED:
+        return
+
+    def warm_up() -> None:
+        start_time = time.time()
+        try:
+            from utli.font_resolver import get_font_resolver
+
+            for module_name in ("moviepy", "librosa", "adapter.handler.openai_handler", "adapter.handler.gemini_handler"):
+                importlib.import_module(module_name)
+            check_media_tools()
+            get_font_resolver().resolve_font(None)
+            get_admission_controller()
+        except Exception as e:
+            logger.warning(f"warm-up failed: {e}")
+            return
+        logger.info(f"warm-up complete: {time.time() - start_time:.2f}s")
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+@st.cache_data(show_spinner=False)
+def _probe_duration(media_path: str, media_hash: str | None) -> float:
+    """動画の長さを取得する（同じアップロードでは再計算しない）"""
+    # moviepyは読み込みが重いため、初回利用時にimportする
+    from moviepy import VideoFileClip
+
+    with get_metrics().span("probe"):
+        video_for_duration = VideoFileClip(media_path)
+        try:
+            return video_for_duration.duration
+        finally:
+            video_for_duration.close()
+
+@st.cache_data(show_spinner=False)
+def _load_media_preview(media_path: str, media_hash: str | None) -> tuple[str, list[float]]:
+    """プレビュー用の音声と波形を取得する（同じアップロードでは再計算しない）"""
+    preview_service = _get_media_preview_service()
+    audio_path = preview_service.get_audio_preview(media_path, media_hash)
+    waveform = preview_service.get_waveform(media_path, media_hash)
+    return audio_path, waveform.tolist()
+
+def _show_media_preview(media_path: str, media_hash: str | None, duration_seconds: float | None) -> None:
+    """
+    元のMP4の代わりに、小さなプレビュー音声と波形を表示する
+
+    音声はStreamlitのメディアストアを経由せず、Range対応サーバーから配信する。
+    """
+    try:
+        with st.spinner("プレビュー音声を作成中..."):
+            audio_path, waveform = _load_media_preview(media_path, media_hash)
+    except Exception as e:
+        st.warning(f"プレビュー音声の作成に失敗しました: {str(e)}")
+        return
+    # 再実行のたびに登録するとURLが変わってプレイヤーが読み込み直すため、同じプレビューでは登録済みのURLを使う
+    if st.session_state.get("preview_audio_path") != audio_path:
+        st.session_state["preview_audio_url"] = get_media_server().register(audio_path)
+        st.session_state["preview_audio_path"] = audio_path
+    st.audio(st.session_state["preview_audio_url"], format="audio/mp4")
+    if waveform:
+        step = (duration_seconds or len(waveform)) / len(waveform)
+        st.area_chart(
+            {"時間（秒）": [round(idx * step, 2) for idx in range(len(waveform))], "音量": waveform},
+            x="時間（秒）",
+            y="音量",
+            height=120,
+        )
+
+@st.cache_data(show_spinner=False)
+def _load_trim_index(media_path: str, media_hash: str | None, duration_seconds: float) -> tuple[dict, list[float], float]:
+    """手動切り抜き用のサムネイルとRMS音量を取得する（同じアップロードでは再計算しない）"""
+    trim_index_service = _get_trim_index_service()
+    sheet = trim_index_service.get_thumbnail_sheet(media_path, duration_seconds, media_hash)
+    envelope, seconds_per_point = trim_index_service.get_rms_envelope(media_path, media_hash)
+    return sheet, envelope.tolist(), seconds_per_point
+
+@st.cache_resource(max_entries=4)
+def _load_thumbnail_sheet_image(sheet_path: str):
+    from PIL import Image
+
+    with Image.open(sheet_path) as image:
+        return image.convert("RGB")
+
+def _show_trim_index(
+    media_path: str,
+    media_hash: str | None,
+    duration_seconds: float,
+    trim_range: tuple[float, float],
+) -> None:
+    """切り抜き範囲の開始・終了に最も近いサムネイルと、選択範囲を強調したRMS音量を表示する"""
+    try:
+        with st.spinner("サムネイルを作成中..."):
+            sheet, envelope, seconds_per_point = _load_trim_index(media_path, media_hash, duration_seconds)
+    except Exception as e:
+        st.warning(f"サムネイルの作成に失敗しました: {str(e)}")
+        return
+    sheet_image = _load_thumbnail_sheet_image(sheet["path"])
+    columns = st.columns(2)
+    for column, label, seconds in zip(columns, ("開始", "終了"), trim_range):
+        index = TrimIndexService.thumbnail_index(sheet, seconds)
+        thumbnail = sheet_image.crop(TrimIndexService.thumbnail_box(sheet, index))
+        column.image(thumbnail, caption=f"{label} {_format_time(index * sheet['interval_seconds'])}付近")
+    if envelope:
+        start_seconds, end_seconds = trim_range
+        times = [round(idx * seconds_per_point, 2) for idx in range(len(envelope))]
+        inside = [start_seconds <= t <= end_seconds for t in times]
+        st.area_chart(
+            {
+                "時間（秒）": times,
+                "選択範囲": [value if keep else 0.0 for value, keep in zip(envelope, inside)],
+                "範囲外": [0.0 if keep else value for value, keep in zip(envelope, inside)],
+            },
+            x="時間（秒）",
+            y=["選択範囲", "範囲外"],
+            height=100,
+        )
 
 def _format_time(seconds: float) -> str:
     total_seconds = max(0.0, seconds)
@@ -44,6 +213,291 @@ def _format_time(seconds: float) -> str:
     secs = whole % 60
     return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
 
+@contextmanager
+def _encode_slot(stage: str):
+    """
+    エンコード処理のCPUスロットを確保する（他のジョブを待つ間は待ち順を表示する）
+
+    Args:
+        stage: ステージ名（trim, renderなど）
+    """
+    queue_status = st.empty()
+
+    def show_position(position: int) -> None:
+        queue_status.info(f"⏳ 他のジョブのエンコード完了を待っています（{position}番目）")
+
+    try:
+        with get_admission_controller().admit(stage, on_queue=show_position) as threads:
+            queue_status.empty()
+            yield threads
+    finally:
+        queue_status.empty()
+
+def _take_speculative_transcript(
+    speculative_transcript: Future | None,
+    trim_time_map: TimeMap,
+) -> dict | None:
+    """
+    先読みした元動画全体の文字起こしから、切り抜き範囲のセグメントを取り出す
+
+    Args:
+        speculative_transcript: transcribe_audioのFuture（先読みしていない場合はNone）
+        trim_time_map: 切り抜き後の動画と元動画の時刻対応表
+
+    Returns:
+        切り抜き後の動画の時刻の文字起こし結果（先読みしていない・失敗した場合はNone）
+    """
+    if speculative_transcript is None:
+        return None
+    try:
+        payload = speculative_transcript.result()
+    except Exception as e:
+        logger.warning(f"speculative transcription failed, falling back: {e}")
+        return None
+    if not isinstance(payload.get("segments"), list):
+        logger.warning("speculative transcription returned no segments, falling back")
+        return None
+    segments = trim_time_map.remap_to_condensed(payload["segments"])
+    logger.info(
+        f"speculative transcription used: source_segments={len(payload['segments'])} "
+        f"trimmed_segments={len(segments)}"
+    )
+    return {**payload, "segments": segments}
+
+def _condense_silence(job: JobWorkspace, media_path: str) -> tuple[str, TimeMap | None]:
+    """
+    無音区間を除去したメディアを作成する
+
+    Args:
+        job: 中間ファイルを置くジョブの作業領域
+        media_path: 入力メディアファイルのパス
+
+    Returns:
+        (LLMに渡すメディアのパス, 元メディアとの時刻対応表（除去しなかった場合はNone）)
+    """
+    condensed_path = job.new_path(".mp4")
+    with _encode_slot("condense"):
+        time_map = SilenceRemovalService().condense(media_path, condensed_path)
+    if time_map is None:
+        if os.path.exists(condensed_path):
+            os.unlink(condensed_path)
+        return media_path, None
+    logger.info(
+        f"silence removal: {media_path} -> {condensed_path} "
+        f"condensed_duration={time_map.condensed_duration:.3f}s"
+    )
+    return condensed_path, time_map
+
+def _extract_with_candidates(job: JobWorkspace, trim_service: TrimVideoService, video_path: str) -> dict:
+    """
+    ローカルで候補区間を絞り込み、候補区間だけをLLMに渡して重要シーンを選ばせる
+
+    Args:
+        job: 中間ファイルを置くジョブの作業領域
+        trim_service: 重要シーンを選ばせるサービス
+        video_path: 元動画のパス
+
+    Returns:
+        LLMレスポンス（important_scenesは元動画の時刻）
+    """
+    candidate_service = CandidateWindowService()
+    candidates = candidate_service.propose_candidates(video_path)
+    # 候補区間だけを低解像度で連結したLLM入力用のメディア（小さいためtmpfsに置く）
+    candidate_media_path = job.new_path(".mp4", small=True)
+    with _encode_slot("candidate_media"):
+        layout = candidate_service.build_candidate_media(video_path, candidates, candidate_media_path)
+    return trim_service.rank_candidates(
+        candidate_media_path,
+        candidates,
+        layout,
+        source_duration_seconds=probe_duration(video_path),
+    )
+
+def _render_artifact_key(
+    render_inputs: dict,
+    segments: list,
+    language: str | None,
+    subtitle_style: dict,
+    preview: bool,
+) -> str | None:
+    """
+    字幕付き動画の出力を決める入力一式からアーティファクトストアのキーを作成する
+
+    Args:
+        render_inputs: 元動画の内容全体のハッシュ・切り抜き範囲・ショット境界
+        segments: 字幕のセグメント
+        language: 字幕の言語コード
+        subtitle_style: 字幕スタイル
+        preview: プレビュー出力かどうか
+
+    Returns:
+        キー（元動画のハッシュが不明な場合はNone）
+    """
+    if not render_inputs.get("content_hash"):
+        return None
+    # 1言語・複数言語の一括出力は同じ字幕画像とエンコード設定のため、キーを区別せずに出力を共有する
+    encoder_profile = {
+        "render_version": SubtitleConstants.RENDER_VERSION,
+        "preview": preview,
+        "preset": SubtitleConstants.PREVIEW_PRESET if preview else SubtitleConstants.FINAL_PRESET,
+        "scale": SubtitleConstants.PREVIEW_SCALE if preview else 1.0,
+        "max_fps": SubtitleConstants.PREVIEW_MAX_FPS if preview else None,
+    }
+    return build_artifact_key(
+        content_hash=render_inputs["content_hash"],
+        trim_intervals=render_inputs.get("trim_intervals"),
+        shot_boundaries=render_inputs.get("shot_boundaries"),
+        segments_hash=hash_segments(segments),
+        language=language,
+        style=subtitle_style,
+        encoder_profile=encoder_profile,
+    )
+
+def _render_subtitled_video(job: JobWorkspace, render_inputs: dict, subtitle_style: dict, preview: bool) -> str:
+    """
+    上流処理（切り抜き・文字起こし・翻訳）の結果を再利用して字幕付き動画を出力する
+
+    Args:
+        job: 出力先のジョブの作業領域
+        render_inputs: 切り抜き済み動画パス・セグメント・字幕言語
+        subtitle_style: 字幕スタイル（フォントサイズ・色・ストローク）
+        preview: Trueの場合は低解像度のプレビューを出力する
+
+    Returns:
+        字幕付き動画のパス（同じ入力の出力がアーティファクトストアにあればそのパス）
+    """
+    artifact_store = get_artifact_store()
+    artifact_key = _render_artifact_key(
+        render_inputs,
+        render_inputs["segments"],
+        render_inputs["language"],
+        subtitle_style,
+        preview,
+    )
+    if artifact_store and artifact_key:
+        stored_path = artifact_store.lookup(artifact_key)
+        if stored_path:
+            logger.info(f"subtitle flow: artifact hit path={stored_path}")
+            return stored_path
+    subtitle_service = AddSubtitlesService(**subtitle_style)
+    subtitle_output_path = job.new_path(".mp4", small=preview)
+    logger.info(f"subtitle flow: subtitle_output_path={subtitle_output_path} preview={preview}")
+    with _encode_slot("render"):
+        subtitle_service.add_subtitles_to_trimmed_video(
+            render_inputs["video_path"],
+            render_inputs["segments"],
+            0.0,
+            subtitle_output_path,
+            language=render_inputs["language"],
+            preview=preview,
+            shot_boundaries=render_inputs.get("shot_boundaries"),
+        )
+    logger.info("subtitle flow: add_subtitles_to_trimmed_video complete")
+    if artifact_store and artifact_key:
+        return artifact_store.store(artifact_key, subtitle_output_path)
+    return subtitle_output_path
+
+def _render_language_variants(
+    job: JobWorkspace,
+    render_inputs: dict,
+    translations: dict,
+    subtitle_style: dict,
+    preview: bool,
+) -> dict:
+    """
+    切り抜き済み動画を1回だけデコードし、翻訳した言語ごとの字幕付き動画をまとめて出力する
+
+    Args:
+        job: 出力先のジョブの作業領域
+        render_inputs: 切り抜き済み動画パス・ショット境界
+        translations: {言語コード: 翻訳結果}
+        subtitle_style: 字幕スタイル（フォントサイズ・色・ストローク）
+        preview: Trueの場合は低解像度のプレビューを出力する
+
+    Returns:
+        {言語コード: 字幕付き動画のパス}
+    """
+    artifact_store = get_artifact_store()
+    artifact_keys = {
+        language: _render_artifact_key(
+            render_inputs,
+            translated.get("segments", []),
+            language,
+            subtitle_style,
+            preview,
+        )
+        for language, translated in translations.items()
+    }
+    result_paths = {}
+    output_paths = {}
+    for language in translations:
+        stored_path = None
+        if artifact_store and artifact_keys[language]:
+            stored_path = artifact_store.lookup(artifact_keys[language])
+        if stored_path:
+            result_paths[language] = stored_path
+        else:
+            output_paths[language] = job.new_path(f"_{language}.mp4", small=preview)
+    # アーティファクトストアにない言語だけをまとめてレンダリングする
+    if output_paths:
+        with _encode_slot("render"):
+            AddSubtitlesService(**subtitle_style).render_language_variants(
+                render_inputs["video_path"],
+                {language: translations[language].get("segments", []) for language in output_paths},
+                output_paths,
+                preview=preview,
+                shot_boundaries=render_inputs.get("shot_boundaries"),
+            )
+        for language, output_path in output_paths.items():
+            if artifact_store and artifact_keys[language]:
+                output_path = artifact_store.store(artifact_keys[language], output_path)
+            result_paths[language] = output_path
+    logger.info(
+        f"subtitle flow: render_language_variants complete "
+        f"rendered={list(output_paths)} reused={[language for language in result_paths if language not in output_paths]}"
+    )
+    return {language: result_paths[language] for language in translations}
+
+def _show_subtitled_video(subtitle_output_path: str, preview: bool, language: str | None = None) -> list[str]:
+    """
+    字幕付き動画をRange対応サーバーから配信して表示する
+
+    Returns:
+        配信しているファイルのパスのリスト（HLSのプレイリスト・セグメントを含む）
+    """
+    language_suffix = f"（{language}）" if language else ""
+    if preview:
+        st.markdown(f"### 字幕付き切り抜き動画{language_suffix}（プレビュー）")
+    else:
+        st.markdown(f"### 字幕付き切り抜き動画{language_suffix}")
+    # Streamlitのメディアストアを経由せず、Range対応サーバーから配信する
+    media_server = get_media_server()
+    video_url = media_server.register(subtitle_output_path)
+    st.video(video_url)
+    st.link_button(f"字幕付き切り抜き動画{language_suffix}をダウンロード", f"{video_url}?download=1")
+    if Settings().STREAMING_HLS_ENABLED:
+        hls_dir = f"{os.path.splitext(subtitle_output_path)[0]}_hls"
+        playlist_path = package_hls(subtitle_output_path, hls_dir)
+        hls_base_url = media_server.register(hls_dir)
+        st.caption(f"HLSプレイリスト: {hls_base_url}{os.path.basename(playlist_path)}")
+        served_paths = [os.path.join(hls_dir, name) for name in sorted(os.listdir(hls_dir))]
+        return [subtitle_output_path, *served_paths]
+    return [subtitle_output_path]
+
+def _pin_displayed_outputs(workspace: WorkspaceManager, paths: list[str]) -> None:
+    """
+    表示中の字幕付き動画を使用中にし、前回表示していた動画の使用中を解除する
+
+    Args:
+        workspace: 作業領域
+        paths: 表示中の動画のパス（空の場合は使用中の解除だけを行う）
+    """
+    for path in paths:
+        workspace.pin(path)
+    for path in st.session_state.pop("displayed_output_paths", []):
+        workspace.unpin(path)
+    st.session_state["displayed_output_paths"] = list(paths)
+
 def main():
     """メイン関数"""
     st.title("🎤 文字起こしツール")
@@ -53,6 +507,7 @@ def main():
     
     # FFmpegの確認
     _check_ffmpeg()
+    _warm_up()
     
     # サイドバー設定
     st.sidebar.title("設定")
@@ -70,6 +525,14 @@ def main():
         help="文字起こし結果を指定言語に翻訳します。"
     )
 
+    fanout_languages = st.sidebar.multiselect(
+        "複数言語版を同時に出力",
+        options=["en", "ja", "ko"],
+        default=[],
+        format_func=lambda x: {"en": "英語", "ja": "日本語", "ko": "韓国語"}.get(x, x),
+        help="1回の文字起こしから複数言語へ並行して翻訳し、切り抜き動画を1回だけデコードして各言語版を出力します。",
+    )
+
     # プロバイダー選択
     provider_option = st.sidebar.selectbox(
         "プロバイダーを選択",
@@ -78,6 +541,30 @@ def main():
         help="重要箇所抽出に使用するLLMプロバイダーを選択します。"
     )
 
+    speculative_transcription = st.sidebar.checkbox(
+        "シーン抽出と並行して文字起こし",
+        value=False,
+        help="元動画全体の音声だけを先に文字起こしし、切り抜き範囲の字幕を取り出します。LLMの待ち時間が1回分短くなります。",
+    )
+
+    remove_silence = st.sidebar.checkbox(
+        "無音区間を除去して解析",
+        value=False,
+        help="発話のない区間を除いた短いメディアをLLMに渡し、結果を元動画の時刻に戻します。",
+    )
+
+    use_candidates = st.sidebar.checkbox(
+        "候補区間をローカルで絞り込んでから抽出",
+        value=False,
+        help="音量・発話密度・動き量で候補区間を絞り込み、LLMには候補区間だけを渡して選ばせます。",
+    )
+
+    snap_to_shots = st.sidebar.checkbox(
+        "ショット境界に合わせる",
+        value=False,
+        help="カット位置を解析し、切り抜き範囲と字幕の切り替わりを近くのカットに合わせます。解析結果は動画ごとにキャッシュされます。",
+    )
+
     manual_trim_container = st.sidebar.container()
     subtitle_style_container = st.sidebar.container()
     
@@ -88,6 +575,7 @@ def main():
         help="対応フォーマット: MP4"
     )
     
+    workspace = get_workspace_manager()
     if uploaded_file is not None:
         previous_temp_path = st.session_state.get("uploaded_temp_path")
         previous_name = st.session_state.get("uploaded_name")
@@ -101,26 +589,38 @@ def main():
             or previous_name != uploaded_file.name
             or previous_size != uploaded_file.size
         ):
-            if previous_temp_path and os.path.exists(previous_temp_path):
-                os.unlink(previous_temp_path)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                st.session_state["uploaded_temp_path"] = tmp_file.name
-                st.session_state["uploaded_name"] = uploaded_file.name
-                st.session_state["uploaded_size"] = uploaded_file.size
+            # 以前のアップロード・再レンダリング用の切り抜き動画は使用中を解除し、作業領域の上限に応じて削除させる
+            if previous_temp_path:
+                workspace.unpin(previous_temp_path)
+            previous_render_inputs = st.session_state.pop("render_inputs", None)
+            if previous_render_inputs:
+                workspace.unpin(previous_render_inputs["video_path"])
+            _pin_displayed_outputs(workspace, [])
+            upload_job = workspace.create_job("upload")
+            upload_path = upload_job.new_path(f".{uploaded_file.name.split('.')[-1]}")
+            upload_bytes = uploaded_file.getvalue()
+            with open(upload_path, "wb") as tmp_file:
+                tmp_file.write(upload_bytes)
+            workspace.pin(upload_path)
+            upload_job.finish()
+            st.session_state["uploaded_temp_path"] = upload_path
+            st.session_state["uploaded_media_hash"] = compute_media_hash(upload_path)
+            # アーティファクトストアのキーには内容全体のハッシュを使う（アップロードはメモリ上にあるためそのまま計算する）
+            st.session_state["uploaded_content_hash"] = compute_content_hash(upload_bytes)
+            st.session_state["uploaded_name"] = uploaded_file.name
+            st.session_state["uploaded_size"] = uploaded_file.size
 
         temp_filename = st.session_state.get("uploaded_temp_path")
         duration_seconds = None
         if temp_filename and os.path.exists(temp_filename):
             try:
-                video_for_duration = VideoFileClip(temp_filename)
-                duration_seconds = video_for_duration.duration
-                video_for_duration.close()
+                duration_seconds = _probe_duration(temp_filename, st.session_state.get("uploaded_media_hash"))
             except Exception as e:
                 st.warning(f"動画の長さ取得に失敗しました: {str(e)}")
         
-        # 音声再生機能
-        st.audio(uploaded_file, format=f"audio/{uploaded_file.name.split('.')[-1]}")
+        # 音声再生機能（元のMP4ではなく、メディアハッシュ単位でキャッシュした小さな音声を配信する）
+        if temp_filename and os.path.exists(temp_filename):
+            _show_media_preview(temp_filename, st.session_state.get("uploaded_media_hash"), duration_seconds)
         
         with manual_trim_container:
             manual_trim = st.checkbox(
@@ -143,6 +643,12 @@ def main():
                     st.caption(
                         f"選択範囲: {_format_time(manual_trim_range[0])} - {_format_time(manual_trim_range[1])}"
                     )
+                    _show_trim_index(
+                        temp_filename,
+                        st.session_state.get("uploaded_media_hash"),
+                        float(duration_seconds),
+                        manual_trim_range,
+                    )
 
         with subtitle_style_container.expander("字幕スタイル", expanded=False):
             font_size = st.number_input(
@@ -211,17 +717,32 @@ def main():
                 help="字幕の縁取りの太さを指定します。"
             )
 
+        subtitle_style = {
+            "font_size": int(font_size),
+            "font_color": font_color,
+            "stroke_color": stroke_color,
+            "stroke_width": int(stroke_width),
+        }
+
+        preview_render = st.checkbox(
+            "プレビュー（低解像度・高速）で出力",
+            value=False,
+            help="字幕のタイミングやスタイル確認用に、解像度とfpsを落として高速に出力します。",
+        )
+
         # 文字起こし実行ボタン
         transcribe_button = st.button("動画処理開始", type="primary")
         
         if transcribe_button:
             # 処理開始
             with st.spinner("動画処理中..."):
+                job = None
                 try:
                     if not temp_filename or not os.path.exists(temp_filename):
                         raise FileNotFoundError("アップロード動画の一時ファイルが見つかりません。")
 
                     trim_payload = None
+                    trim_time_map = None
                     raw_response = None
                     load_start = time.time()
                     progress_text = st.empty()
@@ -229,8 +750,25 @@ def main():
                         "openai": LLMProvider.OPENAI,
                         "gemini": LLMProvider.GEMINI,
                     }
-                    llm_factory = LLMFactory(provider_map[provider_option])
-                    trim_service = TrimVideoService(llm_factory)
+                    provider = provider_map[provider_option]
+                    trim_service = _get_trim_service(provider)
+                    job = workspace.create_job("process")
+                    speculative_transcript = None
+                    if speculative_transcription:
+                        # 切り抜き範囲が決まる前に、元動画全体の音声の文字起こしを並行して始める
+                        speculative_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative")
+                        speculative_transcript = speculative_executor.submit(
+                            _get_transcribe_service(provider).transcribe_audio,
+                            temp_filename,
+                            job.new_path(TranscriptionConstants.AUDIO_SUFFIX, small=True),
+                        )
+                        speculative_executor.shutdown(wait=False)
+
+                    shot_boundaries = None
+                    if snap_to_shots:
+                        progress_text.text("ショット境界を解析中...")
+                        shot_boundaries = _get_shot_index_service().get_shot_boundaries(temp_filename)
+                        logger.info(f"shot boundaries: count={len(shot_boundaries)}")
 
                     if manual_trim:
                         if manual_trim_range is None:
@@ -238,20 +776,31 @@ def main():
                             st.stop()
                         trim_start, trim_end = manual_trim_range
                         progress_text.text("手動指定の切り抜きを実行中...")
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as out_file:
-                            output_video_path = out_file.name
+                        output_video_path = job.new_path(".mp4")
                         logger.info(f"trim flow: output_video_path={output_video_path}")
-                        trim_start, trim_end = trim_service.trim_by_range(
-                            temp_filename,
-                            trim_start,
-                            trim_end,
-                            output_video_path,
-                        )
+                        with _encode_slot("trim"):
+                            trim_start, trim_end = trim_service.trim_by_range(
+                                temp_filename,
+                                trim_start,
+                                trim_end,
+                                output_video_path,
+                            )
                         st.success("手動の切り抜きが完了しました。")
                     else:
                         # 重要箇所の抽出（抽象的な処理）
-                        progress_text.text("重要シーンを抽出中...")
-                        payload = trim_service.extract_key_segments(temp_filename)
+                        if use_candidates:
+                            progress_text.text("候補区間をスコアリング中...")
+                            payload = _extract_with_candidates(job, trim_service, temp_filename)
+                        else:
+                            extract_source_path, extract_time_map = temp_filename, None
+                            if remove_silence:
+                                progress_text.text("無音区間を除去中...")
+                                extract_source_path, extract_time_map = _condense_silence(job, temp_filename)
+                            progress_text.text("重要シーンを抽出中...")
+                            payload = trim_service.extract_key_segments(
+                                extract_source_path,
+                                time_map=extract_time_map,
+                            )
                         logger.info(f"trim payload keys: {list(payload.keys())}")
                         st.success("トリミング範囲の抽出が完了しました。")
 
@@ -267,14 +816,26 @@ def main():
 
                         if trim_payload.get("important_scenes"):
                             logger.info("trim flow: important_scenes found")
-                            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as out_file:
-                                output_video_path = out_file.name
+                            output_video_path = job.new_path(".mp4")
                             logger.info(f"trim flow: output_video_path={output_video_path}")
-                            trim_start, trim_end = trim_service.trim_by_segments(
-                                temp_filename,
-                                trim_payload,
-                                output_video_path,
-                            )
+                            if len(trim_payload["important_scenes"]) > 1:
+                                # 複数シーンは再エンコードせずに切り出して連結する
+                                trim_time_map = trim_service.trim_by_scenes(
+                                    temp_filename,
+                                    trim_payload,
+                                    output_video_path,
+                                    shot_boundaries=shot_boundaries,
+                                )
+                                trim_start = trim_time_map.source_intervals[0][0]
+                                trim_end = trim_time_map.source_intervals[-1][1]
+                            else:
+                                with _encode_slot("trim"):
+                                    trim_start, trim_end = trim_service.trim_by_segments(
+                                        temp_filename,
+                                        trim_payload,
+                                        output_video_path,
+                                        shot_boundaries=shot_boundaries,
+                                    )
                         else:
                             logger.warning("trim ranges is empty or missing")
                             st.info("重要箇所が抽出されませんでした。")
@@ -294,53 +855,115 @@ def main():
                     start_formatted = str(datetime.utcfromtimestamp(trim_start).strftime("%H:%M:%S.%f"))[:-3]
                     end_formatted = str(datetime.utcfromtimestamp(trim_end).strftime("%H:%M:%S.%f"))[:-3]
                     st.info(f"start_time: {start_formatted} / end_time: {end_formatted}")
+                    if trim_time_map is not None:
+                        scene_lines = [
+                            f"- {_format_time(scene_start)} - {_format_time(scene_end)}"
+                            for scene_start, scene_end in trim_time_map.source_intervals
+                        ]
+                        st.markdown(
+                            f"連結したシーン（{len(scene_lines)}件、"
+                            f"合計{trim_time_map.condensed_duration:.1f}秒）\n" + "\n".join(scene_lines)
+                        )
                     progress_text.text("文字起こし処理を開始中...")
                     logger.info("transcribe_video start")
-                    transcribe_factory = LLMFactory(LLMProvider.GEMINI)
-                    transcribe_service = TranscribeVideoService(transcribe_factory)
-                    transcribed = transcribe_service.transcribe(output_video_path)
+                    # プロバイダー・モデルはタスクと入力サイズからLLMFactoryのルーティングで決める
+                    transcribe_service = _get_transcribe_service(provider)
+                    transcribed = _take_speculative_transcript(
+                        speculative_transcript,
+                        trim_time_map if trim_time_map is not None else TimeMap([(trim_start, trim_end)]),
+                    )
+                    if transcribed is None:
+                        transcribe_source_path, transcribe_time_map = output_video_path, None
+                        if remove_silence:
+                            transcribe_source_path, transcribe_time_map = _condense_silence(job, output_video_path)
+                        transcribed = transcribe_service.transcribe(
+                            transcribe_source_path,
+                            time_map=transcribe_time_map,
+                        )
                     logger.info("transcribe_video complete")
                     progress_text.text("文字起こし処理が完了しました。")
                     segments = transcribed.get("segments", [])
-                    translated = None
-                    if translate_language_option:
+                    translations = {}
+                    target_languages = list(dict.fromkeys(
+                        ([translate_language_option] if translate_language_option else []) + fanout_languages
+                    ))
+                    if target_languages:
                         progress_text.text("翻訳処理を開始中...")
-                        translate_factory = LLMFactory(LLMProvider.GEMINI)
-                        translate_service = TranslateSegmentsService(translate_factory)
-                        translated = translate_service.translate(
-                            segments,
-                            target_language=translate_language_option,
-                        )
-                        segments = translated.get("segments", segments)
+                        translate_service = _get_translate_service(provider)
+                        # 複数言語は並行して翻訳する
+                        translations = translate_service.translate_many(segments, target_languages)
+                        segments = translations[target_languages[0]].get("segments", segments)
                         progress_text.text("翻訳処理が完了しました。")
+                        memory_hits = sum(
+                            item.get("translation_memory", {}).get("hits", 0) for item in translations.values()
+                        )
+                        memory_requested = sum(
+                            item.get("translation_memory", {}).get("requested", 0) for item in translations.values()
+                        )
+                        if any("translation_memory" in item for item in translations.values()):
+                            st.caption(
+                                f"翻訳メモリ: {memory_hits}件を再利用、"
+                                f"{memory_requested}件をLLMで翻訳"
+                            )
                     logger.info(f"subtitle flow: segments_count={len(segments)}")
-                    subtitle_service = AddSubtitlesService(
-                        font_size=int(font_size),
-                        font_color=font_color,
-                        stroke_color=stroke_color,
-                        stroke_width=int(stroke_width),
-                    )
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as subtitle_file:
-                        subtitle_output_path = subtitle_file.name
-                    logger.info(f"subtitle flow: subtitle_output_path={subtitle_output_path}")
-                    subtitle_language = translate_language_option or None
-                    subtitle_service.add_subtitles_to_trimmed_video(
-                        output_video_path,
-                        segments,
-                        0.0,
-                        subtitle_output_path,
-                        language=subtitle_language,
-                    )
-                    logger.info("subtitle flow: add_subtitles_to_trimmed_video complete")
-                    st.markdown("### 字幕付き切り抜き動画")
-                    st.video(subtitle_output_path)
-                    with open(subtitle_output_path, "rb") as f:
-                        st.download_button(
-                            label="字幕付き切り抜き動画をダウンロード",
-                            data=f,
-                            file_name="trimmed_subtitled.mp4",
-                            mime="video/mp4",
+                    render_inputs = {
+                        "video_path": output_video_path,
+                        "segments": segments,
+                        "language": target_languages[0] if target_languages else None,
+                        "shot_boundaries": None,
+                        # アーティファクトストアのキーに使う元動画の内容全体のハッシュと切り抜き範囲
+                        "content_hash": st.session_state.get("uploaded_content_hash"),
+                        "trim_intervals": [
+                            [round(start, 3), round(end, 3)]
+                            for start, end in (
+                                trim_time_map.source_intervals
+                                if trim_time_map is not None
+                                else [(trim_start, trim_end)]
+                            )
+                        ],
+                    }
+                    if trim_time_map is not None:
+                        # シーンのつなぎ目もカットとして扱う
+                        render_inputs["shot_boundaries"] = trim_time_map.condensed_cut_points(shot_boundaries)
+                    elif shot_boundaries:
+                        render_inputs["shot_boundaries"] = ShotIndexService.boundaries_in_range(
+                            shot_boundaries,
+                            trim_start,
+                            trim_end,
                         )
+                    # 再レンダリング用に切り抜き動画を使用中にしておく
+                    previous_render_inputs = st.session_state.get("render_inputs")
+                    if previous_render_inputs:
+                        workspace.unpin(previous_render_inputs["video_path"])
+                    workspace.pin(output_video_path)
+                    st.session_state["render_inputs"] = render_inputs
+                    if len(translations) > 1:
+                        progress_text.text("複数言語版を出力中...")
+                        variant_paths = _render_language_variants(
+                            job,
+                            render_inputs,
+                            translations,
+                            subtitle_style,
+                            preview=preview_render,
+                        )
+                        progress_text.empty()
+                        displayed_paths = []
+                        for language, variant_path in variant_paths.items():
+                            displayed_paths += _show_subtitled_video(
+                                variant_path,
+                                preview=preview_render,
+                                language=language,
+                            )
+                    else:
+                        subtitle_output_path = _render_subtitled_video(
+                            job,
+                            render_inputs,
+                            subtitle_style,
+                            preview=preview_render,
+                        )
+                        displayed_paths = _show_subtitled_video(subtitle_output_path, preview=preview_render)
+                    # 配信中の動画がjob.finish()後に作業領域の上限で削除されないよう、次の出力まで使用中にしておく
+                    _pin_displayed_outputs(workspace, displayed_paths)
                     if trim_payload:
                         st.text_area(
                             "重要シーン抽出レスポンス",
@@ -352,14 +975,51 @@ def main():
                         value=json.dumps(transcribed, ensure_ascii=False, indent=2),
                         height=240,
                     )
-                    if translated:
+                    if trim_time_map is not None:
                         st.text_area(
-                            "翻訳レスポンス",
-                            value=json.dumps(translated, ensure_ascii=False, indent=2),
+                            "文字起こしレスポンス（元動画の時刻）",
+                            value=json.dumps(
+                                {"segments": trim_time_map.remap_to_source(transcribed.get("segments", []))},
+                                ensure_ascii=False,
+                                indent=2,
+                            ),
+                            height=240,
+                        )
+                    for language, translated_payload in translations.items():
+                        st.text_area(
+                            f"翻訳レスポンス（{language}）" if len(translations) > 1 else "翻訳レスポンス",
+                            value=json.dumps(translated_payload, ensure_ascii=False, indent=2),
                             height=240,
                         )
                 except Exception as e:
                     st.error(f"エラーが発生しました: {str(e)}")
+                finally:
+                    if job is not None:
+                        job.finish()
+
+        # 上流処理の結果を再利用して再レンダリング
+        render_inputs = st.session_state.get("render_inputs")
+        if render_inputs and os.path.exists(render_inputs["video_path"]):
+            preview_col, final_col = st.columns(2)
+            rerender_preview = preview_col.button("プレビューを再生成")
+            render_final = final_col.button("最終品質でレンダリング")
+            if rerender_preview or render_final:
+                rerender_as_preview = not render_final
+                with st.spinner("字幕付き動画を出力中..."):
+                    job = workspace.create_job("rerender")
+                    try:
+                        subtitle_output_path = _render_subtitled_video(
+                            job,
+                            render_inputs,
+                            subtitle_style,
+                            preview=rerender_as_preview,
+                        )
+                        displayed_paths = _show_subtitled_video(subtitle_output_path, preview=rerender_as_preview)
+                        _pin_displayed_outputs(workspace, displayed_paths)
+                    except Exception as e:
+                        st.error(f"エラーが発生しました: {str(e)}")
+                    finally:
+                        job.finish()
     
     else:
         # ファイルがアップロードされていない場合の表示
@@ -374,6 +1034,19 @@ def main():
             4. 結果を確認し、必要に応じてダウンロード
             """)
 
+    # 作業領域（中間ファイル）の使用状況
+    with st.sidebar.expander("作業領域の使用状況", expanded=False):
+        workspace_usage = workspace.usage()
+        for root_usage in workspace_usage["roots"]:
+            st.caption(
+                f"{root_usage['root']}: {root_usage['used_bytes'] / 1024 ** 2:.1f} MB"
+                f" / {root_usage['quota_bytes'] / 1024 ** 2:.0f} MB（{root_usage['file_count']}ファイル）"
+            )
+        st.caption(
+            f"実行中のジョブ: {workspace_usage['active_jobs']}件 / "
+            f"使用中のファイル: {workspace_usage['pinned_files']}件"
+        )
+
     # サイドバーにGitHubリンク
     st.sidebar.markdown("---")
     st.sidebar.markdown("[GitHubリポジトリ](https://github.com/yourusername/whisper-transcription)")
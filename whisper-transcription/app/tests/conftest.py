@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# アプリはappディレクトリをsys.pathに含めて実行する前提のため、テストでも同様にする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,61 @@
+"""
+TimeMapの時刻変換と、無音除去時の重要シーン抽出で不正なシーンを除くことのテスト
+"""
+
+import json
+
+from domain.entities.time_map import TimeMap
+from usecase.service.trim_video_service import TrimVideoService
+
+
+class _StubLLMClient:
+    def __init__(self, response: str):
+        self.response = response
+
+    def invoke(self, **kwargs) -> str:
+        return self.response
+
+
+class _StubLLMFactory:
+    def __init__(self, response: str):
+        self.response = response
+
+    def create_llm(self, **kwargs) -> _StubLLMClient:
+        return _StubLLMClient(self.response)
+
+
+def test_remap_to_source_skips_invalid_items():
+    time_map = TimeMap([(10.0, 20.0), (30.0, 40.0)])
+    remapped = time_map.remap_to_source([
+        {"start_time": "00:00:01.000", "end_time": "00:00:12.000", "text": "ok"},
+        {"start_time": "abc", "end_time": "00:00:02.000", "text": "bad"},
+        "not a segment",
+    ])
+    assert remapped == [{"start_time": "00:00:11.000", "end_time": "00:00:32.000", "text": "ok"}]
+
+
+def test_remap_to_condensed_skips_invalid_items():
+    time_map = TimeMap([(10.0, 20.0), (30.0, 40.0)])
+    remapped = time_map.remap_to_condensed([
+        {"start_time": "00:00:31.000", "end_time": "00:00:35.000", "text": "ok"},
+        {"start_time": "00:00:31.000", "end_time": "xyz", "text": "bad"},
+        None,
+    ])
+    assert remapped == [{"start_time": "00:00:11.000", "end_time": "00:00:15.000", "text": "ok"}]
+
+
+def test_extract_key_segments_with_silence_removal_drops_malformed_scene(tmp_path):
+    response = json.dumps({
+        "important_scenes": [
+            {"start_time": "abc", "end_time": "00:00:05.000"},
+            {"start_time": "00:00:02.000", "end_time": "00:00:08.000"},
+            "not a scene",
+        ],
+    })
+    service = TrimVideoService(_StubLLMFactory(response))
+    time_map = TimeMap([(0.0, 5.0), (20.0, 30.0)])
+
+    payload = service.extract_key_segments(str(tmp_path / "condensed.mp4"), time_map=time_map)
+
+    assert payload["important_scenes"] == [{"start_time": "00:00:02.000", "end_time": "00:00:23.000"}]
+    assert service._parse_scene_times(payload["important_scenes"]) == [(2.0, 23.0)]
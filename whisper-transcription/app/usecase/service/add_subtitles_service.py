@@ -2,14 +2,17 @@
 動画に字幕を追加するサービスクラス
 """
 
-import os
 import sys
-from typing import List, Dict, Optional
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip
-from moviepy.video.tools.subtitles import SubtitlesClip
+import time
+from typing import Callable, List, Dict, Optional
+import numpy as np
 # 実行時にはappディレクトリがsys.pathに含まれていることを前提とする
-from utli.time_utils import time_to_seconds
-from config import SubtitleConstants
+from utli.time_utils import time_to_seconds, try_time_to_seconds
+from utli.font_resolver import get_font_resolver
+from utli.frame_compositor import FrameCompositor
+from utli.metrics import get_metrics, record_encode_fps
+from utli.subtitle_raster import get_subtitle_raster_cache
+from config import ShotConstants, SubtitleConstants
 
 
 class AddSubtitlesService:
@@ -35,24 +38,30 @@ class AddSubtitlesService:
         self.stroke_color = stroke_color if stroke_color is not None else SubtitleConstants.SUBTITLE_DEFAULT_STROKE_COLOR
         self.stroke_width = stroke_width if stroke_width is not None else SubtitleConstants.SUBTITLE_DEFAULT_STROKE_WIDTH
     
-    def _get_font_path(self, language: Optional[str]) -> str:
+    def _get_font_path(self, language: Optional[str]) -> Optional[str]:
         """
-        macOS用のフォントパスを取得
+        字幕の言語に合ったフォントパスを取得（インストール済みフォントの索引から選ぶ）
 
         Args:
             language: 字幕の言語コード
 
         Returns:
-            フォントパス
+            フォントパス（見つからない場合はNone）
         """
-        if language == "ko":
-            korean_font_path = "/System/Library/Fonts/AppleSDGothicNeo.ttc"
-            if os.path.exists(korean_font_path):
-                return korean_font_path
-        japanese_font_path = "/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc"
-        if not os.path.exists(japanese_font_path):
-            japanese_font_path = "/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc"
-        return japanese_font_path
+        return get_font_resolver().resolve_font_path(language)
+
+    @staticmethod
+    def _probe_video(video_path: str) -> tuple[int, int, float, float]:
+        """動画の (横幅, 高さ, 長さ, fps) を取得する"""
+        # moviepyは読み込みが重いため、初回利用時にimportする
+        from moviepy import VideoFileClip
+
+        video = VideoFileClip(video_path)
+        try:
+            width, height = video.size
+            return width, height, video.duration, video.fps
+        finally:
+            video.close()
 
     @staticmethod
     def _format_subtitle_text(text: str) -> str:
@@ -65,11 +74,49 @@ class AddSubtitlesService:
                     return f"{text[:idx + 1]}\n{text[idx + 1:]}"
         return text
 
+    def _build_sprite_renderer(
+        self,
+        language: Optional[str],
+        video_width: int,
+        scale: float = 1.0,
+    ) -> Callable[[str], np.ndarray]:
+        """
+        字幕画像の生成関数を作成する
+
+        Args:
+            language: 字幕の言語コード
+            video_width: 出力動画の横幅
+            scale: フォントサイズ・ストローク幅の倍率（プレビュー時は縮小率）
+
+        Returns:
+            テキストを受け取りRGBAの字幕画像を返す関数
+        """
+        resolved = get_font_resolver().resolve_font(language)
+        font_path, font_index = resolved if resolved else (None, 0)
+        max_width = int(video_width * 0.9)
+        font_size = max(1, int(round(self.font_size * scale)))
+        stroke_width = self.stroke_width
+        if stroke_width > 0:
+            stroke_width = max(1, int(round(stroke_width * scale)))
+        # 同じテキスト・スタイルの字幕は一度だけ描画し、以降はキャッシュした画像を使い回す
+        raster_cache = get_subtitle_raster_cache()
+        return lambda txt: raster_cache.render(
+            txt,
+            font_path,
+            font_index,
+            font_size,
+            self.font_color,
+            self.stroke_color,
+            stroke_width,
+            max_width,
+        )
+
     @staticmethod
     def _normalize_subtitle_entries(
         entries: List[tuple[float, float, str]],
         video_duration: float,
         offset_seconds: float = 0.0,
+        shot_boundaries: Optional[List[float]] = None,
     ) -> List[tuple[float, float, str]]:
         if not entries:
             return []
@@ -86,6 +133,8 @@ class AddSubtitlesService:
                 end = min(video_duration, start + 0.2)
             if end <= start:
                 continue
+            if shot_boundaries:
+                start, end = AddSubtitlesService._avoid_shot_boundaries(start, end, shot_boundaries)
             normalized.append((start, end, text))
 
         normalized.sort(key=lambda item: (item[0], item[1]))
@@ -98,6 +147,27 @@ class AddSubtitlesService:
 
         return [item for item in normalized if item[1] > item[0]]
     
+    @staticmethod
+    def _avoid_shot_boundaries(
+        start: float,
+        end: float,
+        shot_boundaries: List[float],
+    ) -> tuple[float, float]:
+        """
+        字幕の開始直後・終了直前にあるショット境界に合わせて表示区間を詰める
+
+        境界をわずかにまたぐだけの字幕は、カットと同時に切り替わるように調整する。
+        """
+        tolerance = ShotConstants.SUBTITLE_SNAP_TOLERANCE_SECONDS
+        for boundary in shot_boundaries:
+            if not start < boundary < end:
+                continue
+            if boundary - start <= tolerance and end - boundary > tolerance:
+                start = boundary
+            elif end - boundary <= tolerance and boundary - start > tolerance:
+                end = boundary
+        return start, end
+
     def add_subtitles_to_video(
         self,
         video_path: str,
@@ -116,56 +186,19 @@ class AddSubtitlesService:
         """
         print("動画に字幕を追加中...", file=sys.stderr)
         
-        video = VideoFileClip(video_path)
+        width, height, _, fps = self._probe_video(video_path)
         
-        # 字幕リストを作成（((start, end), text)の形式）
-        subtitles = []
+        # 字幕リストを作成（(start, end, 字幕画像)の形式）
+        render_sprite = self._build_sprite_renderer(language, width)
+        overlays = []
         for item in timestamp_list:
             start_seconds = time_to_seconds(item["start"])
             end_seconds = time_to_seconds(item["end"])
             text = self._format_subtitle_text(item["text"])
-            subtitles.append(((start_seconds, end_seconds), text))
-        
-        font_path = self._get_font_path(language)
-        max_width = int(video.size[0] * 0.9)
-        generator = lambda txt: TextClip(
-            text=txt,
-            font=font_path,
-            font_size=self.font_size,
-            color=self.font_color,
-            stroke_color=self.stroke_color,
-            stroke_width=self.stroke_width,
-            method="caption",
-            text_align="center",
-            size=(max_width, None),
-        )
-        
-        subtitle_clips = SubtitlesClip(
-            subtitles,
-            make_textclip=generator
-        )
-        
-        # with_positionで位置を指定（set_positionの代替）
-        subtitle_clips = subtitle_clips.with_position(("center", "bottom"))
-        
-        # 動画と字幕を合成
-        final_video = CompositeVideoClip(
-            [video, subtitle_clips],
-            size=video.size
-        ).with_duration(video.duration)
-        
-        # 出力ファイルに書き込み
-        final_video.write_videofile(
-            output_path,
-            fps=video.fps,
-            codec='libx264',
-            audio_codec='aac',
-            logger=None
-        )
+            overlays.append((start_seconds, end_seconds, render_sprite(text)))
         
-        # リソースを解放
-        video.close()
-        final_video.close()
+        # 字幕がかかる行だけをフレーム上で合成し、そのままエンコードする
+        FrameCompositor(width, height, fps).composite(video_path, output_path, overlays)
         
         print(f"字幕付き動画を '{output_path}' に保存しました。", file=sys.stderr)
 
@@ -176,6 +209,8 @@ class AddSubtitlesService:
         trim_start_seconds: float,
         output_path: str,
         language: Optional[str] = None,
+        preview: bool = False,
+        shot_boundaries: Optional[List[float]] = None,
     ) -> None:
         """
         切り抜き後の動画に字幕を追加する
@@ -186,11 +221,121 @@ class AddSubtitlesService:
                 各要素は {"start_time": "00:02:19.000", "end_time": "00:02:24.000", "text": "テキスト"} の形式
             trim_start_seconds: 元動画での切り抜き開始秒
             output_path: 出力動画ファイルのパス
+            preview: Trueの場合は低解像度・低fps・高速プリセットでプレビューを出力する
+            shot_boundaries: 切り抜き後の動画でのショット境界（指定した場合は字幕がカットをまたがないように調整する）
         """
-        print("切り抜き動画に字幕を追加中...", file=sys.stderr)
+        with get_metrics().span("render", preview=str(preview).lower()):
+            print("切り抜き動画に字幕を追加中...", file=sys.stderr)
 
-        video = VideoFileClip(video_path)
+            width, height, duration, fps = self._probe_video(video_path)
+
+            scale = 1.0
+            preset = SubtitleConstants.FINAL_PRESET
+            video_filter = None
+            if preview:
+                scale = SubtitleConstants.PREVIEW_SCALE
+                fps = min(fps, SubtitleConstants.PREVIEW_MAX_FPS)
+                preset = SubtitleConstants.PREVIEW_PRESET
+                width = int(width * scale) // 2 * 2
+                height = int(height * scale) // 2 * 2
+                video_filter = f"scale={width}:{height}"
+
+            normalized = self._build_subtitle_entries(
+                segments,
+                trim_start_seconds,
+                duration,
+                shot_boundaries=shot_boundaries,
+            )
+            if not normalized:
+                raise ValueError("字幕用のセグメントが空です。")
+
+            render_sprite = self._build_sprite_renderer(language, width, scale)
+            overlays = [(start, end, render_sprite(text)) for start, end, text in normalized]
+
+            encode_start = time.time()
+            frame_count = FrameCompositor(width, height, fps).composite(
+                video_path,
+                output_path,
+                overlays,
+                video_filter=video_filter,
+                encode_args=["-c:v", "libx264", "-preset", preset],
+            )
+            record_encode_fps("render", frame_count, time.time() - encode_start)
+
+            print(f"字幕付き動画を '{output_path}' に保存しました。", file=sys.stderr)
+
+    def render_language_variants(
+        self,
+        video_path: str,
+        segments_by_language: Dict[str, List[Dict]],
+        output_paths: Dict[str, str],
+        preview: bool = False,
+        shot_boundaries: Optional[List[float]] = None,
+    ) -> None:
+        """
+        切り抜き後の動画を1回だけデコードし、言語ごとの字幕付き動画をまとめて出力する
+
+        1言語の場合と同じ字幕画像（FrameCompositor）を使い、デコードしたフレームを言語ごとのエンコーダに分配する。
+        そのため、同じスタイル設定ならフォント・折り返し・ストロークは選んだ言語数によらず同じになる。
+
+        Args:
+            video_path: 切り抜き済み動画ファイルのパス
+            segments_by_language: {言語コード: セグメントのリスト}
+                セグメントの時刻はvideo_pathの先頭を0とした時刻
+            output_paths: {言語コード: 出力動画ファイルのパス}
+            preview: Trueの場合は低解像度・低fps・高速プリセットで出力する
+            shot_boundaries: 切り抜き後の動画でのショット境界
+        """
+        languages = list(segments_by_language)
+        if not languages:
+            raise ValueError("字幕の言語が指定されていません。")
+        with get_metrics().span("render", preview=str(preview).lower(), mode="fanout") as span_attributes:
+            width, height, duration, fps = self._probe_video(video_path)
 
+            scale = 1.0
+            preset = SubtitleConstants.FINAL_PRESET
+            video_filter = None
+            if preview:
+                scale = SubtitleConstants.PREVIEW_SCALE
+                fps = min(fps, SubtitleConstants.PREVIEW_MAX_FPS)
+                preset = SubtitleConstants.PREVIEW_PRESET
+                width = int(width * scale) // 2 * 2
+                height = int(height * scale) // 2 * 2
+                video_filter = f"scale={width}:{height}"
+
+            outputs = []
+            for language in languages:
+                entries = self._build_subtitle_entries(
+                    segments_by_language[language],
+                    0.0,
+                    duration,
+                    shot_boundaries=shot_boundaries,
+                )
+                if not entries:
+                    raise ValueError(f"字幕用のセグメントが空です: {language}")
+                render_sprite = self._build_sprite_renderer(language, width, scale)
+                overlays = [(start, end, render_sprite(text)) for start, end, text in entries]
+                outputs.append((output_paths[language], overlays))
+
+            encode_start = time.time()
+            frame_count = FrameCompositor(width, height, fps).composite_many(
+                video_path,
+                outputs,
+                video_filter=video_filter,
+                encode_args=["-c:v", "libx264", "-preset", preset],
+            )
+            # 全言語分のフレーム数でエンコード速度を記録する
+            record_encode_fps("render_fanout", frame_count * len(languages), time.time() - encode_start)
+            span_attributes["languages"] = languages
+
+    def _build_subtitle_entries(
+        self,
+        segments: List[Dict],
+        trim_start_seconds: float,
+        video_duration: float,
+        shot_boundaries: Optional[List[float]] = None,
+    ) -> List[tuple[float, float, str]]:
+        """セグメントを切り抜き後の動画での (開始秒, 終了秒, 字幕テキスト) に変換する"""
         subtitles = []
         for item in segments:
             start_time = item.get("start_time")
@@ -199,52 +344,19 @@ class AddSubtitlesService:
             if not start_time or not end_time or not text:
                 continue
 
-            start_seconds = time_to_seconds(start_time) - trim_start_seconds
-            end_seconds = time_to_seconds(end_time) - trim_start_seconds
+            start_seconds = try_time_to_seconds(start_time)
+            end_seconds = try_time_to_seconds(end_time)
+            if start_seconds is None or end_seconds is None:
+                continue
+            start_seconds -= trim_start_seconds
+            end_seconds -= trim_start_seconds
 
             if end_seconds <= 0:
                 continue
             subtitles.append((start_seconds, end_seconds, text))
 
-        normalized = self._normalize_subtitle_entries(subtitles, video.duration)
-        if not normalized:
-            video.close()
-            raise ValueError("字幕用のセグメントが空です。")
-        subtitles = [((start, end), text) for start, end, text in normalized]
-
-        font_path = self._get_font_path(language)
-        max_width = int(video.size[0] * 0.9)
-        generator = lambda txt: TextClip(
-            text=txt,
-            font=font_path,
-            font_size=self.font_size,
-            color=self.font_color,
-            stroke_color=self.stroke_color,
-            stroke_width=self.stroke_width,
-            method="caption",
-            text_align="center",
-            size=(max_width, None),
-        )
-
-        subtitle_clips = SubtitlesClip(
+        return self._normalize_subtitle_entries(
             subtitles,
-            make_textclip=generator
+            video_duration,
+            shot_boundaries=shot_boundaries,
         )
-        subtitle_clips = subtitle_clips.with_position(("center", "bottom"))
-
-        final_video = CompositeVideoClip(
-            [video, subtitle_clips],
-            size=video.size
-        ).with_duration(video.duration)
-
-        final_video.write_videofile(
-            output_path,
-            fps=video.fps,
-            codec="libx264",
-            audio_codec="aac",
-            logger=None,
-        )
-
-        video.close()
-        final_video.close()
-        print(f"字幕付き動画を '{output_path}' に保存しました。", file=sys.stderr)
@@ -0,0 +1,182 @@
+"""
+重要シーンの候補区間をローカルでスコアリングするサービスクラス
+"""
+
+from typing import Any, Dict, List, Optional
+import numpy as np
+from config import CandidateConstants, SilenceConstants
+from utli.ffmpeg_utils import concat_intervals, probe_duration, read_audio_pcm, read_gray_frames
+from utli.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CandidateWindowService:
+    """固定長の窓を音量・発話密度・動き量でスコアリングし、上位の候補区間を提案するサービス"""
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        top_n: Optional[int] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            window_seconds: 窓の長さ（Noneの場合はCandidateConstants.WINDOW_SECONDSを使用）
+            top_n: 提案する候補区間の数（Noneの場合はCandidateConstants.TOP_Nを使用）
+        """
+        self.window_seconds = window_seconds if window_seconds is not None else CandidateConstants.WINDOW_SECONDS
+        self.top_n = top_n if top_n is not None else CandidateConstants.TOP_N
+
+    def propose_candidates(self, video_path: str) -> List[Dict[str, Any]]:
+        """
+        スコア上位の候補区間を時刻順で返す
+
+        Args:
+            video_path: 入力動画ファイルのパス
+
+        Returns:
+            候補区間のリスト
+                各要素は {"candidate_id": 0, "start_seconds": 0.0, "end_seconds": 10.0, "score": 1.2, ...} の形式
+        """
+        windows = self.score_windows(video_path)
+        top = sorted(windows, key=lambda item: item["score"], reverse=True)[: self.top_n]
+        top.sort(key=lambda item: item["start_seconds"])
+        for candidate_id, item in enumerate(top):
+            item["candidate_id"] = candidate_id
+        logger.info(f"candidate windows: total={len(windows)} proposed={len(top)}")
+        return top
+
+    def score_windows(self, video_path: str) -> List[Dict[str, Any]]:
+        """
+        全区間を固定長の窓に分割してスコアリングする
+
+        Args:
+            video_path: 入力動画ファイルのパス
+
+        Returns:
+            窓ごとの特徴量とスコアのリスト（時刻順）
+        """
+        duration = probe_duration(video_path)
+        window_count = max(1, int(np.ceil(duration / self.window_seconds)))
+
+        energy, speech_density = self._audio_features(video_path, window_count)
+        motion = self._motion_features(video_path, window_count)
+
+        score = (
+            CandidateConstants.ENERGY_WEIGHT * self._standardize(energy)
+            + CandidateConstants.SPEECH_WEIGHT * self._standardize(speech_density)
+            + CandidateConstants.MOTION_WEIGHT * self._standardize(motion)
+        )
+
+        starts = np.arange(window_count) * self.window_seconds
+        ends = np.minimum(starts + self.window_seconds, duration)
+        return [
+            {
+                "start_seconds": float(starts[idx]),
+                "end_seconds": float(ends[idx]),
+                "score": float(score[idx]),
+                "audio_energy": float(energy[idx]),
+                "speech_density": float(speech_density[idx]),
+                "motion": float(motion[idx]),
+            }
+            for idx in range(window_count)
+            if ends[idx] > starts[idx]
+        ]
+
+    def build_candidate_media(
+        self,
+        video_path: str,
+        candidates: List[Dict[str, Any]],
+        output_path: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        候補区間だけを縮小・低fpsで連結したLLM入力用メディアを作成する
+
+        Args:
+            video_path: 入力動画ファイルのパス
+            candidates: propose_candidatesの戻り値
+            output_path: 連結後メディアの出力パス
+
+        Returns:
+            候補区間ごとの連結後メディアでの開始・終了秒
+                各要素は {"candidate_id": 0, "start_seconds": 0.0, "end_seconds": 10.0} の形式
+        """
+        intervals = [(item["start_seconds"], item["end_seconds"]) for item in candidates]
+        concat_intervals(
+            video_path,
+            intervals,
+            output_path,
+            video_filter=(
+                f"scale={CandidateConstants.PREVIEW_WIDTH}:-2,"
+                f"fps={CandidateConstants.PREVIEW_FPS}"
+            ),
+            encode_args=[
+                "-c:v", "libx264", "-preset", "veryfast", "-crf", "32",
+                "-c:a", "aac", "-ac", "1", "-b:a", "48k",
+            ],
+        )
+        layout = []
+        offset = 0.0
+        for item in candidates:
+            length = item["end_seconds"] - item["start_seconds"]
+            layout.append({
+                "candidate_id": item["candidate_id"],
+                "start_seconds": offset,
+                "end_seconds": offset + length,
+            })
+            offset += length
+        return layout
+
+    def _audio_features(self, video_path: str, window_count: int) -> tuple[np.ndarray, np.ndarray]:
+        sample_rate = CandidateConstants.AUDIO_SAMPLE_RATE
+        hop = int(sample_rate * CandidateConstants.AUDIO_HOP_SECONDS)
+        audio = read_audio_pcm(video_path, sample_rate)
+        frame_count = len(audio) // hop
+        if frame_count == 0:
+            logger.warning("candidate windows: audio track is empty")
+            return np.zeros(window_count), np.zeros(window_count)
+
+        frames = audio[: frame_count * hop].reshape(frame_count, hop)
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        rms_db = 20.0 * np.log10(np.maximum(rms, 1e-6))
+        # 最大音量からSilenceConstants.TOP_DB以内のフレームを発話フレームとみなす
+        voiced = (rms_db > rms_db.max() - SilenceConstants.TOP_DB).astype(np.float64)
+
+        frame_times = np.arange(frame_count) * CandidateConstants.AUDIO_HOP_SECONDS
+        window_index = self._window_index(frame_times, window_count)
+        return (
+            self._window_mean(window_index, rms, window_count),
+            self._window_mean(window_index, voiced, window_count),
+        )
+
+    def _motion_features(self, video_path: str, window_count: int) -> np.ndarray:
+        frames = read_gray_frames(
+            video_path,
+            CandidateConstants.FRAME_WIDTH,
+            CandidateConstants.FRAME_HEIGHT,
+            CandidateConstants.FRAME_SAMPLE_FPS,
+        )
+        if len(frames) < 2:
+            return np.zeros(window_count)
+        diffs = np.abs(np.diff(frames.astype(np.int16), axis=0)).mean(axis=(1, 2))
+        frame_times = np.arange(1, len(frames)) / CandidateConstants.FRAME_SAMPLE_FPS
+        window_index = self._window_index(frame_times, window_count)
+        return self._window_mean(window_index, diffs, window_count)
+
+    def _window_index(self, times: np.ndarray, window_count: int) -> np.ndarray:
+        return np.minimum((times // self.window_seconds).astype(np.int64), window_count - 1)
+
+    @staticmethod
+    def _window_mean(window_index: np.ndarray, values: np.ndarray, window_count: int) -> np.ndarray:
+        sums = np.bincount(window_index, weights=values, minlength=window_count)
+        counts = np.bincount(window_index, minlength=window_count)
+        return sums / np.maximum(counts, 1)
+
+    @staticmethod
+    def _standardize(values: np.ndarray) -> np.ndarray:
+        std = values.std()
+        if std == 0:
+            return np.zeros_like(values, dtype=np.float64)
+        return (values - values.mean()) / std
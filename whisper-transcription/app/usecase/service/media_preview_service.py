@@ -0,0 +1,112 @@
+"""
+アップロード動画の軽量プレビュー（音声・波形）を作成・キャッシュするサービスクラス
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from config import CacheConstants, PreviewConstants
+from utli.ffmpeg_utils import encode_audio_preview, read_audio_pcm
+from utli.logger import get_logger
+from utli.media_hash import compute_media_hash
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class MediaPreviewService:
+    """元動画の代わりにブラウザへ送る小さな音声と、表示用の波形をメディアハッシュ単位で保存するサービス"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            cache_dir: プレビューの保存先（Noneの場合はCacheConstants.CACHE_DIR/media_previewを使用）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else CacheConstants.CACHE_DIR / "media_preview"
+
+    def get_audio_preview(self, media_path: str, media_hash: Optional[str] = None) -> str:
+        """
+        プレビュー用の音声ファイルのパスを返す（キャッシュがあればエンコードしない）
+
+        Args:
+            media_path: 入力メディアファイルのパス
+            media_hash: メディアハッシュ（Noneの場合は計算する）
+
+        Returns:
+            モノラル・低ビットレートのM4Aファイルのパス
+
+        Raises:
+            RuntimeError: 音声トラックがない・ffmpegが失敗した場合
+        """
+        media_hash = media_hash or compute_media_hash(media_path)
+        preview_path = self.cache_dir / f"{media_hash}{PreviewConstants.AUDIO_SUFFIX}"
+        if preview_path.exists():
+            return str(preview_path)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = preview_path.with_name(f"{media_hash}.{os.getpid()}.tmp{PreviewConstants.AUDIO_SUFFIX}")
+        with get_metrics().span("audio_preview"):
+            encode_audio_preview(
+                media_path,
+                str(temp_path),
+                PreviewConstants.AUDIO_SAMPLE_RATE,
+                PreviewConstants.AUDIO_BITRATE,
+            )
+        temp_path.replace(preview_path)
+        logger.info(
+            f"audio preview saved: path={preview_path} "
+            f"source_bytes={os.path.getsize(media_path)} preview_bytes={preview_path.stat().st_size}"
+        )
+        return str(preview_path)
+
+    def get_waveform(self, media_path: str, media_hash: Optional[str] = None) -> np.ndarray:
+        """
+        表示用に間引いた波形（区間ごとの最大振幅）を返す（キャッシュがあればデコードしない）
+
+        Args:
+            media_path: 入力メディアファイルのパス
+            media_hash: メディアハッシュ（Noneの場合は計算する）
+
+        Returns:
+            0〜1のfloat32配列（長さは最大PreviewConstants.WAVEFORM_POINTS。音声がない場合は空配列）
+        """
+        media_hash = media_hash or compute_media_hash(media_path)
+        waveform_path = self.cache_dir / f"{media_hash}_waveform.npy"
+        if waveform_path.exists():
+            return np.load(waveform_path)
+
+        with get_metrics().span("waveform"):
+            audio = read_audio_pcm(media_path, PreviewConstants.WAVEFORM_SAMPLE_RATE)
+            waveform = self.peak_envelope(audio, PreviewConstants.WAVEFORM_POINTS)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = waveform_path.with_suffix(".tmp.npy")
+        np.save(temp_path, waveform)
+        temp_path.replace(waveform_path)
+        logger.info(f"waveform saved: path={waveform_path} points={len(waveform)}")
+        return waveform
+
+    @staticmethod
+    def peak_envelope(audio: np.ndarray, points: int) -> np.ndarray:
+        """
+        音声を指定した点数に間引き、区間ごとの最大振幅を返す
+
+        Args:
+            audio: -1.0〜1.0のモノラル音声
+            points: 間引き後の点数
+
+        Returns:
+            0〜1のfloat32配列（音声がpointsより短い場合は音声の長さ）
+        """
+        if audio.size == 0:
+            return np.zeros(0, dtype=np.float32)
+        points = min(points, audio.size)
+        # 末尾の端数は最後の区間に含める
+        bucket_size = audio.size // points
+        peaks = np.abs(audio[: bucket_size * points]).reshape(points, bucket_size).max(axis=1)
+        remainder = audio[bucket_size * points:]
+        if remainder.size:
+            peaks[-1] = max(peaks[-1], float(np.abs(remainder).max()))
+        return peaks.astype(np.float32)
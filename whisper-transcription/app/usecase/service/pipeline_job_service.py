@@ -0,0 +1,325 @@
+"""
+HTTP APIから投入された動画をバックグラウンドで処理するジョブ管理サービスクラス
+main.pyの「動画処理開始」と同じ順序でサービスを呼び出し、結果ファイルをジョブごとに保持する
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from adapter.llm_factory import LLMFactory
+from adapter.workspace.workspace_manager import JobWorkspace, WorkspaceManager
+from config import ApiConstants
+from domain.entities.llm_provider import LLMProvider
+from domain.entities.time_map import TimeMap
+from usecase.service.add_subtitles_service import AddSubtitlesService
+from usecase.service.transcribe_video_service import TranscribeVideoService
+from usecase.service.translate_segments_service import TranslateSegmentsService
+from usecase.service.trim_video_service import TrimVideoService
+from utli.admission_controller import get_admission_controller
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+from utli.subtitle_file import build_srt
+
+logger = get_logger(__name__)
+
+# アドミッション制御（CPUスロット）を通すエンコードステージ
+_ENCODE_STAGES = {"trim", "render"}
+
+
+class PipelineJob:
+    """1本の動画の処理状態と結果ファイル"""
+
+    def __init__(
+        self,
+        job_id: str,
+        workspace: JobWorkspace,
+        media_path: str,
+        provider: LLMProvider,
+        target_languages: List[str],
+        trim_range: Optional[Tuple[float, float]] = None,
+        render: bool = True,
+    ):
+        """
+        初期化
+
+        Args:
+            job_id: ジョブID
+            workspace: 中間ファイル・結果ファイルを置く作業ディレクトリ
+            media_path: アップロードされた動画のパス
+            provider: 使用するLLMプロバイダー
+            target_languages: 翻訳先の言語のリスト（空の場合は翻訳しない）
+            trim_range: 手動の切り抜き範囲（Noneの場合はLLMで重要シーンを抽出する）
+            render: Falseの場合は字幕付き動画を出力しない（セグメントと字幕ファイルのみ）
+        """
+        self.job_id = job_id
+        self.workspace = workspace
+        self.media_path = media_path
+        self.provider = provider
+        self.target_languages = target_languages
+        self.trim_range = trim_range
+        self.render = render
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stage_durations: Dict[str, float] = {}
+        # {結果名: ファイルパス} 結果名は "segments.json", "subtitles/en.srt", "video/en.mp4" の形式
+        self.outputs: Dict[str, str] = {}
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ステータス応答用の辞書を返す"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "error": self.error,
+            "provider": self.provider.value,
+            "target_languages": self.target_languages,
+            "trim_range": list(self.trim_range) if self.trim_range else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stage_durations": dict(self.stage_durations),
+            "results": sorted(self.outputs),
+        }
+
+
+class PipelineJobService:
+    """ジョブをスレッドプールで実行し、ステージごとの同時実行数を制限するサービス"""
+
+    def __init__(
+        self,
+        workspace_manager: WorkspaceManager,
+        job_workers: int,
+        stage_concurrency: Dict[str, int],
+        max_retained_jobs: int,
+        llm_factory_builder: Callable[[LLMProvider], Any] = LLMFactory,
+    ):
+        """
+        初期化
+
+        Args:
+            workspace_manager: 作業領域（結果ファイルはジョブを破棄するまでピン留めする）
+            job_workers: 同時に実行するジョブ数
+            stage_concurrency: {ステージ名: 同時実行数}
+            max_retained_jobs: 保持する終了済みジョブ数
+            llm_factory_builder: プロバイダーからLLMファクトリを作る関数（ベンチマークでは偽のファクトリを渡す）
+        """
+        self.workspace_manager = workspace_manager
+        self.max_retained_jobs = max(1, max_retained_jobs)
+        self._llm_factory_builder = llm_factory_builder
+        self._llm_factories: Dict[LLMProvider, Any] = {}
+        self._stage_semaphores = {
+            stage: threading.BoundedSemaphore(max(1, limit))
+            for stage, limit in stage_concurrency.items()
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max(1, job_workers), thread_name_prefix="api-job")
+        self._jobs: "OrderedDict[str, PipelineJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create_upload_workspace(self) -> JobWorkspace:
+        """アップロードを書き込む作業ディレクトリを作成する（submitに渡すジョブの作業ディレクトリになる）"""
+        return self.workspace_manager.create_job("api")
+
+    def submit(
+        self,
+        workspace: JobWorkspace,
+        media_path: str,
+        provider: LLMProvider,
+        target_languages: List[str],
+        trim_range: Optional[Tuple[float, float]] = None,
+        render: bool = True,
+    ) -> PipelineJob:
+        """
+        ジョブを登録してバックグラウンドで実行する
+
+        Args:
+            workspace: create_upload_workspaceで作成した作業ディレクトリ
+            media_path: アップロードされた動画のパス
+            provider: 使用するLLMプロバイダー
+            target_languages: 翻訳先の言語のリスト
+            trim_range: 手動の切り抜き範囲
+            render: 字幕付き動画を出力する場合はTrue
+
+        Returns:
+            登録したPipelineJob
+        """
+        job = PipelineJob(
+            workspace.job_id,
+            workspace,
+            media_path,
+            provider,
+            list(dict.fromkeys(target_languages)),
+            trim_range=trim_range,
+            render=render,
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._evict_finished_jobs()
+        self._executor.submit(self._run, job)
+        get_metrics().inc("api_jobs_total", help_text="Jobs submitted through the HTTP API.", status="submitted")
+        logger.info(f"api job submitted: job_id={job.job_id} languages={job.target_languages} trim_range={trim_range}")
+        return job
+
+    def get(self, job_id: str) -> Optional[PipelineJob]:
+        """ジョブIDからジョブを取得する（破棄済み・存在しない場合はNone）"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def summary(self) -> Dict[str, int]:
+        """状態ごとのジョブ数を返す"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def _run(self, job: PipelineJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            self._run_pipeline(job)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.exception(f"api job failed: job_id={job.job_id} stage={job.stage}")
+            # LLMの例外はプロンプト全体を含むため、応答には先頭行だけを返す
+            job.error = (str(e).splitlines() or [type(e).__name__])[0]
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            # アップロード・中間ファイルは削除対象にし、結果ファイルだけを残す
+            job.workspace.finish()
+            get_metrics().inc("api_jobs_total", status=job.status)
+            logger.info(
+                f"api job finished: job_id={job.job_id} status={job.status} "
+                f"elapsed={job.finished_at - job.started_at:.2f}s"
+            )
+            self._evict_finished_jobs()
+
+    def _run_pipeline(self, job: PipelineJob) -> None:
+        llm_factory = self._get_llm_factory(job.provider)
+        trim_service = TrimVideoService(llm_factory)
+        trimmed_path = job.workspace.new_path(".mp4")
+
+        if job.trim_range:
+            with self._stage(job, "trim"):
+                trim_start, trim_end = trim_service.trim_by_range(
+                    job.media_path,
+                    job.trim_range[0],
+                    job.trim_range[1],
+                    trimmed_path,
+                )
+            time_map = TimeMap([(trim_start, trim_end)])
+        else:
+            with self._stage(job, "scene_extraction"):
+                payload = trim_service.extract_key_segments(job.media_path)
+            if not payload.get("important_scenes"):
+                raise ValueError("重要箇所が抽出されませんでした。")
+            with self._stage(job, "trim"):
+                if len(payload["important_scenes"]) > 1:
+                    time_map = trim_service.trim_by_scenes(job.media_path, payload, trimmed_path)
+                else:
+                    trim_start, trim_end = trim_service.trim_by_segments(job.media_path, payload, trimmed_path)
+                    time_map = TimeMap([(trim_start, trim_end)])
+
+        with self._stage(job, "transcribe"):
+            segments = TranscribeVideoService(llm_factory).transcribe(trimmed_path).get("segments", [])
+
+        tracks: Dict[str, List[Dict[str, Any]]] = {ApiConstants.SOURCE_TRACK: segments}
+        if job.target_languages:
+            with self._stage(job, "translate"):
+                translations = TranslateSegmentsService(llm_factory).translate_many(segments, job.target_languages)
+            for language in job.target_languages:
+                tracks[language] = translations[language].get("segments", segments)
+
+        self._write_output(job, "segments.json", ".json", json.dumps(
+            {
+                "segments": segments,
+                # 元動画の時刻に戻したセグメント（字幕の時刻は切り抜き後の動画の時刻）
+                "source_segments": time_map.remap_to_source(segments),
+                "trim_intervals": [[round(start, 3), round(end, 3)] for start, end in time_map.source_intervals],
+                "translations": {
+                    language: track for language, track in tracks.items() if language != ApiConstants.SOURCE_TRACK
+                },
+            },
+            ensure_ascii=False,
+        ))
+        for track, track_segments in tracks.items():
+            self._write_output(job, f"subtitles/{track}.srt", ".srt", build_srt(track_segments))
+
+        if not job.render:
+            return
+        # 翻訳する場合は翻訳先の言語ごとに、しない場合は原文の字幕で出力する
+        render_tracks = {
+            track: track_segments
+            for track, track_segments in tracks.items()
+            if track != ApiConstants.SOURCE_TRACK or not job.target_languages
+        }
+        output_paths = {track: job.workspace.new_path(".mp4") for track in render_tracks}
+        with self._stage(job, "render"):
+            subtitle_service = AddSubtitlesService()
+            if len(render_tracks) > 1:
+                subtitle_service.render_language_variants(trimmed_path, render_tracks, output_paths)
+            else:
+                track, track_segments = next(iter(render_tracks.items()))
+                subtitle_service.add_subtitles_to_trimmed_video(
+                    trimmed_path,
+                    track_segments,
+                    0.0,
+                    output_paths[track],
+                    language=None if track == ApiConstants.SOURCE_TRACK else track,
+                )
+        for track, output_path in output_paths.items():
+            self._add_output(job, f"video/{track}.mp4", output_path)
+
+    @contextmanager
+    def _stage(self, job: PipelineJob, stage: str) -> Iterator[None]:
+        """ステージの同時実行数の枠を確保してから実行し、所要時間を記録する"""
+        job.stage = stage
+        start_time = time.time()
+        semaphore = self._stage_semaphores.get(stage)
+        with semaphore if semaphore is not None else nullcontext():
+            admission = get_admission_controller().admit(stage) if stage in _ENCODE_STAGES else nullcontext()
+            with admission:
+                yield
+        job.stage_durations[stage] = round(time.time() - start_time, 3)
+
+    def _write_output(self, job: PipelineJob, name: str, suffix: str, content: str) -> None:
+        path = job.workspace.new_path(suffix, small=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._add_output(job, name, path)
+
+    def _add_output(self, job: PipelineJob, name: str, path: str) -> None:
+        # ジョブを破棄するまで作業領域の上限による削除から守る
+        self.workspace_manager.pin(path)
+        job.outputs[name] = path
+
+    def _get_llm_factory(self, provider: LLMProvider) -> Any:
+        with self._lock:
+            if provider not in self._llm_factories:
+                self._llm_factories[provider] = self._llm_factory_builder(provider)
+            return self._llm_factories[provider]
+
+    def _evict_finished_jobs(self) -> None:
+        """終了済みジョブが上限を超えたら、古いものから破棄して結果ファイルのピン留めを外す"""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.finished]
+            evicted = finished[: max(0, len(finished) - self.max_retained_jobs)]
+            for job in evicted:
+                del self._jobs[job.job_id]
+        for job in evicted:
+            for path in job.outputs.values():
+                self.workspace_manager.unpin(path)
+            logger.info(f"api job evicted: job_id={job.job_id}")
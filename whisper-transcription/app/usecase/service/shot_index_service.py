@@ -0,0 +1,151 @@
+"""
+ショット境界（カット）を検出・キャッシュするサービスクラス
+"""
+
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+from config import CacheConstants, ShotConstants
+from utli.ffmpeg_utils import iter_rgb_frame_batches
+from utli.logger import get_logger
+from utli.media_hash import compute_media_hash
+
+logger = get_logger(__name__)
+
+
+class ShotIndexService:
+    """縮小フレームの色ヒストグラム差分からショット境界を検出し、メディアハッシュ単位で保存するサービス"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            cache_dir: インデックスの保存先（Noneの場合はCacheConstants.CACHE_DIR/shot_indexを使用）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else CacheConstants.CACHE_DIR / "shot_index"
+
+    def get_shot_boundaries(self, video_path: str) -> List[float]:
+        """
+        ショット境界の時刻（秒）を返す（キャッシュがあればデコードしない）
+
+        Args:
+            video_path: 入力動画ファイルのパス
+
+        Returns:
+            ショット境界の時刻のリスト（昇順）
+        """
+        index_path = self.cache_dir / f"{compute_media_hash(video_path)}.npy"
+        if index_path.exists():
+            return np.load(index_path).astype(np.float64).tolist()
+
+        boundaries = self.detect_shot_boundaries(video_path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = index_path.with_suffix(".tmp.npy")
+        np.save(temp_path, boundaries.astype(np.float32))
+        temp_path.replace(index_path)
+        logger.info(f"shot index saved: path={index_path} boundaries={len(boundaries)}")
+        return boundaries.tolist()
+
+    def detect_shot_boundaries(self, video_path: str) -> np.ndarray:
+        """
+        縮小フレームをデコードしてショット境界を検出する
+
+        Args:
+            video_path: 入力動画ファイルのパス
+
+        Returns:
+            ショット境界の時刻（秒）の配列
+        """
+        scores = []
+        previous_histogram = None
+        for frames in iter_rgb_frame_batches(
+            video_path,
+            ShotConstants.FRAME_WIDTH,
+            ShotConstants.FRAME_HEIGHT,
+            ShotConstants.SAMPLE_FPS,
+        ):
+            histograms = self._color_histograms(frames)
+            if previous_histogram is not None:
+                histograms_with_previous = np.concatenate([previous_histogram[None], histograms])
+            else:
+                histograms_with_previous = histograms
+            # ヒストグラムの全変動距離（0〜1）を隣接フレーム間の差分スコアとする
+            scores.append(0.5 * np.abs(np.diff(histograms_with_previous, axis=0)).sum(axis=1))
+            previous_histogram = histograms[-1].copy()
+
+        if not scores:
+            return np.zeros(0)
+        diff_scores = np.concatenate(scores)
+        if diff_scores.size == 0:
+            return np.zeros(0)
+
+        threshold = max(
+            ShotConstants.MIN_THRESHOLD,
+            float(diff_scores.mean() + ShotConstants.ADAPTIVE_K * diff_scores.std()),
+        )
+        # diff_scores[i]はフレームiとi+1の差分なので、境界はフレームi+1の時刻
+        candidate_indices = np.flatnonzero(diff_scores > threshold)
+        boundaries = []
+        for idx in candidate_indices:
+            time_seconds = (idx + 1) / ShotConstants.SAMPLE_FPS
+            if boundaries and time_seconds - boundaries[-1] < ShotConstants.MIN_SHOT_SECONDS:
+                continue
+            boundaries.append(time_seconds)
+        return np.asarray(boundaries, dtype=np.float64)
+
+    @staticmethod
+    def boundaries_in_range(
+        boundaries: List[float],
+        start_seconds: float,
+        end_seconds: float,
+    ) -> List[float]:
+        """
+        切り抜き範囲内のショット境界を切り抜き後の時刻で返す
+
+        Args:
+            boundaries: 元動画でのショット境界
+            start_seconds: 切り抜き開始秒
+            end_seconds: 切り抜き終了秒
+        """
+        return [
+            boundary - start_seconds
+            for boundary in boundaries
+            if start_seconds < boundary < end_seconds
+        ]
+
+    @staticmethod
+    def _color_histograms(frames: np.ndarray) -> np.ndarray:
+        bins = ShotConstants.HISTOGRAM_BINS
+        shift = 8 - int(np.log2(bins))
+        quantized = (frames >> shift).astype(np.int64)
+        bin_index = (quantized[..., 0] * bins + quantized[..., 1]) * bins + quantized[..., 2]
+        frame_count = frames.shape[0]
+        bin_count = bins ** 3
+        offsets = (np.arange(frame_count) * bin_count)[:, None, None]
+        histograms = np.bincount(
+            (bin_index + offsets).ravel(),
+            minlength=frame_count * bin_count,
+        ).reshape(frame_count, bin_count)
+        pixels_per_frame = frames.shape[1] * frames.shape[2]
+        return histograms / pixels_per_frame
+
+
+def snap_to_boundary(seconds: float, boundaries: List[float], tolerance: float) -> float:
+    """
+    許容幅内に最も近いショット境界があればその時刻を返す
+
+    Args:
+        seconds: 対象の時刻
+        boundaries: ショット境界（昇順）
+        tolerance: 許容幅（秒）
+
+    Returns:
+        スナップ後の時刻（許容幅内に境界がない場合は元の時刻）
+    """
+    if not boundaries:
+        return seconds
+    nearest = min(boundaries, key=lambda boundary: abs(boundary - seconds))
+    if abs(nearest - seconds) <= tolerance:
+        return nearest
+    return seconds
@@ -0,0 +1,98 @@
+"""
+無音区間を除去したメディアを作成するサービスクラス
+"""
+
+from typing import List, Optional, Tuple
+from domain.entities.time_map import TimeMap
+from config import SilenceConstants
+from utli.ffmpeg_utils import concat_intervals
+from utli.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SilenceRemovalService:
+    """発話区間だけを連結したメディアと時刻対応表を作成するサービス"""
+
+    def __init__(
+        self,
+        top_db: Optional[float] = None,
+        padding_seconds: Optional[float] = None,
+        min_silence_seconds: Optional[float] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            top_db: 無音とみなす音量差（Noneの場合はSilenceConstants.TOP_DBを使用）
+            padding_seconds: 発話区間の前後の余白（Noneの場合はSilenceConstants.PADDING_SECONDSを使用）
+            min_silence_seconds: 除去する無音の最小長（Noneの場合はSilenceConstants.MIN_SILENCE_SECONDSを使用）
+        """
+        self.top_db = top_db if top_db is not None else SilenceConstants.TOP_DB
+        self.padding_seconds = (
+            padding_seconds if padding_seconds is not None else SilenceConstants.PADDING_SECONDS
+        )
+        self.min_silence_seconds = (
+            min_silence_seconds if min_silence_seconds is not None else SilenceConstants.MIN_SILENCE_SECONDS
+        )
+
+    def detect_speech_intervals(self, media_path: str) -> Tuple[List[Tuple[float, float]], float]:
+        """
+        発話区間（残す区間）のリストを検出する
+
+        Args:
+            media_path: 入力メディアファイルのパス
+
+        Returns:
+            (発話区間のリスト [(start, end), ...], メディアの長さ秒)
+        """
+        # librosaは読み込みが重いため、初回利用時にimportする
+        import librosa
+
+        sample_rate = SilenceConstants.SAMPLE_RATE
+        audio, _ = librosa.load(media_path, sr=sample_rate, mono=True)
+        duration = len(audio) / sample_rate
+        if duration <= 0:
+            return [], 0.0
+
+        raw_intervals = librosa.effects.split(audio, top_db=self.top_db)
+        keep: List[Tuple[float, float]] = []
+        for start_sample, end_sample in raw_intervals:
+            start = max(0.0, start_sample / sample_rate - self.padding_seconds)
+            end = min(duration, end_sample / sample_rate + self.padding_seconds)
+            if keep and start - keep[-1][1] < self.min_silence_seconds:
+                keep[-1] = (keep[-1][0], max(keep[-1][1], end))
+            else:
+                keep.append((start, end))
+        return keep, duration
+
+    def condense(self, media_path: str, output_path: str) -> Optional[TimeMap]:
+        """
+        無音区間を除去したメディアを作成する
+
+        Args:
+            media_path: 入力メディアファイルのパス
+            output_path: 連結後メディアの出力パス
+
+        Returns:
+            連結後メディアと元メディアの時刻対応表
+            （除去できる無音がほとんどない場合はメディアを作成せずNoneを返す）
+        """
+        keep, duration = self.detect_speech_intervals(media_path)
+        if not keep:
+            logger.info("silence removal skip: no speech detected")
+            return None
+        kept_seconds = sum(end - start for start, end in keep)
+        removed_ratio = 1.0 - kept_seconds / duration
+        logger.info(
+            "silence removal: intervals=%d kept=%.3fs duration=%.3fs removed_ratio=%.3f",
+            len(keep),
+            kept_seconds,
+            duration,
+            removed_ratio,
+        )
+        if removed_ratio < SilenceConstants.MIN_REMOVED_RATIO:
+            return None
+
+        concat_intervals(media_path, keep, output_path)
+        return TimeMap(keep)
@@ -3,9 +3,21 @@
 """
 
 import json
+import os
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from adapter.llm_factory import LLMFactory
+from domain.entities.llm_task import LLMTask
+from config import TranscriptionConstants
+from utli.ffmpeg_utils import extract_audio, probe_duration
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+from utli.segment_validation import MissingRange, salvage_json_objects, validate_segments
+from utli.time_utils import seconds_to_time, time_to_seconds
+from domain.entities.time_map import TimeMap
+
+logger = get_logger(__name__)
 
 
 class TranscribeVideoService:
@@ -14,24 +26,147 @@ class TranscribeVideoService:
     def __init__(self, llm_factory: LLMFactory):
         self.llm_factory = llm_factory
 
-    def transcribe(self, video_path: str) -> Dict[str, Any]:
+    def transcribe(self, video_path: str, time_map: Optional[TimeMap] = None) -> Dict[str, Any]:
         """
         動画を文字起こししてセグメントを返す
 
         Args:
             video_path: 入力動画ファイルのパス
+            time_map: video_pathが無音除去済みメディアの場合の元動画との時刻対応表
+                （指定した場合はセグメントを元動画の時刻に変換して返す）
+        """
+        with get_metrics().span("transcribe"):
+            payload = self._transcribe_media(video_path)
+            if time_map is not None and isinstance(payload.get("segments"), list):
+                payload["segments"] = time_map.remap_to_source(payload["segments"])
+            return payload
+
+    def transcribe_audio(self, media_path: str, audio_path: str) -> Dict[str, Any]:
         """
+        元動画全体の音声だけを文字起こしする（シーン抽出と並行して先読みするためのもの）
+
+        結果は元動画の時刻のため、切り抜き後にTimeMap.remap_to_condensedで切り抜き範囲に合わせて使う。
+
+        Args:
+            media_path: 元動画ファイルのパス
+            audio_path: 抽出した音声の出力先（拡張子はTranscriptionConstants.AUDIO_SUFFIX）
+        """
+        with get_metrics().span("transcribe", mode="speculative"):
+            extract_audio(
+                media_path,
+                audio_path,
+                TranscriptionConstants.AUDIO_SAMPLE_RATE,
+                TranscriptionConstants.AUDIO_BITRATE,
+            )
+            return self._transcribe_media(audio_path)
+
+    def _transcribe_media(self, media_path: str) -> Dict[str, Any]:
+        """
+        メディアを文字起こしし、欠落・不正なセグメントがあればその範囲だけを再リクエストして補う
+        """
+        payload = self._request_transcription(media_path)
+        truncated = bool(payload.pop("truncated", False))
+        segments = payload.get("segments")
+        if not isinstance(segments, list):
+            segments = []
+        try:
+            media_duration: Optional[float] = probe_duration(media_path)
+        except (RuntimeError, OSError, ValueError):
+            media_duration = None
+        validation = validate_segments(
+            segments,
+            media_duration=media_duration,
+            gap_seconds=TranscriptionConstants.RETRY_GAP_SECONDS,
+            tail_seconds=TranscriptionConstants.RETRY_TAIL_SECONDS,
+            truncated=truncated,
+        )
+        merged = list(validation.valid_segments)
+        missing_ranges = validation.missing_ranges[:TranscriptionConstants.MAX_RETRY_RANGES]
+        if missing_ranges:
+            merged.extend(self._retry_missing_ranges(media_path, missing_ranges))
+            merged.sort(key=lambda segment: time_to_seconds(segment["start_time"]))
+        payload["segments"] = merged
+        return payload
+
+    def _retry_missing_ranges(self, media_path: str, missing_ranges: List[MissingRange]) -> List[Dict[str, Any]]:
+        """
+        欠落範囲の音声だけを切り出して文字起こしし直す
+
+        Args:
+            media_path: 文字起こし対象のメディアファイルのパス
+            missing_ranges: 再リクエストする (開始秒, 終了秒) のリスト
+
+        Returns:
+            欠落範囲内のセグメント（時刻はmedia_pathの時刻）
+        """
+        padding = TranscriptionConstants.RETRY_PADDING_SECONDS
+        recovered: List[Dict[str, Any]] = []
+        with tempfile.TemporaryDirectory() as clip_dir:
+            for idx, (range_start, range_end) in enumerate(missing_ranges):
+                clip_start = max(0.0, range_start - padding)
+                clip_duration = None if range_end is None else range_end + padding - clip_start
+                clip_path = os.path.join(clip_dir, f"retry_{idx}{TranscriptionConstants.AUDIO_SUFFIX}")
+                try:
+                    extract_audio(
+                        media_path,
+                        clip_path,
+                        TranscriptionConstants.AUDIO_SAMPLE_RATE,
+                        TranscriptionConstants.AUDIO_BITRATE,
+                        start=clip_start,
+                        duration=clip_duration,
+                    )
+                    retry_payload = self._request_transcription(clip_path)
+                except Exception as e:
+                    # 再リクエストに失敗しても、最初の応答で得られたセグメントは使う
+                    logger.warning(
+                        "transcription retry failed: range=(%.3f, %s) error=%s",
+                        range_start,
+                        range_end,
+                        e,
+                    )
+                    continue
+                retry_segments = retry_payload.get("segments")
+                validation = validate_segments(retry_segments if isinstance(retry_segments, list) else [])
+                for segment in validation.valid_segments:
+                    start = time_to_seconds(segment["start_time"]) + clip_start
+                    end = time_to_seconds(segment["end_time"]) + clip_start
+                    # 余白部分で拾った前後のセグメントは最初の応答と重複するため除き、
+                    # 欠落範囲をまたぐものは範囲内に切り詰める
+                    midpoint = (start + end) / 2
+                    if midpoint <= range_start or (range_end is not None and midpoint >= range_end):
+                        continue
+                    start = max(start, range_start)
+                    end = end if range_end is None else min(end, range_end)
+                    recovered.append({
+                        **segment,
+                        "start_time": seconds_to_time(start),
+                        "end_time": seconds_to_time(end),
+                    })
+        get_metrics().inc(
+            "llm_partial_retries_total",
+            float(len(missing_ranges)),
+            help_text="Partial re-requests for missing or invalid LLM output.",
+            task="transcription",
+        )
+        logger.info(
+            "transcription retry: ranges=%d recovered_segments=%d",
+            len(missing_ranges),
+            len(recovered),
+        )
+        return recovered
+
+    def _request_transcription(self, media_path: str) -> Dict[str, Any]:
         system_prompt = self._load_system_prompt()
         user_prompt = self._load_user_prompt()
         json_schema = self._load_json_schema()
 
-        llm_client = self.llm_factory.create_llm()
+        llm_client = self.llm_factory.create_llm(task=LLMTask.TRANSCRIPTION, media_path=media_path)
         response_content = llm_client.invoke(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.2,
             json_schema=json_schema,
-            media_path=video_path,
+            media_path=media_path,
         )
         return self._parse_llm_response(response_content)
 
@@ -62,7 +197,15 @@ class TranscribeVideoService:
     def _parse_llm_response(self, llm_response: str | Dict[str, Any]) -> Dict[str, Any]:
         if isinstance(llm_response, str):
             stripped = self._strip_code_fences(llm_response).strip()
-            return self._normalize_payload(json.loads(stripped))
+            try:
+                return self._normalize_payload(json.loads(stripped))
+            except json.JSONDecodeError:
+                # 出力が途中で切れた場合は、閉じているセグメントだけを使い、残りは再リクエストする
+                segments = salvage_json_objects(stripped)
+                if not segments:
+                    raise
+                logger.warning("transcription response truncated: salvaged_segments=%d", len(segments))
+                return {"segments": segments, "truncated": True}
         return self._normalize_payload(llm_response)
 
     @staticmethod
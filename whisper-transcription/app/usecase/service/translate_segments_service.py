@@ -2,39 +2,253 @@
 文字起こしセグメントの翻訳サービスクラス
 """
 
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from adapter.llm_factory import LLMFactory
+from config import TranslationConstants
+from adapter.translation_memory.translation_memory import (
+    TranslationMemory,
+    get_translation_memory,
+    normalize_source_text,
+)
+from domain.entities.llm_task import LLMTask
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+from utli.segment_validation import salvage_json_objects
+
+logger = get_logger(__name__)
 
 
 class TranslateSegmentsService:
     """文字起こしセグメントを指定言語へ翻訳するサービス"""
 
-    def __init__(self, llm_factory: LLMFactory):
+    def __init__(self, llm_factory: LLMFactory, translation_memory: Optional[TranslationMemory] = None):
+        """
+        初期化
+
+        Args:
+            llm_factory: LLMファクトリ
+            translation_memory: 翻訳メモリ（Noneの場合はプロセス共通の翻訳メモリを使用。無効化されていれば使わない）
+        """
         self.llm_factory = llm_factory
+        self.translation_memory = translation_memory if translation_memory is not None else get_translation_memory()
 
     def translate(self, segments: List[Dict[str, Any]], target_language: str) -> Dict[str, Any]:
         """
         セグメントのtextを翻訳して返す
 
+        翻訳メモリが有効な場合は、メモリにある原文はLLMを呼ばずに埋め、残りだけをLLMで翻訳して保存する。
+
         Args:
             segments: 文字起こしセグメント
             target_language: 翻訳先の言語（例: "ja", "en"）
         """
-        system_prompt = self._load_system_prompt()
-        base_user_prompt = self._load_user_prompt()
-        user_prompt = self._build_user_prompt(base_user_prompt, segments, target_language)
-        json_schema = self._load_json_schema()
+        with get_metrics().span("translate", target_language=target_language) as span_attributes:
+            system_prompt = self._load_system_prompt()
+            base_user_prompt = self._load_user_prompt()
+            json_schema = self._load_json_schema()
+
+            if self.translation_memory is None:
+                translations_by_index = self._request_translation(
+                    system_prompt,
+                    base_user_prompt,
+                    json_schema,
+                    segments,
+                    target_language,
+                )
+                # タイムスタンプなどLLMに送らなかった項目は元のセグメントから付け直す
+                return {
+                    "segments": [
+                        {**segment, "text": translations_by_index[idx]}
+                        if idx in translations_by_index else dict(segment)
+                        for idx, segment in enumerate(segments)
+                    ]
+                }
+
+            prompt_version = self._prompt_version(system_prompt, base_user_prompt, json_schema)
+            source_keys = [normalize_source_text(str(segment.get("text") or "")) for segment in segments]
+            translations = self.translation_memory.lookup(
+                [key for key in source_keys if key],
+                target_language,
+                prompt_version,
+            )
+            hit_count = sum(1 for key in source_keys if key in translations)
+
+            # 同じ原文はジョブ内でも1回だけ翻訳する
+            first_index: Dict[str, int] = {}
+            for idx, key in enumerate(source_keys):
+                if key and key not in translations:
+                    first_index.setdefault(key, idx)
+            pending_keys = list(first_index)
+            if pending_keys:
+                pending_segments = [segments[first_index[key]] for key in pending_keys]
+                translations_by_index = self._request_translation(
+                    system_prompt,
+                    base_user_prompt,
+                    json_schema,
+                    pending_segments,
+                    target_language,
+                )
+                new_translations = {
+                    pending_keys[idx]: text
+                    for idx, text in translations_by_index.items()
+                }
+                self.translation_memory.store(new_translations, target_language, prompt_version)
+                translations.update(new_translations)
+
+            get_metrics().inc(
+                "translation_memory_segments_total",
+                float(hit_count),
+                help_text="Translated segments by translation memory result.",
+                result="hit",
+            )
+            get_metrics().inc(
+                "translation_memory_segments_total",
+                float(len(segments) - hit_count),
+                result="miss",
+            )
+            span_attributes["memory_hits"] = hit_count
+            span_attributes["llm_requested"] = len(pending_keys)
+            logger.info(
+                f"translation memory: segments={len(segments)} hits={hit_count} "
+                f"requested={len(pending_keys)} target_language={target_language}"
+            )
+            return {
+                "segments": [
+                    {**segment, "text": translations[key]} if key in translations else dict(segment)
+                    for segment, key in zip(segments, source_keys)
+                ],
+                "translation_memory": {"hits": hit_count, "requested": len(pending_keys)},
+            }
+
+    def translate_many(
+        self,
+        segments: List[Dict[str, Any]],
+        target_languages: List[str],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        同じセグメントを複数の言語へ並行して翻訳する
+
+        Args:
+            segments: 文字起こしセグメント
+            target_languages: 翻訳先の言語のリスト
 
-        llm_client = self.llm_factory.create_llm()
+        Returns:
+            {言語コード: translateの戻り値}
+        """
+        languages = list(dict.fromkeys(target_languages))
+        if not languages:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(languages), thread_name_prefix="translate") as executor:
+            futures = {
+                language: executor.submit(self.translate, segments, language)
+                for language in languages
+            }
+            return {language: future.result() for language, future in futures.items()}
+
+    def _request_translation(
+        self,
+        system_prompt: str,
+        base_user_prompt: str,
+        json_schema: Optional[dict],
+        segments: List[Dict[str, Any]],
+        target_language: str,
+    ) -> Dict[int, str]:
+        """
+        セグメントのtextをLLMで翻訳する（応答に含まれなかったセグメントだけを再リクエストする）
+
+        Returns:
+            {セグメントのインデックス(0始まり): 翻訳後のtext}（再リクエストしても返らなかったセグメントは含まない）
+        """
+        translations = self._invoke_translation(
+            system_prompt,
+            base_user_prompt,
+            json_schema,
+            segments,
+            target_language,
+        )
+        for _ in range(TranslationConstants.MAX_RETRY_ROUNDS):
+            missing = [
+                idx for idx, segment in enumerate(segments)
+                if idx not in translations and str(segment.get("text") or "").strip()
+            ]
+            if not missing:
+                break
+            get_metrics().inc(
+                "llm_partial_retries_total",
+                float(len(missing)),
+                help_text="Partial re-requests for missing or invalid LLM output.",
+                task="translation",
+            )
+            try:
+                retried = self._invoke_translation(
+                    system_prompt,
+                    base_user_prompt,
+                    json_schema,
+                    [segments[idx] for idx in missing],
+                    target_language,
+                )
+            except Exception as e:
+                # 再リクエストに失敗しても、最初の応答で得られた翻訳は使う
+                logger.warning(f"translation retry failed: missing={len(missing)} error={e}")
+                break
+            translations.update({missing[idx]: text for idx, text in retried.items()})
+            logger.info(f"translation retry: missing={len(missing)} recovered={len(retried)}")
+        return translations
+
+    def _invoke_translation(
+        self,
+        system_prompt: str,
+        base_user_prompt: str,
+        json_schema: Optional[dict],
+        segments: List[Dict[str, Any]],
+        target_language: str,
+    ) -> Dict[int, str]:
+        user_prompt = self._build_user_prompt(base_user_prompt, segments, target_language)
+        llm_client = self.llm_factory.create_llm(task=LLMTask.TRANSLATION, segment_count=len(segments))
         response_content = llm_client.invoke(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.2,
             json_schema=json_schema,
         )
-        return self._parse_llm_response(response_content)
+        return self._match_translations(len(segments), self._parse_llm_response(response_content))
+
+    @staticmethod
+    def _match_translations(segment_count: int, payload: Dict[str, Any]) -> Dict[int, str]:
+        """LLMの翻訳結果を、プロンプトで振った番号（1始まり）でセグメントに対応付ける"""
+        items = payload.get("translations", [])
+        if isinstance(items, dict):
+            # {"1": "..."} のように番号をキーにした形で返された場合も受け付ける
+            items = [{"id": key, "text": value} for key, value in items.items()]
+        translations: Dict[int, str] = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or not item.get("text"):
+                continue
+            try:
+                idx = int(item.get("id")) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < segment_count:
+                translations[idx] = str(item["text"])
+        if len(translations) != segment_count:
+            logger.warning(
+                f"translation count mismatch: requested={segment_count} "
+                f"returned={len(translations)}"
+            )
+        return translations
+
+    @staticmethod
+    def _prompt_version(system_prompt: str, base_user_prompt: str, json_schema: Optional[dict]) -> str:
+        """プロンプトが変わったら翻訳メモリを使い回さないように、プロンプトのハッシュをバージョンとする"""
+        digest = hashlib.sha256()
+        for part in (system_prompt, base_user_prompt, json.dumps(json_schema, sort_keys=True)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
 
     def _load_system_prompt(self) -> str:
         prompts_base_dir = Path(__file__).parent.parent / "prompts"
@@ -66,24 +280,36 @@ class TranslateSegmentsService:
         segments: List[Dict[str, Any]],
         target_language: str,
     ) -> str:
-        segments_json = json.dumps({"segments": segments}, ensure_ascii=False, indent=2)
+        # タイムスタンプは送らず、番号付きのテキストだけを1行ずつ並べる（改行は空白にまとめる）
+        numbered_lines = "\n".join(
+            f"{idx}\t{' '.join(str(segment.get('text') or '').split())}"
+            for idx, segment in enumerate(segments, start=1)
+        )
         return (
             f"{base_prompt}\n"
             f"翻訳先の言語: {target_language}\n"
-            "対象セグメント(JSON):\n"
-            f"{segments_json}"
+            "対象テキスト(番号<TAB>テキスト):\n"
+            f"{numbered_lines}"
         )
 
     def _parse_llm_response(self, llm_response: str | Dict[str, Any]) -> Dict[str, Any]:
         if isinstance(llm_response, str):
             stripped = self._strip_code_fences(llm_response).strip()
-            return self._normalize_payload(json.loads(stripped))
+            try:
+                return self._normalize_payload(json.loads(stripped))
+            except json.JSONDecodeError:
+                # 出力が途中で切れた場合は、閉じている要素だけを使い、残りは再リクエストする
+                translations = [item for item in salvage_json_objects(stripped) if "id" in item]
+                if not translations:
+                    raise
+                logger.warning(f"translation response truncated: salvaged={len(translations)}")
+                return {"translations": translations}
         return self._normalize_payload(llm_response)
 
     @staticmethod
     def _normalize_payload(payload: Dict[str, Any] | List[Dict[str, Any]]) -> Dict[str, Any]:
         if isinstance(payload, list):
-            return {"segments": payload}
+            return {"translations": payload}
         return payload
 
     @staticmethod
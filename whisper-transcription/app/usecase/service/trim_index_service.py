@@ -0,0 +1,172 @@
+"""
+手動切り抜き用のサムネイル・音量インデックスを作成・キャッシュするサービスクラス
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from config import CacheConstants, TrimIndexConstants
+from utli.ffmpeg_utils import read_audio_pcm, render_thumbnail_sheet
+from utli.logger import get_logger
+from utli.media_hash import compute_media_hash
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+
+class TrimIndexService:
+    """一定間隔のサムネイルのスプライトシートとRMS音量を、メディアハッシュ単位で保存するサービス"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            cache_dir: インデックスの保存先（Noneの場合はCacheConstants.CACHE_DIR/trim_indexを使用）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else CacheConstants.CACHE_DIR / "trim_index"
+
+    def get_thumbnail_sheet(
+        self,
+        video_path: str,
+        duration_seconds: float,
+        media_hash: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        サムネイルのスプライトシートを返す（キャッシュがあればデコードしない）
+
+        Args:
+            video_path: 入力動画ファイルのパス
+            duration_seconds: 動画の長さ（秒）
+            media_hash: メディアハッシュ（Noneの場合は計算する）
+
+        Returns:
+            {"path": 画像のパス, "interval_seconds": 間隔, "count": 枚数, "columns": 列数,
+             "tile_width": 1枚の横幅, "tile_height": 1枚の高さ} の形式
+        """
+        media_hash = media_hash or compute_media_hash(video_path)
+        sheet_path = self.cache_dir / f"{media_hash}_thumbnails.jpg"
+        meta_path = self.cache_dir / f"{media_hash}_thumbnails.json"
+        if sheet_path.exists() and meta_path.exists():
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+
+        interval_seconds = max(
+            TrimIndexConstants.MIN_THUMBNAIL_INTERVAL_SECONDS,
+            duration_seconds / TrimIndexConstants.MAX_THUMBNAILS,
+        )
+        # fpsフィルタは0秒と末尾の両方でフレームを出すため、1枚多く見積もる
+        count = int(duration_seconds // interval_seconds) + 1
+        columns = min(TrimIndexConstants.SHEET_COLUMNS, count)
+        rows = math.ceil(count / columns)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = sheet_path.with_name(f"{media_hash}.{os.getpid()}.tmp.jpg")
+        with get_metrics().span("thumbnail_sheet"):
+            render_thumbnail_sheet(
+                video_path,
+                str(temp_path),
+                interval_seconds,
+                TrimIndexConstants.THUMBNAIL_WIDTH,
+                TrimIndexConstants.THUMBNAIL_HEIGHT,
+                columns,
+                rows,
+            )
+        temp_path.replace(sheet_path)
+        meta = {
+            "path": str(sheet_path),
+            "interval_seconds": interval_seconds,
+            "count": count,
+            "columns": columns,
+            "tile_width": TrimIndexConstants.THUMBNAIL_WIDTH,
+            "tile_height": TrimIndexConstants.THUMBNAIL_HEIGHT,
+        }
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        logger.info(f"thumbnail sheet saved: path={sheet_path} count={count} interval={interval_seconds:.2f}s")
+        return meta
+
+    def get_rms_envelope(self, media_path: str, media_hash: Optional[str] = None) -> Tuple[np.ndarray, float]:
+        """
+        一定の長さごとのRMS音量を返す（キャッシュがあればデコードしない）
+
+        Args:
+            media_path: 入力メディアファイルのパス
+            media_hash: メディアハッシュ（Noneの場合は計算する）
+
+        Returns:
+            (0〜1のfloat32配列, 1点あたりの秒数)（音声がない場合は空配列）
+        """
+        media_hash = media_hash or compute_media_hash(media_path)
+        envelope_path = self.cache_dir / f"{media_hash}_rms.npz"
+        if envelope_path.exists():
+            with np.load(envelope_path) as cached:
+                return cached["envelope"], float(cached["seconds_per_point"])
+
+        sample_rate = TrimIndexConstants.ENVELOPE_SAMPLE_RATE
+        with get_metrics().span("rms_envelope"):
+            audio = read_audio_pcm(media_path, sample_rate)
+            window = max(
+                int(sample_rate * TrimIndexConstants.ENVELOPE_MIN_WINDOW_SECONDS),
+                math.ceil(audio.size / TrimIndexConstants.ENVELOPE_MAX_POINTS),
+            )
+            envelope = self.rms_envelope(audio, window)
+        seconds_per_point = window / sample_rate
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = envelope_path.with_suffix(".tmp.npz")
+        np.savez(temp_path, envelope=envelope, seconds_per_point=seconds_per_point)
+        temp_path.replace(envelope_path)
+        logger.info(f"rms envelope saved: path={envelope_path} points={len(envelope)}")
+        return envelope, seconds_per_point
+
+    @staticmethod
+    def thumbnail_index(sheet: Dict[str, Any], seconds: float) -> int:
+        """
+        指定した時刻に最も近いサムネイルの番号を返す
+
+        Args:
+            sheet: get_thumbnail_sheetの戻り値
+            seconds: 時刻（秒）
+        """
+        index = int(round(max(0.0, seconds) / sheet["interval_seconds"]))
+        return min(index, sheet["count"] - 1)
+
+    @staticmethod
+    def thumbnail_box(sheet: Dict[str, Any], index: int) -> Tuple[int, int, int, int]:
+        """
+        スプライトシート上のサムネイルの位置を返す
+
+        Args:
+            sheet: get_thumbnail_sheetの戻り値
+            index: サムネイルの番号
+
+        Returns:
+            PillowのImage.cropに渡す (left, top, right, bottom)
+        """
+        row, column = divmod(index, sheet["columns"])
+        left = column * sheet["tile_width"]
+        top = row * sheet["tile_height"]
+        return left, top, left + sheet["tile_width"], top + sheet["tile_height"]
+
+    @staticmethod
+    def rms_envelope(audio: np.ndarray, window: int) -> np.ndarray:
+        """
+        音声をwindowサンプルごとのRMS音量に変換する（最大値で0〜1に正規化する）
+
+        Args:
+            audio: -1.0〜1.0のモノラル音声
+            window: 1点あたりのサンプル数
+
+        Returns:
+            float32配列（末尾の端数も1点として含める）
+        """
+        if audio.size == 0:
+            return np.zeros(0, dtype=np.float32)
+        padded = np.zeros(math.ceil(audio.size / window) * window, dtype=np.float32)
+        padded[: audio.size] = audio
+        frames = padded.reshape(-1, window)
+        counts = np.full(frames.shape[0], window, dtype=np.float32)
+        counts[-1] = audio.size - window * (frames.shape[0] - 1)
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / counts)
+        peak = float(rms.max())
+        return (rms / peak if peak > 0 else rms).astype(np.float32)
@@ -3,13 +3,26 @@
 """
 
 import json
+import os
 import re
+import tempfile
+import time
+from bisect import bisect_right
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from moviepy import VideoFileClip
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from adapter.llm_factory import LLMFactory
-from utli.time_utils import time_to_seconds
+from domain.entities.llm_task import LLMTask
+from config import CandidateConstants, ShotConstants, StreamingConstants
+from domain.entities.time_map import TimeMap
+from usecase.service.shot_index_service import snap_to_boundary
+from utli.admission_controller import get_ffmpeg_threads
+from utli.ffmpeg_utils import concat_stream_copy, cut_stream_copy, probe_duration, probe_keyframe_times
+from utli.time_utils import seconds_to_time, try_time_to_seconds
 from utli.logger import get_logger
+from utli.metrics import get_metrics, record_encode_fps
+
+if TYPE_CHECKING:
+    from moviepy import VideoFileClip
 
 logger = get_logger(__name__)
 
@@ -20,40 +33,150 @@ class TrimVideoService:
     def __init__(self, llm_factory: LLMFactory):
         self.llm_factory = llm_factory
 
-    def extract_key_segments(self, video_path: str) -> Dict[str, Any]:
+    def extract_key_segments(
+        self,
+        video_path: str,
+        time_map: Optional[TimeMap] = None,
+    ) -> Dict[str, Any]:
         """
         動画から重要箇所のtime_stampを抽出する
 
         Args:
             video_path: 入力動画ファイルのパス
+            time_map: video_pathが無音除去済みメディアの場合の元動画との時刻対応表
+                （指定した場合はimportant_scenesを元動画の時刻に変換して返す）
 
         Returns:
             LLMレスポンス（dict）
         """
-        system_prompt = self._load_system_prompt()
-        user_prompt = self._load_user_prompt()
-        json_schema = self._load_json_schema()
-
-        llm_client = self.llm_factory.create_llm()
-        response_content = llm_client.invoke(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            temperature=0.2,
-            json_schema=json_schema,
-            media_path=video_path,
-        )
-        print("重要箇所のLLMレスポンス:", response_content)
-        if not response_content or not response_content.strip():
-            raise ValueError("LLMレスポンスが空です。")
-        payload = self._parse_llm_response(response_content)
-        payload["raw_response"] = response_content
-        return payload
+        with get_metrics().span("scene_extraction", mode="full"):
+            system_prompt = self._load_system_prompt()
+            user_prompt = self._load_user_prompt()
+            json_schema = self._load_json_schema()
+
+            llm_client = self.llm_factory.create_llm(task=LLMTask.SCENE_EXTRACTION, media_path=video_path)
+            response_content = llm_client.invoke(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=0.2,
+                json_schema=json_schema,
+                media_path=video_path,
+            )
+            if not response_content or not response_content.strip():
+                raise ValueError("LLMレスポンスが空です。")
+            payload = self._parse_llm_response(response_content)
+            if time_map is not None and isinstance(payload.get("important_scenes"), list):
+                payload["important_scenes"] = time_map.remap_to_source(payload["important_scenes"])
+            payload["raw_response"] = response_content
+            return payload
+
+    def rank_candidates(
+        self,
+        candidate_media_path: str,
+        candidates: List[Dict[str, Any]],
+        layout: List[Dict[str, Any]],
+        source_duration_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        ローカルで絞り込んだ候補区間の中から重要な区間をLLMに選ばせる
+
+        LLMは候補区間しか見ないため、元動画の長さに対する目標（CandidateConstants.TARGET_RATIO）は
+        選ぶ候補区間の個数と合計秒数に換算してプロンプトで指定する。
+
+        Args:
+            candidate_media_path: 候補区間だけを連結したメディアのパス
+            candidates: 候補区間のリスト（元動画での開始・終了秒）
+            layout: 候補区間ごとの連結後メディアでの開始・終了秒
+            source_duration_seconds: 元動画の長さ（Noneの場合は最後の候補区間の終了秒で代用する）
+
+        Returns:
+            LLMレスポンス（dict）
+                important_scenesは選ばれた候補区間を元動画の時刻で表したもの
+        """
+        with get_metrics().span("scene_extraction", mode="candidates"):
+            system_prompt = self._load_system_prompt("rank_candidates")
+            base_user_prompt = self._load_user_prompt("rank_candidates")
+            json_schema = self._load_json_schema("rank_candidates")
+            candidate_lines = "\n".join(
+                f"- candidate_id={item['candidate_id']}: "
+                f"{seconds_to_time(item['start_seconds'])} - {seconds_to_time(item['end_seconds'])}"
+                for item in layout
+            )
+            target_count, target_seconds = self._candidate_target(candidates, source_duration_seconds)
+            user_prompt = (
+                f"{base_user_prompt}\n"
+                f"選ぶ候補区間: {target_count}個程度（合計約{target_seconds:.0f}秒）\n"
+                f"候補区間(連結後動画での時刻):\n{candidate_lines}"
+            )
+
+            llm_client = self.llm_factory.create_llm(
+                task=LLMTask.CANDIDATE_RANKING,
+                media_path=candidate_media_path,
+            )
+            response_content = llm_client.invoke(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=0.2,
+                json_schema=json_schema,
+                media_path=candidate_media_path,
+            )
+            if not response_content or not response_content.strip():
+                raise ValueError("LLMレスポンスが空です。")
+            payload = self._parse_llm_response(response_content)
+
+            candidates_by_id = {item["candidate_id"]: item for item in candidates}
+            selected = sorted(
+                {
+                    candidate_id
+                    for candidate_id in payload.get("selected_candidate_ids", [])
+                    if candidate_id in candidates_by_id
+                },
+                key=lambda candidate_id: candidates_by_id[candidate_id]["start_seconds"],
+            )
+            if not selected:
+                raise ValueError("LLMレスポンスに有効なcandidate_idが含まれていません。")
+
+            # 隣接する候補区間はひとつのシーンにまとめる
+            scenes: List[tuple[float, float]] = []
+            for candidate_id in selected:
+                start = candidates_by_id[candidate_id]["start_seconds"]
+                end = candidates_by_id[candidate_id]["end_seconds"]
+                if scenes and start <= scenes[-1][1] + 1e-3:
+                    scenes[-1] = (scenes[-1][0], max(scenes[-1][1], end))
+                else:
+                    scenes.append((start, end))
+            payload["important_scenes"] = [
+                {"start_time": seconds_to_time(start), "end_time": seconds_to_time(end)}
+                for start, end in scenes
+            ]
+            payload["raw_response"] = response_content
+            return payload
+
+    @staticmethod
+    def _candidate_target(
+        candidates: List[Dict[str, Any]],
+        source_duration_seconds: Optional[float],
+    ) -> tuple[int, float]:
+        """
+        元動画の長さに対する目標の割合を、選ぶ候補区間の個数と合計秒数に換算する
+
+        Returns:
+            (個数, 合計秒数) 個数は1以上・候補区間の数以下
+        """
+        lengths = [item["end_seconds"] - item["start_seconds"] for item in candidates]
+        if source_duration_seconds is None:
+            source_duration_seconds = max(item["end_seconds"] for item in candidates)
+        target_seconds = min(source_duration_seconds * CandidateConstants.TARGET_RATIO, sum(lengths))
+        average_length = sum(lengths) / len(lengths)
+        target_count = min(len(candidates), max(1, round(target_seconds / average_length)))
+        return target_count, target_seconds
 
     def trim_by_segments(
         self,
         video_path: str,
         payload: Dict[str, Any],
         output_path: str,
+        shot_boundaries: Optional[List[float]] = None,
     ) -> tuple[float, float]:
         """
         先頭start_timeと末尾end_timeで動画を切り抜く
@@ -62,29 +185,98 @@ class TrimVideoService:
             video_path: 入力動画ファイルのパス
             payload: LLMレスポンス（dict）
             output_path: 出力動画ファイルのパス
+            shot_boundaries: 元動画のショット境界（指定した場合は近くの境界に切り抜き範囲をスナップする）
         """
-        scenes = payload.get("important_scenes", [])
-        if not scenes:
-            raise ValueError("LLMレスポンスにimportant_scenesが含まれていません。")
+        with get_metrics().span("trim", mode="segments"):
+            scenes = payload.get("important_scenes", [])
+            if not scenes:
+                raise ValueError("LLMレスポンスにimportant_scenesが含まれていません。")
 
-        start_seconds, end_seconds = self._resolve_trim_range(scenes)
+            start_seconds, end_seconds = self._resolve_trim_range(scenes, shot_boundaries)
 
-        video = VideoFileClip(video_path)
-        end_seconds = min(end_seconds, video.duration)
-        if end_seconds <= start_seconds:
+            # moviepyは読み込みが重いため、初回利用時にimportする
+            from moviepy import VideoFileClip
+
+            video = VideoFileClip(video_path)
+            end_seconds = min(end_seconds, video.duration)
+            if end_seconds <= start_seconds:
+                video.close()
+                raise ValueError("切り抜き範囲が不正です。")
+            trimmed = self._subclip(video, start_seconds, end_seconds)
+            encode_start = time.time()
+            trimmed.write_videofile(
+                output_path,
+                fps=video.fps,
+                codec="libx264",
+                audio_codec="aac",
+                threads=get_ffmpeg_threads(),
+                ffmpeg_params=StreamingConstants.FASTSTART_FFMPEG_PARAMS,
+                logger=None,
+            )
+            record_encode_fps("trim", trimmed.duration * video.fps, time.time() - encode_start)
+            trimmed.close()
             video.close()
-            raise ValueError("切り抜き範囲が不正です。")
-        trimmed = self._subclip(video, start_seconds, end_seconds)
-        trimmed.write_videofile(
-            output_path,
-            fps=video.fps,
-            codec="libx264",
-            audio_codec="aac",
-            logger=None,
-        )
-        trimmed.close()
-        video.close()
-        return start_seconds, end_seconds
+            return start_seconds, end_seconds
+
+    def trim_by_scenes(
+        self,
+        video_path: str,
+        payload: Dict[str, Any],
+        output_path: str,
+        shot_boundaries: Optional[List[float]] = None,
+    ) -> TimeMap:
+        """
+        複数の重要シーンをそれぞれ切り出し、ひとつの動画に連結する
+
+        各シーンは直前のキーフレームから再エンコードなしで切り出し、concat demuxerで連結する。
+
+        Args:
+            video_path: 入力動画ファイルのパス
+            payload: LLMレスポンス（dict）
+            output_path: 出力動画ファイルのパス
+            shot_boundaries: 元動画のショット境界（指定した場合は近くの境界に各シーンをスナップする）
+
+        Returns:
+            連結後の動画と元動画の時刻対応表
+        """
+        with get_metrics().span("trim", mode="scenes"):
+            scenes = payload.get("important_scenes", [])
+            if not scenes:
+                raise ValueError("LLMレスポンスにimportant_scenesが含まれていません。")
+
+            ranges = self._resolve_trim_ranges(scenes, shot_boundaries)
+            duration = probe_duration(video_path)
+            keyframes = probe_keyframe_times(video_path)
+
+            intervals: List[tuple[float, float]] = []
+            for start_seconds, end_seconds in ranges:
+                end_seconds = min(end_seconds, duration)
+                # ストリームコピーはキーフレームからしか開始できないため、直前のキーフレームに合わせる
+                keyframe_index = bisect_right(keyframes, start_seconds + 1e-3) - 1
+                if keyframe_index >= 0:
+                    start_seconds = keyframes[keyframe_index]
+                if end_seconds <= start_seconds:
+                    continue
+                if intervals and start_seconds <= intervals[-1][1]:
+                    intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end_seconds))
+                else:
+                    intervals.append((start_seconds, end_seconds))
+            if not intervals:
+                raise ValueError("切り抜き範囲が不正です。")
+
+            with tempfile.TemporaryDirectory() as part_dir:
+                part_paths = []
+                for idx, (start_seconds, end_seconds) in enumerate(intervals):
+                    part_path = os.path.join(part_dir, f"part_{idx:03d}.mp4")
+                    cut_stream_copy(video_path, start_seconds, end_seconds, part_path)
+                    part_paths.append(part_path)
+                concat_stream_copy(part_paths, output_path)
+
+            logger.info(
+                "trim by scenes: intervals=%s",
+                [(round(start, 3), round(end, 3)) for start, end in intervals],
+            )
+            return TimeMap(intervals)
 
     def trim_by_range(
         self,
@@ -102,41 +294,49 @@ class TrimVideoService:
             end_seconds: 切り抜き終了秒
             output_path: 出力動画ファイルのパス
         """
-        video = VideoFileClip(video_path)
-        start_seconds = max(0.0, start_seconds)
-        end_seconds = min(end_seconds, video.duration)
-        if end_seconds <= start_seconds:
+        with get_metrics().span("trim", mode="range"):
+            # moviepyは読み込みが重いため、初回利用時にimportする
+            from moviepy import VideoFileClip
+
+            video = VideoFileClip(video_path)
+            start_seconds = max(0.0, start_seconds)
+            end_seconds = min(end_seconds, video.duration)
+            if end_seconds <= start_seconds:
+                video.close()
+                raise ValueError("切り抜き範囲が不正です。")
+            trimmed = self._subclip(video, start_seconds, end_seconds)
+            encode_start = time.time()
+            trimmed.write_videofile(
+                output_path,
+                fps=video.fps,
+                codec="libx264",
+                audio_codec="aac",
+                threads=get_ffmpeg_threads(),
+                ffmpeg_params=StreamingConstants.FASTSTART_FFMPEG_PARAMS,
+                logger=None,
+            )
+            record_encode_fps("trim", trimmed.duration * video.fps, time.time() - encode_start)
+            trimmed.close()
             video.close()
-            raise ValueError("切り抜き範囲が不正です。")
-        trimmed = self._subclip(video, start_seconds, end_seconds)
-        trimmed.write_videofile(
-            output_path,
-            fps=video.fps,
-            codec="libx264",
-            audio_codec="aac",
-            logger=None,
-        )
-        trimmed.close()
-        video.close()
-        return start_seconds, end_seconds
+            return start_seconds, end_seconds
 
-    def _load_system_prompt(self) -> str:
+    def _load_system_prompt(self, prompt_name: str = "trim_video") -> str:
         prompts_base_dir = Path(__file__).parent.parent / "prompts"
-        prompt_file = prompts_base_dir / "trim_video" / "system_prompt.md"
+        prompt_file = prompts_base_dir / prompt_name / "system_prompt.md"
         if not prompt_file.exists():
             raise FileNotFoundError(f"プロンプトファイルが見つかりません: {prompt_file}")
         return prompt_file.read_text(encoding="utf-8").strip()
 
-    def _load_user_prompt(self) -> str:
+    def _load_user_prompt(self, prompt_name: str = "trim_video") -> str:
         prompts_base_dir = Path(__file__).parent.parent / "prompts"
-        prompt_file = prompts_base_dir / "trim_video" / "user_prompt.md"
+        prompt_file = prompts_base_dir / prompt_name / "user_prompt.md"
         if not prompt_file.exists():
             raise FileNotFoundError(f"プロンプトファイルが見つかりません: {prompt_file}")
         return prompt_file.read_text(encoding="utf-8").strip()
 
-    def _load_json_schema(self) -> Optional[dict]:
+    def _load_json_schema(self, prompt_name: str = "trim_video") -> Optional[dict]:
         prompts_base_dir = Path(__file__).parent.parent / "prompts"
-        schema_file = prompts_base_dir / "trim_video" / "json_schema.json"
+        schema_file = prompts_base_dir / prompt_name / "json_schema.json"
         if not schema_file.exists():
             return None
         content = schema_file.read_text(encoding="utf-8").strip()
@@ -180,16 +380,95 @@ class TrimVideoService:
         match = re.search(r"\{[\s\S]*\}|\[[\s\S]*\]", text)
         return match.group(0) if match else None
 
-    def _resolve_trim_range(self, scenes: List[Dict[str, Any]]) -> tuple[float, float]:
+    def _resolve_trim_range(
+        self,
+        scenes: List[Dict[str, Any]],
+        shot_boundaries: Optional[List[float]] = None,
+    ) -> tuple[float, float]:
+        times = self._parse_scene_times(scenes)
+
+        start_seconds = min(start for start, _ in times)
+        end_seconds = max(end for _, end in times)
+        if shot_boundaries:
+            start_seconds, end_seconds = self._snap_to_shots(start_seconds, end_seconds, shot_boundaries)
+        logger.info(
+            "trim range summary: start_seconds=%.3f end_seconds=%.3f items=%d",
+            start_seconds,
+            end_seconds,
+            len(times),
+        )
+        if end_seconds <= start_seconds:
+            raise ValueError("切り抜き範囲が不正です。")
+
+        return start_seconds, end_seconds
+
+    def _resolve_trim_ranges(
+        self,
+        scenes: List[Dict[str, Any]],
+        shot_boundaries: Optional[List[float]] = None,
+    ) -> List[tuple[float, float]]:
+        ranges = []
+        for start_seconds, end_seconds in sorted(self._parse_scene_times(scenes)):
+            if shot_boundaries:
+                start_seconds, end_seconds = self._snap_to_shots(start_seconds, end_seconds, shot_boundaries)
+            if end_seconds <= start_seconds:
+                logger.warning(
+                    "trim range skip: invalid range (start=%.3f, end=%.3f)",
+                    start_seconds,
+                    end_seconds,
+                )
+                continue
+            if ranges and start_seconds <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end_seconds))
+            else:
+                ranges.append((start_seconds, end_seconds))
+
+        if not ranges:
+            raise ValueError("切り抜き範囲が不正です。")
+        logger.info(
+            "trim ranges summary: ranges=%s items=%d",
+            [(round(start, 3), round(end, 3)) for start, end in ranges],
+            len(scenes),
+        )
+        return ranges
+
+    @staticmethod
+    def _snap_to_shots(
+        start_seconds: float,
+        end_seconds: float,
+        shot_boundaries: List[float],
+    ) -> tuple[float, float]:
+        tolerance = ShotConstants.TRIM_SNAP_TOLERANCE_SECONDS
+        snapped_start = snap_to_boundary(start_seconds, shot_boundaries, tolerance)
+        snapped_end = snap_to_boundary(end_seconds, shot_boundaries, tolerance)
+        if snapped_end <= snapped_start:
+            return start_seconds, end_seconds
+        logger.info(
+            "trim range snapped to shot boundaries: start=%.3f->%.3f end=%.3f->%.3f",
+            start_seconds,
+            snapped_start,
+            end_seconds,
+            snapped_end,
+        )
+        return snapped_start, snapped_end
+
+    def _parse_scene_times(self, scenes: List[Dict[str, Any]]) -> List[tuple[float, float]]:
         times = []
         for item in scenes:
+            if not isinstance(item, dict):
+                logger.warning(f"trim range skip: not a scene item={item!r}")
+                continue
             start_time = item.get("start_time")
             end_time = item.get("end_time")
             if not start_time or not end_time:
                 logger.warning(f"trim range skip: missing time (start={start_time}, end={end_time})")
                 continue
-            start_seconds = time_to_seconds(start_time)
-            end_seconds = time_to_seconds(end_time)
+            start_seconds = try_time_to_seconds(start_time)
+            end_seconds = try_time_to_seconds(end_time)
+            if start_seconds is None or end_seconds is None:
+                # 1件の不正な時刻でジョブ全体を止めず、そのシーンだけを除く
+                logger.warning(f"trim range skip: invalid time (start={start_time}, end={end_time})")
+                continue
             logger.info(
                 "trim range item: start_time=%s end_time=%s start_seconds=%.3f end_seconds=%.3f",
                 start_time,
@@ -201,21 +480,9 @@ class TrimVideoService:
 
         if not times:
             raise ValueError("start_time/end_timeが見つかりません。")
+        return times
 
-        start_seconds = min(start for start, _ in times)
-        end_seconds = max(end for _, end in times)
-        logger.info(
-            "trim range summary: start_seconds=%.3f end_seconds=%.3f items=%d",
-            start_seconds,
-            end_seconds,
-            len(times),
-        )
-        if end_seconds <= start_seconds:
-            raise ValueError("切り抜き範囲が不正です。")
-
-        return start_seconds, end_seconds
-
-    def _subclip(self, video: VideoFileClip, start_seconds: float, end_seconds: float) -> VideoFileClip:
+    def _subclip(self, video: "VideoFileClip", start_seconds: float, end_seconds: float) -> "VideoFileClip":
         if hasattr(video, "subclip"):
             return video.subclip(start_seconds, end_seconds)
         if hasattr(video, "subclipped"):
@@ -0,0 +1,180 @@
+"""
+エンコード処理（切り抜き・字幕レンダリング）の同時実行を制御するアドミッション制御
+CPUコア数から決めたスロットを各ジョブに割り当て、空きがない場合は到着順に待たせる
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Iterator, List, Optional
+
+from config import AdmissionConstants, Settings
+from utli.logger import get_logger
+from utli.metrics import get_metrics
+
+logger = get_logger(__name__)
+
+# 実行中のエンコード処理に割り当てたスレッド数（admit()の中でだけ設定される）
+_ffmpeg_threads: ContextVar[Optional[int]] = ContextVar("ffmpeg_threads", default=None)
+
+
+def get_ffmpeg_threads() -> Optional[int]:
+    """
+    実行中のエンコード処理に割り当てたスレッド数を取得する
+
+    Returns:
+        スレッド数（アドミッション制御の外で呼ばれた場合はNone）
+    """
+    return _ffmpeg_threads.get()
+
+
+def ffmpeg_thread_args() -> List[str]:
+    """
+    割り当てたスレッド数をffmpegの出力オプションとして返す
+
+    Returns:
+        ["-threads", "4"] の形式（アドミッション制御の外では空リスト）
+    """
+    threads = get_ffmpeg_threads()
+    return ["-threads", str(threads)] if threads else []
+
+
+class AdmissionController:
+    """CPUスロットの予算内でエンコード処理を到着順（FIFO）に実行させる"""
+
+    def __init__(self, total_slots: int, slots_per_job: int):
+        """
+        初期化
+
+        Args:
+            total_slots: プロセス全体のCPUスロット数
+            slots_per_job: 1ジョブに割り当てるスロット数（ffmpegのスレッド数になる）
+        """
+        self.total_slots = max(1, total_slots)
+        self.slots_per_job = max(1, min(slots_per_job, self.total_slots))
+        self._condition = threading.Condition()
+        self._free_slots = self.total_slots
+        self._queue: Deque[object] = deque()
+
+    @contextmanager
+    def admit(
+        self,
+        stage: str,
+        on_queue: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[int]:
+        """
+        スロットを確保してからブロック内の処理を実行する
+
+        Args:
+            stage: ステージ名（trim, renderなど）
+            on_queue: 待ち順が変わるたびに呼ばれる関数（引数は先頭を1とした待ち順）
+
+        Yields:
+            割り当てたスレッド数
+        """
+        ticket = object()
+        slots = self.slots_per_job
+        wait_start = time.time()
+        with self._condition:
+            self._queue.append(ticket)
+        try:
+            position = self._acquire_or_wait(ticket, slots, None)
+            while position is not None:
+                # on_queue（StreamlitのUI更新など）はロックの外で呼ぶ
+                if on_queue:
+                    on_queue(position)
+                position = self._acquire_or_wait(ticket, slots, position)
+        except BaseException:
+            # 待ちの途中で中断された場合（Streamlitの停止・再実行など）はチケットを取り除く
+            with self._condition:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._condition.notify_all()
+            raise
+        wait_seconds = time.time() - wait_start
+        metrics = get_metrics()
+        metrics.observe(
+            "admission_queue_wait_seconds",
+            wait_seconds,
+            help_text="Time spent waiting for CPU slots before an encode stage.",
+            stage=stage,
+        )
+        if wait_seconds >= AdmissionConstants.QUEUE_LOG_THRESHOLD_SECONDS:
+            logger.info("admission granted after wait: stage=%s wait=%.2fs threads=%d", stage, wait_seconds, slots)
+
+        token = _ffmpeg_threads.set(slots)
+        try:
+            yield slots
+        finally:
+            _ffmpeg_threads.reset(token)
+            with self._condition:
+                self._free_slots += slots
+                self._condition.notify_all()
+
+    def _acquire_or_wait(self, ticket: object, slots: int, position: Optional[int]) -> Optional[int]:
+        """
+        先頭かつ空きがあればスロットを確保する。確保できず待ち順も変わらない間はロックを持ったまま待つ
+
+        Args:
+            ticket: admit()で発行したチケット
+            slots: 確保するスロット数
+            position: 最後に通知した待ち順（未通知の場合はNone）
+
+        Returns:
+            確保できた場合はNone、待ち順が変わった場合は新しい待ち順
+        """
+        with self._condition:
+            while True:
+                if self._queue[0] is ticket and self._free_slots >= slots:
+                    self._queue.popleft()
+                    self._free_slots -= slots
+                    # 後続のチケットにも空きを確認させる
+                    self._condition.notify_all()
+                    return None
+                current_position = self._queue.index(ticket) + 1
+                if current_position != position:
+                    return current_position
+                self._condition.wait(timeout=AdmissionConstants.QUEUE_POLL_SECONDS)
+
+    def queue_length(self) -> int:
+        """スロット待ちのジョブ数を返す"""
+        with self._condition:
+            return len(self._queue)
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def _available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    プロセス共通のアドミッション制御を取得する
+
+    Returns:
+        AdmissionController
+    """
+    global _admission_controller
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            settings = Settings()
+            total_slots = settings.ADMISSION_CPU_SLOTS or _available_cores()
+            slots_per_job = settings.ADMISSION_THREADS_PER_JOB or max(
+                AdmissionConstants.MIN_THREADS_PER_JOB,
+                total_slots // AdmissionConstants.TARGET_CONCURRENT_JOBS,
+            )
+            _admission_controller = AdmissionController(total_slots, slots_per_job)
+            logger.info(
+                "admission controller: total_slots=%d slots_per_job=%d",
+                _admission_controller.total_slots,
+                _admission_controller.slots_per_job,
+            )
+        return _admission_controller
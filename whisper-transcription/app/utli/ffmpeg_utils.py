@@ -0,0 +1,456 @@
+"""
+FFmpeg関連のユーティリティ関数
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import StreamingConstants
+from utli.admission_controller import ffmpeg_thread_args
+
+
+@lru_cache(maxsize=1)
+def check_media_tools() -> Dict[str, bool]:
+    """
+    ffmpeg・ffprobeが使えるかを確認する（プロセスごとに1回だけ実行し、結果をキャッシュする）
+
+    Returns:
+        {"ffmpeg": True, "ffprobe": False} の形式
+    """
+    available = {}
+    for tool in ("ffmpeg", "ffprobe"):
+        tool_path = shutil.which(tool)
+        available[tool] = bool(tool_path) and subprocess.run(
+            [tool_path, "-version"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ).returncode == 0
+    return available
+
+
+def run_ffmpeg(args: List[str]) -> None:
+    """
+    ffmpegを実行する
+
+    Args:
+        args: "ffmpeg"以降の引数リスト
+
+    Raises:
+        RuntimeError: ffmpegが異常終了した場合
+    """
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        stderr_tail = result.stderr.strip()[-1000:]
+        raise RuntimeError(f"ffmpegの実行に失敗しました: {stderr_tail}")
+
+
+def run_ffmpeg_pipe(args: List[str]) -> bytes:
+    """
+    ffmpegを実行し、標準出力（pipe:1）のバイト列を返す
+
+    Args:
+        args: "ffmpeg"以降の引数リスト（出力先は"-"または"pipe:1"を指定する）
+
+    Raises:
+        RuntimeError: ffmpegが異常終了した場合
+    """
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", *args]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        stderr_tail = result.stderr.decode("utf-8", errors="replace").strip()[-1000:]
+        raise RuntimeError(f"ffmpegの実行に失敗しました: {stderr_tail}")
+    return result.stdout
+
+
+def probe_duration(media_path: str) -> float:
+    """
+    ffprobeでメディアの長さ（秒）を取得する
+
+    Args:
+        media_path: 入力メディアファイルのパス
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            media_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"ffprobeで長さを取得できませんでした: {media_path}")
+    return float(result.stdout.strip())
+
+
+def probe_keyframe_times(media_path: str) -> List[float]:
+    """
+    ffprobeで映像のキーフレーム時刻（秒）を取得する（キーフレームのみデコードする）
+
+    Args:
+        media_path: 入力メディアファイルのパス
+
+    Returns:
+        キーフレーム時刻のリスト（昇順）
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-skip_frame", "nokey",
+            "-show_entries", "frame=pts_time",
+            "-of", "csv=p=0",
+            media_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobeでキーフレームを取得できませんでした: {media_path}")
+    times = []
+    for line in result.stdout.splitlines():
+        value = line.strip().rstrip(",")
+        if value and value != "N/A":
+            times.append(float(value))
+    return sorted(times)
+
+
+def read_audio_pcm(media_path: str, sample_rate: int) -> np.ndarray:
+    """
+    音声をモノラルPCMとしてデコードする
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        sample_rate: デコード後のサンプリングレート
+
+    Returns:
+        -1.0〜1.0のfloat32配列（音声トラックがない場合は空配列）
+    """
+    try:
+        raw = run_ffmpeg_pipe([
+            "-i", media_path,
+            "-map", "0:a:0",
+            "-vn",
+            "-ac", "1",
+            "-ar", str(sample_rate),
+            "-f", "s16le",
+            "-",
+        ])
+    except RuntimeError:
+        return np.zeros(0, dtype=np.float32)
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def extract_audio(
+    media_path: str,
+    output_path: str,
+    sample_rate: int,
+    bitrate: str,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+) -> None:
+    """
+    音声だけをモノラルのAAC(ADTS)として書き出す（LLMへの送信量を減らすため）
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        output_path: 出力ファイルのパス（拡張子は.aac）
+        sample_rate: 出力のサンプリングレート
+        bitrate: 出力のビットレート（"48k"など）
+        start: 書き出す開始位置（秒）
+        duration: 書き出す長さ（秒。Noneの場合は末尾まで）
+    """
+    run_ffmpeg([
+        *(["-ss", f"{start:.3f}"] if start > 0 else []),
+        "-i", media_path,
+        *(["-t", f"{duration:.3f}"] if duration is not None else []),
+        "-map", "0:a:0",
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "aac",
+        "-b:a", bitrate,
+        "-f", "adts",
+        output_path,
+    ])
+
+
+def encode_audio_preview(media_path: str, output_path: str, sample_rate: int, bitrate: str) -> None:
+    """
+    ブラウザで再生するためのモノラル・低ビットレートのAAC(M4A)を書き出す
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        output_path: 出力ファイルのパス（拡張子は.m4a）
+        sample_rate: 出力のサンプリングレート
+        bitrate: 出力のビットレート（"32k"など）
+    """
+    run_ffmpeg([
+        "-i", media_path,
+        "-map", "0:a:0",
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "aac",
+        "-b:a", bitrate,
+        *StreamingConstants.FASTSTART_FFMPEG_PARAMS,
+        "-f", "mp4",
+        output_path,
+    ])
+
+
+def render_thumbnail_sheet(
+    media_path: str,
+    output_path: str,
+    interval_seconds: float,
+    width: int,
+    height: int,
+    columns: int,
+    rows: int,
+) -> None:
+    """
+    一定間隔のサムネイルを1回のデコードで並べた1枚の画像（スプライトシート）を書き出す
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        output_path: 出力画像のパス（.jpgなど）
+        interval_seconds: サムネイルの間隔（秒。i枚目はi * interval_secondsの時刻）
+        width: サムネイル1枚の横幅
+        height: サムネイル1枚の高さ
+        columns: 横に並べる枚数
+        rows: 縦に並べる枚数
+    """
+    run_ffmpeg([
+        "-i", media_path,
+        "-an",
+        "-vf", (
+            f"fps=1/{interval_seconds:.3f},"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+            f"tile={columns}x{rows}"
+        ),
+        "-frames:v", "1",
+        "-q:v", "5",
+        output_path,
+    ])
+
+
+def read_gray_frames(media_path: str, width: int, height: int, fps: float) -> np.ndarray:
+    """
+    縮小したグレースケールフレームをrawvideoパイプでデコードする
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        width: 縮小後の横幅
+        height: 縮小後の高さ
+        fps: サンプリングするfps
+
+    Returns:
+        (フレーム数, height, width) のuint8配列
+    """
+    raw = run_ffmpeg_pipe([
+        "-i", media_path,
+        "-an",
+        "-vf", f"fps={fps},scale={width}:{height}:flags=area",
+        "-pix_fmt", "gray",
+        "-f", "rawvideo",
+        "-",
+    ])
+    frame_size = width * height
+    frame_count = len(raw) // frame_size
+    return np.frombuffer(raw[:frame_count * frame_size], dtype=np.uint8).reshape(frame_count, height, width)
+
+
+def iter_rgb_frame_batches(
+    media_path: str,
+    width: int,
+    height: int,
+    fps: float,
+    batch_size: int = 256,
+) -> Iterator[np.ndarray]:
+    """
+    縮小したRGBフレームをrawvideoパイプから一定枚数ずつ読み出す
+
+    読み出し用のバッファは使い回すため、呼び出し側は次のバッチを要求する前に処理を終えること。
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        width: 縮小後の横幅
+        height: 縮小後の高さ
+        fps: サンプリングするfps
+        batch_size: 1バッチあたりのフレーム数
+
+    Yields:
+        (フレーム数, height, width, 3) のuint8配列
+    """
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", media_path,
+        "-an",
+        "-vf", f"fps={fps},scale={width}:{height}:flags=area",
+        "-pix_fmt", "rgb24",
+        "-f", "rawvideo",
+        "-",
+    ]
+    frame_size = width * height * 3
+    buffer = np.empty((batch_size, height, width, 3), dtype=np.uint8)
+    view = memoryview(buffer).cast("B")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    completed = False
+    try:
+        while True:
+            filled = 0
+            while filled < len(view):
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            frame_count = filled // frame_size
+            if frame_count:
+                yield buffer[:frame_count]
+            if filled < len(view):
+                break
+        completed = True
+    finally:
+        if not completed:
+            # 途中で読み出しを打ち切った場合はffmpegを停止する
+            process.kill()
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        process.stderr.close()
+        return_code = process.wait()
+    if return_code != 0:
+        raise RuntimeError(f"ffmpegの実行に失敗しました: {stderr.strip()[-1000:]}")
+
+
+def concat_intervals(
+    media_path: str,
+    intervals: List[Tuple[float, float]],
+    output_path: str,
+    video_filter: Optional[str] = None,
+    encode_args: Optional[List[str]] = None,
+) -> None:
+    """
+    concat demuxerで指定区間を連結する（区間の境界を正確にするため再エンコードする）
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        intervals: 連結する区間 [(start, end), ...]
+        output_path: 出力ファイルのパス
+        video_filter: 連結後に適用する映像フィルタ（縮小など）
+        encode_args: エンコード引数（Noneの場合は高速プリセットのH.264/AAC）
+    """
+    escaped_path = os.path.abspath(media_path).replace("'", "'\\''")
+    lines = []
+    for start, end in intervals:
+        lines.append(f"file '{escaped_path}'")
+        lines.append(f"inpoint {start:.3f}")
+        lines.append(f"outpoint {end:.3f}")
+    with tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt", encoding="utf-8") as list_file:
+        list_file.write("\n".join(lines) + "\n")
+        list_path = list_file.name
+    if encode_args is None:
+        encode_args = ["-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-c:a", "aac"]
+    try:
+        run_ffmpeg([
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-map", "0:v?",
+            "-map", "0:a?",
+            *(["-vf", video_filter] if video_filter else []),
+            *encode_args,
+            *ffmpeg_thread_args(),
+            output_path,
+        ])
+    finally:
+        os.unlink(list_path)
+
+
+def cut_stream_copy(media_path: str, start: float, end: float, output_path: str) -> None:
+    """
+    再エンコードせずに指定区間を切り出す（startはキーフレーム時刻を指定すること）
+
+    Args:
+        media_path: 入力メディアファイルのパス
+        start: 切り出し開始秒
+        end: 切り出し終了秒
+        output_path: 出力ファイルのパス
+    """
+    run_ffmpeg([
+        "-ss", f"{start:.3f}",
+        "-i", media_path,
+        "-t", f"{end - start:.3f}",
+        "-map", "0:v:0",
+        "-map", "0:a:0?",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        output_path,
+    ])
+
+
+def concat_stream_copy(part_paths: List[str], output_path: str) -> None:
+    """
+    同じコーデック設定のファイルをconcat demuxerで再エンコードせずに連結する
+
+    Args:
+        part_paths: 連結するファイルのパス（連結順）
+        output_path: 出力ファイルのパス
+    """
+    lines = []
+    for part_path in part_paths:
+        escaped_path = os.path.abspath(part_path).replace("'", "'\\''")
+        lines.append(f"file '{escaped_path}'")
+    with tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt", encoding="utf-8") as list_file:
+        list_file.write("\n".join(lines) + "\n")
+        list_path = list_file.name
+    try:
+        run_ffmpeg([
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-map", "0",
+            "-c", "copy",
+            *StreamingConstants.FASTSTART_FFMPEG_PARAMS,
+            output_path,
+        ])
+    finally:
+        os.unlink(list_path)
+
+
+def package_hls(input_path: str, output_dir: str) -> str:
+    """
+    mp4をHLS(fMP4セグメント)としてパッケージングする（再エンコードなし）
+
+    Args:
+        input_path: 入力動画ファイルのパス
+        output_dir: プレイリストとセグメントの出力ディレクトリ
+
+    Returns:
+        プレイリスト(m3u8)のパス
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    playlist_path = output / StreamingConstants.HLS_PLAYLIST_NAME
+    run_ffmpeg([
+        "-i", input_path,
+        "-map", "0",
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(StreamingConstants.HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", str(output / "segment_%05d.m4s"),
+        str(playlist_path),
+    ])
+    return str(playlist_path)
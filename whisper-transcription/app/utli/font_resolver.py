@@ -0,0 +1,197 @@
+"""
+インストール済みフォントを索引化し、字幕の言語に合うフォントを選ぶユーティリティ
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+from config import FontConstants, Settings
+from utli.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FontResolver:
+    """fc-list（使えない場合はフォントディレクトリの走査）で作った索引から言語ごとのフォントを選ぶ"""
+
+    def __init__(self, font_dirs: Optional[List[Path]] = None, index_path: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            font_dirs: 走査するフォントディレクトリ（Noneの場合はFontConstants.FONT_DIRSとSUBTITLE_FONT_DIRS）
+            index_path: 索引の保存先（Noneの場合はFontConstants.INDEX_PATH）
+        """
+        self.font_dirs = font_dirs if font_dirs is not None else [
+            *Settings().SUBTITLE_FONT_DIRS,
+            *FontConstants.FONT_DIRS,
+        ]
+        self.index_path = index_path or FontConstants.INDEX_PATH
+        self._lock = threading.Lock()
+        self._entries: Optional[List[Dict]] = None
+        self._resolved: Dict[str, Optional[Tuple[str, int]]] = {}
+
+    def resolve_font(self, language: Optional[str]) -> Optional[Tuple[str, int]]:
+        """
+        言語に合うフォントを返す
+
+        Args:
+            language: 字幕の言語コード（ja, ko, enなど。Noneの場合はFontConstants.DEFAULT_LANGUAGE）
+
+        Returns:
+            (フォントファイルのパス, フォントコレクション内のインデックス)（見つからない場合はNone）
+        """
+        language = language or FontConstants.DEFAULT_LANGUAGE
+        with self._lock:
+            if language not in self._resolved:
+                self._resolved[language] = self._select(self._load_entries(), language)
+                logger.info(f"font resolved: language={language} font={self._resolved[language]}")
+            return self._resolved[language]
+
+    def resolve_font_path(self, language: Optional[str]) -> Optional[str]:
+        """言語に合うフォントファイルのパスを返す（見つからない場合はNone）"""
+        font = self.resolve_font(language)
+        return font[0] if font else None
+
+    def _load_entries(self) -> List[Dict]:
+        if self._entries is not None:
+            return self._entries
+        signature = self._signature()
+        if self.index_path.exists():
+            try:
+                cached = json.loads(self.index_path.read_text(encoding="utf-8"))
+                if cached.get("signature") == signature:
+                    self._entries = cached["fonts"]
+                    return self._entries
+            except (OSError, ValueError, KeyError):
+                pass
+
+        entries = self._list_with_fontconfig()
+        if entries is None:
+            entries = self._scan_font_dirs()
+        self._entries = entries
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({"signature": signature, "fonts": entries}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        temp_path.replace(self.index_path)
+        logger.info(f"font index built: fonts={len(entries)} path={self.index_path}")
+        return entries
+
+    def _signature(self) -> List[List]:
+        # フォントの追加・削除でディレクトリの更新時刻が変わったら索引を作り直す
+        signature = []
+        for font_dir in self.font_dirs:
+            if not font_dir.is_dir():
+                continue
+            latest = 0.0
+            for root, _, _ in os.walk(font_dir):
+                latest = max(latest, os.stat(root).st_mtime)
+            signature.append([str(font_dir), latest])
+        return signature
+
+    @staticmethod
+    def _list_with_fontconfig() -> Optional[List[Dict]]:
+        if shutil.which("fc-list") is None:
+            return None
+        result = subprocess.run(
+            ["fc-list", "--format", "%{file}\t%{index}\t%{family}\t%{style}\t%{lang}\n"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        entries = []
+        for line in result.stdout.splitlines():
+            parts = line.split("\t")
+            if len(parts) != 5 or not parts[0].lower().endswith(FontConstants.FONT_EXTENSIONS):
+                continue
+            path, index, families, styles, languages = parts
+            entries.append({
+                "path": path,
+                "index": int(index or 0),
+                "families": [family.strip() for family in families.split(",") if family.strip()],
+                "style": styles.split(",")[0].strip(),
+                "languages": [language for language in languages.split("|") if language],
+            })
+        return entries
+
+    def _scan_font_dirs(self) -> List[Dict]:
+        entries = []
+        for font_dir in self.font_dirs:
+            if not font_dir.is_dir():
+                continue
+            for root, _, files in os.walk(font_dir):
+                for file_name in files:
+                    if not file_name.lower().endswith(FontConstants.FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, file_name)
+                    # フォントコレクション（.ttc）は含まれるフェイスをすべて登録する
+                    face_count = 16 if file_name.lower().endswith(".ttc") else 1
+                    for index in range(face_count):
+                        try:
+                            family, style = ImageFont.truetype(path, 12, index=index).getname()
+                        except OSError:
+                            break
+                        entries.append({
+                            "path": path,
+                            "index": index,
+                            "families": [family or os.path.splitext(file_name)[0]],
+                            "style": style or "",
+                            "languages": [],
+                        })
+        return entries
+
+    @staticmethod
+    def _select(entries: List[Dict], language: str) -> Optional[Tuple[str, int]]:
+        def style_rank(entry: Dict) -> int:
+            style = entry["style"].lower()
+            for rank, preferred in enumerate(FontConstants.PREFERRED_STYLES):
+                if preferred.lower() in style:
+                    return rank
+            return len(FontConstants.PREFERRED_STYLES)
+
+        for family in FontConstants.PREFERRED_FAMILIES.get(language, []):
+            matched = [
+                entry for entry in entries
+                if any(name.lower() == family.lower() for name in entry["families"])
+            ]
+            if matched:
+                best = min(matched, key=style_rank)
+                return best["path"], best["index"]
+
+        # 優先ファミリーがない場合はfontconfigの対応言語から選ぶ
+        covered = [entry for entry in entries if language in entry["languages"]]
+        if not covered and language == "en":
+            covered = entries
+        if covered:
+            best = min(covered, key=style_rank)
+            return best["path"], best["index"]
+        return None
+
+
+_font_resolver: Optional[FontResolver] = None
+_font_resolver_lock = threading.Lock()
+
+
+def get_font_resolver() -> FontResolver:
+    """
+    プロセス共通のフォントリゾルバを取得する
+
+    Returns:
+        FontResolver
+    """
+    global _font_resolver
+    with _font_resolver_lock:
+        if _font_resolver is None:
+            _font_resolver = FontResolver()
+        return _font_resolver
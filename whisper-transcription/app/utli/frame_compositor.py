@@ -0,0 +1,252 @@
+"""
+ffmpegのrawvideoパイプ上でフレームに字幕画像を合成するコンポジタ
+
+デコード側から読み出したフレームを使い回しのバッファに直接読み込み、字幕がかかる行だけを
+その場でアルファブレンドして、同じバッファをエンコード側に書き出す。
+複数の出力（言語ごとの字幕など）では1回のデコードを複数のエンコード側に分配する。
+"""
+
+import subprocess
+import tempfile
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import StreamingConstants
+from utli.admission_controller import ffmpeg_thread_args
+
+# (開始秒, 終了秒, RGBA画像)
+Overlay = Tuple[float, float, np.ndarray]
+
+
+class _BlendSprite:
+    """アルファブレンド用に前計算した字幕画像（字幕ごとに1回だけ作る）"""
+
+    def __init__(self, sprite: np.ndarray, frame_width: int, frame_height: int):
+        # フレームからはみ出す部分は切り捨てる
+        height = min(sprite.shape[0], frame_height)
+        width = min(sprite.shape[1], frame_width)
+        sprite = sprite[sprite.shape[0] - height:, (sprite.shape[1] - width) // 2:][:, :width]
+        alpha = sprite[:, :, 3:4].astype(np.uint32)
+        self.premultiplied = sprite[:, :, :3].astype(np.uint32) * alpha + 127
+        self.inverse_alpha = (255 - alpha).astype(np.uint16)
+        # 画面下端・中央に配置する
+        self.top = frame_height - height
+        self.left = (frame_width - width) // 2
+        self.rows = slice(self.top, frame_height)
+        self.cols = slice(self.left, self.left + width)
+        self.shape = (height, width, 3)
+
+
+class _OverlayTrack:
+    """1出力分の字幕画像を時刻順に有効化・無効化する"""
+
+    def __init__(self, overlays: List[Overlay]):
+        self._overlays = sorted(overlays, key=lambda item: item[0])
+        self._next = 0
+        self._active: List[Overlay] = []
+
+    def active_at(self, timestamp: float) -> List[Overlay]:
+        """指定した時刻に表示する字幕画像を返す（時刻は単調増加で呼ぶ）"""
+        while self._next < len(self._overlays) and self._overlays[self._next][0] <= timestamp:
+            self._active.append(self._overlays[self._next])
+            self._next += 1
+        if self._active:
+            self._active = [overlay for overlay in self._active if overlay[1] > timestamp]
+        return self._active
+
+
+class FrameCompositor:
+    """ffmpegのデコード・エンコードパイプの間で字幕画像を合成する"""
+
+    def __init__(self, width: int, height: int, fps: float):
+        """
+        初期化
+
+        Args:
+            width: 合成するフレームの横幅（デコード側の出力サイズ）
+            height: 合成するフレームの高さ
+            fps: 出力のfps
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._frame = np.empty((height, width, 3), dtype=np.uint8)
+        self._frame_view = memoryview(self._frame).cast("B")
+        # 複数出力の場合に、最後以外の出力で合成に使うバッファ（デコードしたフレームを残すため）
+        self._work_frame: Optional[np.ndarray] = None
+        self._work_view: Optional[memoryview] = None
+        # ブレンド計算用の作業領域（字幕領域の最大サイズ分を確保し、部分ビューを使う）
+        self._scratch = np.empty((height, width, 3), dtype=np.uint32)
+        self._sprites: Dict[int, _BlendSprite] = {}
+
+    def composite(
+        self,
+        video_path: str,
+        output_path: str,
+        overlays: List[Overlay],
+        video_filter: Optional[str] = None,
+        encode_args: Optional[List[str]] = None,
+    ) -> int:
+        """
+        動画をデコードし、表示区間内のフレームに字幕画像を合成してエンコードする
+
+        Args:
+            video_path: 入力動画ファイルのパス（音声はそのままAACで出力する）
+            output_path: 出力動画ファイルのパス
+            overlays: (開始秒, 終了秒, RGBA画像) のリスト
+            video_filter: デコード時に適用する映像フィルタ（縮小など。fpsは自動で揃える）
+                出力サイズは初期化時のwidth, heightと一致させること
+            encode_args: 映像エンコードの引数（Noneの場合はlibx264の既定設定）
+
+        Returns:
+            エンコードしたフレーム数
+
+        Raises:
+            RuntimeError: ffmpegが異常終了した場合
+        """
+        return self.composite_many(
+            video_path,
+            [(output_path, overlays)],
+            video_filter=video_filter,
+            encode_args=encode_args,
+        )
+
+    def composite_many(
+        self,
+        video_path: str,
+        outputs: List[Tuple[str, List[Overlay]]],
+        video_filter: Optional[str] = None,
+        encode_args: Optional[List[str]] = None,
+    ) -> int:
+        """
+        動画を1回だけデコードし、出力ごとに異なる字幕画像を合成してそれぞれエンコードする
+
+        Args:
+            video_path: 入力動画ファイルのパス（音声はそのままAACで出力する）
+            outputs: (出力動画ファイルのパス, 字幕画像のリスト) のリスト
+            video_filter: デコード時に適用する映像フィルタ（composite()と同じ）
+            encode_args: 映像エンコードの引数（全出力で共通）
+
+        Returns:
+            1出力あたりのエンコードしたフレーム数
+
+        Raises:
+            RuntimeError: ffmpegが異常終了した場合
+        """
+        if not outputs:
+            raise ValueError("出力が指定されていません。")
+        tracks = [_OverlayTrack(overlays) for _, overlays in outputs]
+        if len(outputs) > 1 and self._work_frame is None:
+            self._work_frame = np.empty_like(self._frame)
+            self._work_view = memoryview(self._work_frame).cast("B")
+        # 前計算は呼び出しごとに作り直す（字幕画像はoverlaysが参照を保持している間だけ有効）
+        self._sprites = {}
+        # 時刻とフレーム番号を対応させるため、デコード側で固定fpsに揃える
+        filters = [video_filter] if video_filter else []
+        filters.append(f"fps={self.fps}")
+        decode_command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            *ffmpeg_thread_args(),
+            "-i", video_path,
+            "-an",
+            "-vf", ",".join(filters),
+            "-pix_fmt", "rgb24",
+            "-f", "rawvideo",
+            "-",
+        ]
+        encode_commands = [
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "rawvideo",
+                "-pix_fmt", "rgb24",
+                "-s", f"{self.width}x{self.height}",
+                "-r", f"{self.fps}",
+                "-i", "-",
+                "-i", video_path,
+                "-map", "0:v",
+                "-map", "1:a?",
+                *(encode_args or ["-c:v", "libx264"]),
+                *ffmpeg_thread_args(),
+                "-pix_fmt", "yuv420p",
+                "-c:a", "aac",
+                "-shortest",
+                *StreamingConstants.FASTSTART_FFMPEG_PARAMS,
+                output_path,
+            ]
+            for output_path, _ in outputs
+        ]
+
+        frame_count = 0
+        last_index = len(outputs) - 1
+        # stderrはパイプにすると詰まる可能性があるため一時ファイルに逃がす
+        with ExitStack() as stack:
+            decode_log = stack.enter_context(tempfile.TemporaryFile())
+            encode_logs = [stack.enter_context(tempfile.TemporaryFile()) for _ in outputs]
+            decoder = subprocess.Popen(decode_command, stdout=subprocess.PIPE, stderr=decode_log)
+            encoders = [
+                subprocess.Popen(command, stdin=subprocess.PIPE, stderr=log)
+                for command, log in zip(encode_commands, encode_logs)
+            ]
+            completed = False
+            try:
+                while self._read_frame(decoder.stdout):
+                    timestamp = frame_count / self.fps
+                    for idx, (encoder, track) in enumerate(zip(encoders, tracks)):
+                        active = track.active_at(timestamp)
+                        frame, frame_view = self._frame, self._frame_view
+                        if active and idx != last_index:
+                            # 後続の出力のためにデコードしたフレームを残し、コピー上で合成する
+                            frame, frame_view = self._work_frame, self._work_view
+                            np.copyto(frame, self._frame)
+                        for _, _, sprite in active:
+                            self._blend(frame, sprite)
+                        encoder.stdin.write(frame_view)
+                    frame_count += 1
+                completed = True
+            finally:
+                if not completed:
+                    decoder.kill()
+                decoder.stdout.close()
+                decode_code = decoder.wait()
+                encode_codes = []
+                for encoder in encoders:
+                    try:
+                        encoder.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    encode_codes.append(encoder.wait())
+            results = [("デコード", decode_code, decode_log)]
+            results += [("エンコード", code, log) for code, log in zip(encode_codes, encode_logs)]
+            for name, code, log in results:
+                if code != 0:
+                    log.seek(0)
+                    stderr_tail = log.read().decode("utf-8", errors="replace").strip()[-1000:]
+                    raise RuntimeError(f"ffmpegの実行に失敗しました（{name}）: {stderr_tail}")
+        return frame_count
+
+    def _read_frame(self, stream) -> bool:
+        """1フレーム分をバッファに読み込む（ストリーム終端ではFalseを返す）"""
+        filled = 0
+        while filled < len(self._frame_view):
+            read = stream.readinto(self._frame_view[filled:])
+            if not read:
+                return False
+            filled += read
+        return True
+
+    def _blend(self, frame: np.ndarray, sprite: np.ndarray) -> None:
+        """字幕画像がかかる領域だけをフレーム上でアルファブレンドする"""
+        blend = self._sprites.get(id(sprite))
+        if blend is None:
+            blend = _BlendSprite(sprite, self.width, self.height)
+            self._sprites[id(sprite)] = blend
+        region = frame[blend.rows, blend.cols]
+        height, width, _ = blend.shape
+        scratch = self._scratch[:height, :width]
+        # dst = (dst * (255 - a) + src * a + 127) // 255
+        np.multiply(region, blend.inverse_alpha, out=scratch, dtype=np.uint32)
+        scratch += blend.premultiplied
+        scratch //= 255
+        np.copyto(region, scratch, casting="unsafe")
@@ -1,12 +1,55 @@
 """
 共通ロガーユーティリティ
 アプリケーション全体で使用するロガーを提供
+
+ログの書き出しはQueueListenerの別スレッドで行い、呼び出し側のスレッドではキューへの追加のみを行う
 """
 
+import atexit
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_listener: Optional[QueueListener] = None
+_queue_listener_lock = threading.Lock()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """メッセージの整形をリスナースレッドに任せるQueueHandler"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 標準のQueueHandlerは呼び出し側のスレッドでメッセージを整形するため、
+        # レコードをそのままキューに渡して整形・書き出しをリスナースレッドで行う
+        return record
+
+
+def _ensure_queue_listener() -> None:
+    """stderrへ書き出すQueueListenerをプロセスで1つだけ起動する"""
+    global _queue_listener
+    with _queue_listener_lock:
+        if _queue_listener is not None:
+            return
+
+        # コンソールハンドラを作成（レベルの判定は各ロガーで行う）
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(logging.NOTSET)
+
+        # フォーマッタを作成
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        console_handler.setFormatter(formatter)
+
+        _queue_listener = QueueListener(_log_queue, console_handler, respect_handler_level=True)
+        _queue_listener.start()
+        # 終了時にキューに残ったログを書き出す
+        atexit.register(_queue_listener.stop)
+
 
 def get_logger(name: str, level: Optional[int] = None) -> logging.Logger:
     """
@@ -30,22 +73,38 @@ def get_logger(name: str, level: Optional[int] = None) -> logging.Logger:
         level = logging.INFO
     logger.setLevel(level)
     
-    # コンソールハンドラを作成
-    console_handler = logging.StreamHandler(sys.stderr)
-    console_handler.setLevel(level)
-    
-    # フォーマッタを作成
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    
-    # ハンドラをロガーに追加
-    logger.addHandler(console_handler)
+    # キューハンドラをロガーに追加（書き出しはリスナースレッドで行う）
+    _ensure_queue_listener()
+    logger.addHandler(_DeferredQueueHandler(_log_queue))
     
     # 親ロガーへの伝播を防ぐ（重複ログを防ぐ）
     logger.propagate = False
     
     return logger
 
+
+class TruncatedPayload:
+    """
+    ログ出力時に初めて文字列化・切り詰めを行うペイロード
+
+    ロガーの引数（%s）として渡すと、整形はリスナースレッドで行われる
+    """
+
+    def __init__(self, payload: object, max_chars: int):
+        """
+        初期化
+
+        Args:
+            payload: ログに出力する値（プロンプト、レスポンス、JSONスキーマなど）
+            max_chars: 出力する最大文字数
+        """
+        self._payload = payload
+        self._max_chars = max_chars
+
+    def __str__(self) -> str:
+        if self._payload is None:
+            return "None"
+        text = self._payload if isinstance(self._payload, str) else str(self._payload)
+        if len(text) <= self._max_chars:
+            return text
+        return f"{text[:self._max_chars]}...(truncated {len(text) - self._max_chars} chars)"
@@ -0,0 +1,49 @@
+"""
+メディアファイルのハッシュ関連のユーティリティ関数
+"""
+
+import hashlib
+import os
+
+# 先頭・中央・末尾から読み込むバイト数
+_SAMPLE_BYTES = 1024 * 1024
+
+
+def compute_media_hash(media_path: str) -> str:
+    """
+    メディアファイルのハッシュを計算する
+
+    大きな動画でもすぐに計算できるよう、ファイルサイズと先頭・中央・末尾の一部だけをハッシュする。
+
+    Args:
+        media_path: メディアファイルのパス
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    file_size = os.path.getsize(media_path)
+    digest = hashlib.sha256(str(file_size).encode("utf-8"))
+    with open(media_path, "rb") as f:
+        if file_size <= _SAMPLE_BYTES * 3:
+            digest.update(f.read())
+        else:
+            for offset in (0, file_size // 2, file_size - _SAMPLE_BYTES):
+                f.seek(offset)
+                digest.update(f.read(_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def compute_content_hash(data: bytes) -> str:
+    """
+    メディアの内容全体のハッシュを計算する
+
+    compute_media_hashは一部しか読まないため、同じサイズで途中だけが異なる動画を区別できない。
+    再レンダリングせずに出力を返すアーティファクトストアのキーにはこちらを使う。
+
+    Args:
+        data: メディアファイルの内容
+
+    Returns:
+        SHA-256の16進文字列
+    """
+    return hashlib.sha256(data).hexdigest()
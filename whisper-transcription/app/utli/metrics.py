@@ -0,0 +1,319 @@
+"""
+メトリクス・トレーシングのユーティリティ
+パイプラインの各ステージの所要時間やLLM呼び出しの統計を集計し、
+Prometheusテキスト形式とJSON Lines形式で出力する
+
+ファイルへの書き出しは別スレッドで一定間隔ごとにまとめて行い、呼び出し側のスレッドではメモリ上の集計だけを行う
+"""
+
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from config import MetricsConstants, Settings
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for idx, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[idx] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """カウンタ・ヒストグラムを保持し、エクスポートするレジストリ"""
+
+    def __init__(self, export_dir: Optional[Path] = None, flush_interval_seconds: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            export_dir: JSON Lines・Prometheusテキストの出力先（Noneの場合はファイル出力しない）
+            flush_interval_seconds: ファイルへの書き出し間隔（Noneの場合はMetricsConstants.FLUSH_INTERVAL_SECONDS）
+        """
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[_LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._pending_events: Deque[str] = deque(maxlen=MetricsConstants.MAX_PENDING_EVENTS)
+        self._dirty = False
+        self._flush_interval_seconds = (
+            flush_interval_seconds
+            if flush_interval_seconds is not None
+            else MetricsConstants.FLUSH_INTERVAL_SECONDS
+        )
+        self._flush_thread: Optional[threading.Thread] = None
+        self._export_dir = Path(export_dir) if export_dir else None
+        if self._export_dir:
+            self._export_dir.mkdir(parents=True, exist_ok=True)
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels: str) -> None:
+        """カウンタを加算する"""
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            if help_text:
+                self._help.setdefault(name, help_text)
+            self._dirty = True
+        self._ensure_flush_thread()
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        help_text: str = "",
+        buckets: Optional[Tuple[float, ...]] = None,
+        **labels: str,
+    ) -> None:
+        """ヒストグラムに値を記録する"""
+        key = self._label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = _Histogram(buckets or MetricsConstants.LATENCY_BUCKETS)
+                series[key] = histogram
+            histogram.observe(value)
+            if help_text:
+                self._help.setdefault(name, help_text)
+            self._dirty = True
+        self._ensure_flush_thread()
+
+    @contextmanager
+    def span(self, stage: str, **labels: str) -> Iterator[Dict[str, object]]:
+        """
+        ステージの所要時間を計測する
+
+        Args:
+            stage: ステージ名（probe, scene_extraction, trim, transcribe, translate, renderなど）
+            labels: 追加のラベル
+
+        Yields:
+            スパンの属性（呼び出し側で値を追加するとJSON Linesに出力される）
+        """
+        attributes: Dict[str, object] = {}
+        start_time = time.time()
+        status = "ok"
+        try:
+            yield attributes
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            duration = time.time() - start_time
+            self.observe(
+                "pipeline_stage_duration_seconds",
+                duration,
+                help_text="Pipeline stage latency in seconds.",
+                stage=stage,
+                status=status,
+                **labels,
+            )
+            self.record_event({
+                "type": "span",
+                "stage": stage,
+                "status": status,
+                "start": start_time,
+                "duration": round(duration, 6),
+                "labels": labels,
+                "attributes": attributes,
+            })
+
+    def record_event(self, event: Dict[str, object]) -> None:
+        """イベントをJSON Linesの書き出し待ちに追加する（ファイルへの追記はflush()で行う）"""
+        if not self._export_dir:
+            return
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._pending_events.append(line)
+        self._ensure_flush_thread()
+
+    def flush(self) -> None:
+        """書き出し待ちのイベントをJSON Linesに追記し、変更があればPrometheusテキストを書き出す"""
+        if not self._export_dir:
+            return
+        with self._export_lock:
+            with self._lock:
+                lines = list(self._pending_events)
+                self._pending_events.clear()
+                dirty = self._dirty
+                self._dirty = False
+            if lines:
+                path = self._export_dir / MetricsConstants.JSONL_FILE_NAME
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                if path.stat().st_size >= MetricsConstants.JSONL_MAX_BYTES:
+                    self._rotate(path)
+            if dirty:
+                self._write_prometheus_file()
+
+    def render_prometheus(self) -> str:
+        """Prometheusテキスト形式で全メトリクスを出力する"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{self._format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    for upper, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{self._format_labels(key, le=str(upper))} {count}")
+                    lines.append(f"{name}_bucket{self._format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {histogram.total}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus_file(self) -> None:
+        """Prometheusテキストをファイルに書き出す（node_exporterのtextfile collector形式。_export_lockを持って呼ぶ）"""
+        path = self._export_dir / MetricsConstants.PROMETHEUS_FILE_NAME
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(self.render_prometheus(), encoding="utf-8")
+        temp_path.replace(path)
+
+    @staticmethod
+    def _rotate(path: Path) -> None:
+        """events.jsonl を events.jsonl.1 に移し、古い世代を1つずつずらす（上限を超えた世代は削除される）"""
+        backup_count = MetricsConstants.JSONL_BACKUP_COUNT
+        for generation in range(backup_count - 1, 0, -1):
+            source = path.with_name(f"{path.name}.{generation}")
+            if source.exists():
+                source.replace(path.with_name(f"{path.name}.{generation + 1}"))
+        if backup_count > 0:
+            path.replace(path.with_name(f"{path.name}.1"))
+        else:
+            path.unlink()
+
+    def _ensure_flush_thread(self) -> None:
+        """ファイル出力が有効な場合に、定期的にflush()するスレッドを起動する"""
+        if not self._export_dir or self._flush_thread is not None:
+            return
+        with self._export_lock:
+            if self._flush_thread is not None:
+                return
+            self._flush_thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flush_thread.start()
+        # 終了時に書き出し待ちのイベントを書き出す
+        atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self._flush_interval_seconds)
+            try:
+                self.flush()
+            except OSError:
+                # 書き出しに失敗しても集計は続け、次の間隔で再試行する
+                pass
+
+    @staticmethod
+    def _label_key(labels: Dict[str, object]) -> _LabelKey:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @staticmethod
+    def _format_labels(key: _LabelKey, **extra: str) -> str:
+        pairs = list(key) + list(extra.items())
+        if not pairs:
+            return ""
+        escaped = [
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        ]
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    プロセス共通のメトリクスレジストリを取得する
+
+    Returns:
+        MetricsRegistry
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            settings = Settings()
+            export_dir = settings.METRICS_DIR if settings.METRICS_EXPORT_ENABLED else None
+            _metrics = MetricsRegistry(export_dir)
+        return _metrics
+
+
+def record_llm_usage(
+    provider: str,
+    model: str,
+    usage: Optional[Dict[str, object]],
+    media_bytes: int = 0,
+) -> None:
+    """
+    LLM呼び出しのトークン数・アップロードしたメディアのバイト数を記録する
+
+    Args:
+        provider: プロバイダー名
+        model: モデル名
+        usage: langchainのusage_metadata（input_tokens, output_tokens）
+        media_bytes: アップロードしたメディアのバイト数
+    """
+    metrics = get_metrics()
+    for direction in ("input", "output"):
+        tokens = (usage or {}).get(f"{direction}_tokens") or 0
+        metrics.inc(
+            "llm_tokens_total",
+            float(tokens),
+            help_text="LLM tokens by provider, model and direction.",
+            provider=provider,
+            model=model,
+            direction=direction,
+        )
+    if media_bytes:
+        metrics.inc(
+            "llm_media_uploaded_bytes_total",
+            float(media_bytes),
+            help_text="Media bytes uploaded to LLM providers.",
+            provider=provider,
+            model=model,
+        )
+
+
+def record_encode_fps(stage: str, frame_count: float, seconds: float) -> None:
+    """
+    エンコード速度（fps）を記録する
+
+    Args:
+        stage: ステージ名（trim, renderなど）
+        frame_count: エンコードしたフレーム数
+        seconds: エンコードにかかった秒数
+    """
+    if seconds <= 0:
+        return
+    get_metrics().observe(
+        "encode_fps",
+        frame_count / seconds,
+        help_text="Encoded frames per second.",
+        buckets=MetricsConstants.FPS_BUCKETS,
+        stage=stage,
+    )
@@ -0,0 +1,179 @@
+"""
+LLMが返したセグメントの検証と部分的な回復
+途中で切れたJSONから完全な要素だけを取り出し、時刻が不正・欠落している範囲を再リクエスト対象として特定する
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from utli.logger import get_logger
+from utli.time_utils import seconds_to_time, try_time_to_seconds
+
+logger = get_logger(__name__)
+
+_DECODER = json.JSONDecoder()
+
+# (開始秒, 終了秒) 終了秒がNoneの場合はメディアの末尾まで
+MissingRange = Tuple[float, Optional[float]]
+
+
+def salvage_json_objects(text: str) -> List[Dict[str, Any]]:
+    """
+    途中で切れたJSONから、閉じている要素（入れ子のないオブジェクト）だけを取り出す
+
+    Args:
+        text: LLMの応答テキスト
+
+    Returns:
+        解析できたオブジェクトのリスト（出現順）
+    """
+    objects = []
+    position = text.find("{")
+    while position != -1:
+        try:
+            item, end = _DECODER.raw_decode(text, position)
+        except json.JSONDecodeError:
+            # 閉じていない外側のオブジェクトなど。次の"{"から探し直す
+            position = text.find("{", position + 1)
+            continue
+        if isinstance(item, dict) and not _has_nested_object(item):
+            objects.append(item)
+            # 文字列中の"{"や"}"を含め、要素の末尾まで読み飛ばす
+            position = text.find("{", end)
+        else:
+            # 入れ子を含むオブジェクトは内側の要素を取り出す
+            position = text.find("{", position + 1)
+    return objects
+
+
+def _has_nested_object(item: Dict[str, Any]) -> bool:
+    return any(
+        isinstance(value, dict) or (isinstance(value, list) and any(isinstance(element, dict) for element in value))
+        for value in item.values()
+    )
+
+
+class SegmentValidation:
+    """validate_segmentsの結果"""
+
+    def __init__(
+        self,
+        valid_segments: List[Dict[str, Any]],
+        invalid_count: int,
+        missing_ranges: List[MissingRange],
+    ):
+        """
+        初期化
+
+        Args:
+            valid_segments: 時刻をHH:MM:SS.mmmに揃えた有効なセグメント（開始時刻順）
+            invalid_count: 時刻・テキストが不正で除いたセグメント数
+            missing_ranges: 再リクエストが必要な範囲のリスト
+        """
+        self.valid_segments = valid_segments
+        self.invalid_count = invalid_count
+        self.missing_ranges = missing_ranges
+
+
+def validate_segments(
+    segments: List[Any],
+    media_duration: Optional[float] = None,
+    gap_seconds: Optional[float] = None,
+    tail_seconds: Optional[float] = None,
+    truncated: bool = False,
+    start_key: str = "start_time",
+    end_key: str = "end_time",
+) -> SegmentValidation:
+    """
+    セグメントの時刻とテキストを検証し、欠落している範囲を特定する
+
+    不正なセグメントは前後の有効なセグメントの間を、応答が途中で切れた場合は最後のセグメント以降を欠落範囲とする。
+    末尾・途中の空白がしきい値より長い場合も欠落範囲とするが、無音の終わりやBGMだけの区間でも空白になるため、
+    応答が途中で切れた・不正なセグメントがあった場合（応答が不完全な場合）に限って判定する。
+
+    Args:
+        segments: LLMが返したセグメントのリスト
+        media_duration: メディアの長さ（秒。不明な場合はNone）
+        gap_seconds: 応答が不完全な場合に、セグメント間の空白をこの秒数以上で欠落とみなす（Noneの場合は判定しない）
+        tail_seconds: 応答が不完全な場合に、最後のセグメントからメディア末尾までをこの秒数以上で欠落とみなす
+            （Noneの場合は判定しない）
+        truncated: 応答が途中で切れていた場合はTrue（最後のセグメント以降を欠落とみなす）
+        start_key: 開始時刻のキー
+        end_key: 終了時刻のキー
+
+    Returns:
+        SegmentValidation
+    """
+    # 元の順序のまま (開始秒, 終了秒, セグメント) を並べ、不正なものはNoneにする
+    parsed: List[Optional[Tuple[float, float, Dict[str, Any]]]] = []
+    for item in segments:
+        if not isinstance(item, dict) or not str(item.get("text") or "").strip():
+            parsed.append(None)
+            continue
+        start = try_time_to_seconds(item.get(start_key))
+        end = try_time_to_seconds(item.get(end_key))
+        if start is None or end is None or end <= start:
+            parsed.append(None)
+            continue
+        if media_duration is not None and start >= media_duration:
+            parsed.append(None)
+            continue
+        if media_duration is not None:
+            end = min(end, media_duration)
+        parsed.append((start, end, item))
+
+    ranges: List[MissingRange] = []
+    for idx, entry in enumerate(parsed):
+        if entry is not None:
+            continue
+        previous_end = next((parsed[i][1] for i in range(idx - 1, -1, -1) if parsed[i]), 0.0)
+        next_start = next((parsed[i][0] for i in range(idx + 1, len(parsed)) if parsed[i]), media_duration)
+        if next_start is None or next_start > previous_end:
+            ranges.append((previous_end, next_start))
+
+    valid = sorted((entry for entry in parsed if entry is not None), key=lambda entry: entry[0])
+    invalid_count = sum(1 for entry in parsed if entry is None)
+    incomplete = truncated or invalid_count > 0
+    if incomplete and gap_seconds is not None:
+        for (_, previous_end, _), (next_start, _, _) in zip(valid, valid[1:]):
+            if next_start - previous_end >= gap_seconds:
+                ranges.append((previous_end, next_start))
+    last_end = valid[-1][1] if valid else 0.0
+    if truncated:
+        ranges.append((last_end, media_duration))
+    elif incomplete and valid and media_duration is not None and tail_seconds is not None:
+        if media_duration - last_end >= tail_seconds:
+            ranges.append((last_end, media_duration))
+
+    missing_ranges = _merge_ranges(ranges)
+    if invalid_count or missing_ranges:
+        logger.warning(
+            "segment validation: valid=%d invalid=%d truncated=%s missing_ranges=%s",
+            len(valid),
+            invalid_count,
+            truncated,
+            [(round(start, 3), None if end is None else round(end, 3)) for start, end in missing_ranges],
+        )
+    return SegmentValidation(
+        [
+            {**item, start_key: seconds_to_time(start), end_key: seconds_to_time(end)}
+            for start, end, item in valid
+        ],
+        invalid_count,
+        missing_ranges,
+    )
+
+
+def _merge_ranges(ranges: List[MissingRange]) -> List[MissingRange]:
+    """重なる範囲をまとめる（終了がNoneの範囲は末尾までとして扱う）"""
+    merged: List[MissingRange] = []
+    for start, end in sorted(ranges, key=lambda item: item[0]):
+        if end is not None and end <= start:
+            continue
+        if merged:
+            last_start, last_end = merged[-1]
+            if last_end is None or start <= last_end:
+                merged[-1] = (last_start, None if last_end is None or end is None else max(last_end, end))
+                continue
+        merged.append((start, end))
+    return merged
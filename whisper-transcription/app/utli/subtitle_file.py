@@ -0,0 +1,42 @@
+"""
+セグメントを字幕ファイル（SRT）に変換するユーティリティ関数
+"""
+
+from typing import Any, Dict, List
+
+from utli.time_utils import try_time_to_seconds
+
+
+def _format_srt_time(seconds: float) -> str:
+    total_millis = int(round(max(0.0, seconds) * 1000))
+    hours, remainder = divmod(total_millis, 3600 * 1000)
+    minutes, remainder = divmod(remainder, 60 * 1000)
+    secs, millis = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def build_srt(segments: List[Dict[str, Any]]) -> str:
+    """
+    セグメントのリストをSRT形式の文字列に変換する
+
+    Args:
+        segments: start_time, end_time, textを持つセグメントのリスト
+            時刻やテキストが不正なセグメントは出力しない
+
+    Returns:
+        SRT形式の文字列
+    """
+    entries = []
+    for item in segments:
+        start = try_time_to_seconds(item.get("start_time"))
+        end = try_time_to_seconds(item.get("end_time"))
+        text = str(item.get("text") or "").strip()
+        if start is None or end is None or end <= start or not text:
+            continue
+        entries.append((start, end, text))
+    entries.sort(key=lambda entry: entry[0])
+    blocks = [
+        f"{index}\n{_format_srt_time(start)} --> {_format_srt_time(end)}\n{text}\n"
+        for index, (start, end, text) in enumerate(entries, start=1)
+    ]
+    return "\n".join(blocks)
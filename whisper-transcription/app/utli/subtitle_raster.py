@@ -0,0 +1,156 @@
+"""
+字幕テキストをRGBA画像として描画し、テキスト・フォント・スタイルごとに再利用するキャッシュ
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from config import SubtitleConstants
+from utli.metrics import get_metrics
+
+_RasterKey = Tuple[str, Optional[str], int, int, str, str, int, int]
+
+
+@lru_cache(maxsize=64)
+def _load_font(font_path: Optional[str], font_index: int, font_size: int) -> ImageFont.ImageFont:
+    if font_path is None:
+        return ImageFont.load_default(font_size)
+    return ImageFont.truetype(font_path, font_size, index=font_index)
+
+
+class SubtitleRasterCache:
+    """字幕画像（RGBAのnumpy配列）を件数上限付きのLRUで保持するキャッシュ"""
+
+    def __init__(self, max_entries: int = SubtitleConstants.RASTER_CACHE_MAX_ENTRIES):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持する字幕画像の最大件数
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sprites: "OrderedDict[_RasterKey, np.ndarray]" = OrderedDict()
+
+    def render(
+        self,
+        text: str,
+        font_path: Optional[str],
+        font_index: int,
+        font_size: int,
+        color: str,
+        stroke_color: str,
+        stroke_width: int,
+        max_width: int,
+    ) -> np.ndarray:
+        """
+        字幕テキストを中央揃え・最大幅で折り返したRGBA画像を返す（同じ条件の画像はキャッシュから返す）
+
+        Args:
+            text: 字幕テキスト（改行を含んでもよい）
+            font_path: フォントファイルのパス（Noneの場合はPillowの既定フォント）
+            font_index: フォントコレクション内のインデックス
+            font_size: フォントサイズ（px）
+            color: 文字色
+            stroke_color: 縁取りの色
+            stroke_width: 縁取りの太さ（px）
+            max_width: 折り返す最大幅（px）
+
+        Returns:
+            (高さ, 幅, 4) のuint8配列（呼び出し側で書き換えないこと）
+        """
+        key = (text, font_path, font_index, font_size, color, stroke_color, stroke_width, max_width)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+        get_metrics().inc(
+            "subtitle_raster_cache_total",
+            help_text="Subtitle sprite lookups by cache result.",
+            result="hit" if sprite is not None else "miss",
+        )
+        if sprite is not None:
+            return sprite
+
+        sprite = self._rasterize(key)
+        sprite.setflags(write=False)
+        with self._lock:
+            self._sprites[key] = sprite
+            while len(self._sprites) > self.max_entries:
+                self._sprites.popitem(last=False)
+        return sprite
+
+    @staticmethod
+    def _rasterize(key: _RasterKey) -> np.ndarray:
+        text, font_path, font_index, font_size, color, stroke_color, stroke_width, max_width = key
+        font = _load_font(font_path, font_index, font_size)
+        wrapped = "\n".join(
+            line
+            for paragraph in text.split("\n")
+            for line in _wrap_line(paragraph, font, max_width - 2 * stroke_width)
+        )
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        left, top, right, bottom = measure.multiline_textbbox(
+            (0, 0),
+            wrapped,
+            font=font,
+            align="center",
+            stroke_width=stroke_width,
+        )
+        width = max(1, min(max_width, math.ceil(right - left)))
+        height = max(1, math.ceil(bottom - top))
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(image).multiline_text(
+            (-left, -top),
+            wrapped,
+            font=font,
+            fill=color,
+            align="center",
+            stroke_width=stroke_width,
+            stroke_fill=stroke_color,
+        )
+        return np.asarray(image)
+
+
+def _wrap_line(line: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
+    """最大幅に収まるように折り返す（空白があれば単語単位、なければ文字単位）"""
+    if not line or font.getlength(line) <= max_width:
+        return [line]
+    tokens = line.split(" ") if " " in line else list(line)
+    separator = " " if " " in line else ""
+    lines: List[str] = []
+    current = ""
+    for token in tokens:
+        candidate = f"{current}{separator}{token}" if current else token
+        if current and font.getlength(candidate) > max_width:
+            lines.append(current)
+            current = token
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+_raster_cache: Optional[SubtitleRasterCache] = None
+_raster_cache_lock = threading.Lock()
+
+
+def get_subtitle_raster_cache() -> SubtitleRasterCache:
+    """
+    プロセス共通の字幕画像キャッシュを取得する（再レンダリング時も描画結果を再利用する）
+
+    Returns:
+        SubtitleRasterCache
+    """
+    global _raster_cache
+    with _raster_cache_lock:
+        if _raster_cache is None:
+            _raster_cache = SubtitleRasterCache()
+        return _raster_cache
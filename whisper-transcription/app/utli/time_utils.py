@@ -2,6 +2,13 @@
 時間関連のユーティリティ関数
 """
 
+import math
+import re
+from typing import Optional
+
+# "12.5", "12.5s", "12,5" のような秒数だけの表記
+_SECONDS_PATTERN = re.compile(r"^(\d+(?:[.,]\d+)?)\s*s?$")
+
 
 def time_to_seconds(time_str: str | int | float) -> float:
     """
@@ -9,14 +16,23 @@ def time_to_seconds(time_str: str | int | float) -> float:
     
     Args:
         time_str: 時間文字列（例: "00:02:19.000"）または秒数（float/int）
+            小数点の代わりのカンマ（"00:02:19,000"）や秒数だけの文字列（"139.5"）も受け付ける
     
     Returns:
         秒数（float）
+
+    Raises:
+        ValueError: 解釈できない形式の場合
     """
     if isinstance(time_str, (int, float)):
         return float(time_str)
 
-    parts = time_str.strip().split(":")
+    text = time_str.strip()
+    seconds_match = _SECONDS_PATTERN.match(text)
+    if seconds_match:
+        return float(seconds_match.group(1).replace(",", "."))
+
+    parts = text.replace(",", ".").split(":")
     if len(parts) == 2:
         hours = 0
         minutes = int(parts[0])
@@ -35,8 +51,51 @@ def time_to_seconds(time_str: str | int | float) -> float:
         raise ValueError(f"Unsupported time format: {time_str}")
 
     seconds_parts = seconds_token.split(".")
+    if len(seconds_parts) > 2 or not all(part.isdigit() for part in seconds_parts):
+        raise ValueError(f"Unsupported time format: {time_str}")
     seconds = int(seconds_parts[0])
-    milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
+    # "00:01.5" は1.5秒として扱う（桁数に関係なく小数部とみなす）
+    fraction = float(f"0.{seconds_parts[1]}") if len(seconds_parts) > 1 else 0.0
     
-    total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
+    total_seconds = hours * 3600 + minutes * 60 + seconds + fraction
     return total_seconds
+
+
+def try_time_to_seconds(time_str: object) -> Optional[float]:
+    """
+    時間文字列を秒数に変換する（解釈できない場合は例外を投げずにNoneを返す）
+
+    Args:
+        time_str: 時間文字列または秒数
+
+    Returns:
+        秒数（空・不正な形式・負の値・NaNの場合はNone）
+    """
+    if time_str is None or time_str == "" or isinstance(time_str, bool):
+        return None
+    if not isinstance(time_str, (str, int, float)):
+        return None
+    try:
+        seconds = time_to_seconds(time_str)
+    except ValueError:
+        return None
+    if math.isnan(seconds) or math.isinf(seconds) or seconds < 0:
+        return None
+    return seconds
+
+
+def seconds_to_time(seconds: float) -> str:
+    """
+    秒数を時間文字列（HH:MM:SS.mmm）に変換
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        時間文字列（例: "00:02:19.000"）
+    """
+    total_millis = int(round(max(0.0, seconds) * 1000))
+    hours, remainder = divmod(total_millis, 3600 * 1000)
+    minutes, remainder = divmod(remainder, 60 * 1000)
+    secs, millis = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"